@@ -0,0 +1,274 @@
+"""
+Benchmarks the time and peak memory used to read and analyze synthetic SWITCH-like models
+(see lp_analyzer/generator.py) of increasing sizes.
+
+Usage:
+    python benchmarks/run.py --sizes 1e4,1e5,1e6 -o results.json
+    python benchmarks/run.py compare before.json after.json
+
+Every benchmark runs in a fresh process such that the peak memory of each phase is not
+affected by the previous benchmarks. Results are saved as JSON along with the commit
+they were measured on, such that they can be compared between commits.
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+from tabulate import tabulate
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from lp_analyzer.__main__ import read_model  # noqa: E402
+from lp_analyzer.analyze import full_analysis  # noqa: E402
+from lp_analyzer.generator import write_switch_like_model  # noqa: E402
+from lp_analyzer.instrumentation import PeakMemory  # noqa: E402
+
+RESULTS_VERSION = 1
+
+# Mapping of the benchmarked configurations to the arguments of read_model()
+CONFIGS = {
+    "python": dict(engine="python"),
+    "numpy": dict(engine="numpy"),
+    "mmap": dict(engine="numpy", use_mmap=True),
+    "parallel": dict(engine="numpy", jobs=os.cpu_count() or 1),
+}
+
+
+def run_case(path, config, verbose, connection):
+    """Reads then analyzes the model, sending the time and peak memory of each phase."""
+    phases = {}
+    with contextlib.ExitStack() as stack:
+        if not verbose:
+            devnull = stack.enter_context(open(os.devnull, "w"))
+            stack.enter_context(contextlib.redirect_stdout(devnull))
+        start = time.perf_counter()
+        with PeakMemory() as memory:
+            model = read_model(path, **CONFIGS[config])
+        phases["parse"] = (time.perf_counter() - start, memory.start, memory.peak)
+
+        outfile = os.path.join(
+            tempfile.gettempdir(), f"lp_analyzer_benchmark_{os.getpid()}.txt"
+        )
+        start = time.perf_counter()
+        with PeakMemory() as memory:
+            full_analysis(model, outfile)
+        phases["analysis"] = (time.perf_counter() - start, memory.start, memory.peak)
+        os.remove(outfile)
+    connection.send(phases)
+
+
+def run_in_new_process(path, config, verbose) -> dict:
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=run_case, args=(path, config, verbose, sender))
+    process.start()
+    sender.close()
+    try:
+        phases = receiver.recv()
+    except EOFError:
+        raise Exception(f"Benchmark {config} failed on {path}")
+    finally:
+        process.join()
+    return phases
+
+
+def get_metadata() -> dict:
+    def git(*args):
+        try:
+            directory = os.path.dirname(os.path.abspath(__file__))
+            return subprocess.check_output(
+                ["git", *args], cwd=directory, universal_newlines=True
+            ).strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    return {
+        "commit": git("rev-parse", "HEAD"),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def run(args):
+    os.makedirs(args.data_dir, exist_ok=True)
+    results = []
+    for size in args.sizes:
+        case = f"switch-{size:.0e}"
+        path = os.path.join(
+            args.data_dir, f"{case}-spread{args.spread:g}-seed{args.seed}.mps"
+        )
+        # Generated models are kept since large ones take a while to write
+        if not os.path.exists(path):
+            print(f"Generating {path}")
+            temp_path = path + ".tmp"
+            write_switch_like_model(temp_path, int(size), args.spread, args.seed)
+            os.replace(temp_path, path)
+        file_size = os.path.getsize(path)
+
+        for config in args.configs:
+            runs = [
+                run_in_new_process(path, config, args.verbose)
+                for _ in range(args.repeat)
+            ]
+            for phase in runs[0]:
+                seconds = [phases[phase][0] for phases in runs]
+                start_rss = [phases[phase][1] for phases in runs]
+                peak_rss = [phases[phase][2] for phases in runs]
+                result = {
+                    "case": case,
+                    "nonzeros": int(size),
+                    "file_size": file_size,
+                    "config": config,
+                    "phase": phase,
+                    "seconds": min(seconds),
+                    "all_seconds": seconds,
+                    # Memory used when the phase started (e.g. by the model for the analysis)
+                    "start_rss_mb": min(start_rss) / 2**20,
+                    "peak_rss_mb": min(peak_rss) / 2**20,
+                }
+                results.append(result)
+                print(
+                    f"{case:>12} {config:>8} {phase:>8}: {result['seconds']:8.3f} s"
+                    f" {result['peak_rss_mb']:8.1f} MB"
+                )
+
+    output = {
+        "version": RESULTS_VERSION,
+        "metadata": get_metadata(),
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(output, f, indent=2)
+    print(f"Saved results to: {args.output}")
+
+
+def compare(args):
+    """Prints the ratio (after / before) of the time and peak memory of each benchmark."""
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+    before_results = {
+        (result["case"], result["config"], result["phase"]): result
+        for result in before["results"]
+    }
+
+    rows = []
+    regressions = 0
+    for result in after["results"]:
+        key = (result["case"], result["config"], result["phase"])
+        if key not in before_results:
+            continue
+        old = before_results[key]
+        time_ratio = result["seconds"] / max(old["seconds"], 1e-9)
+        memory_ratio = result["peak_rss_mb"] / max(old["peak_rss_mb"], 1e-9)
+        if time_ratio > args.threshold:
+            regressions += 1
+        rows.append(
+            [
+                *key,
+                f"{old['seconds']:.3f}",
+                f"{result['seconds']:.3f}",
+                f"{time_ratio:.2f}x",
+                f"{old['peak_rss_mb']:.1f}",
+                f"{result['peak_rss_mb']:.1f}",
+                f"{memory_ratio:.2f}x",
+            ]
+        )
+    print(f"Before: {before['metadata'].get('commit')}")
+    print(f"After:  {after['metadata'].get('commit')}\n")
+    print(
+        tabulate(
+            rows,
+            headers=[
+                "Case",
+                "Config",
+                "Phase",
+                "Before (s)",
+                "After (s)",
+                "Time",
+                "Before (MB)",
+                "After (MB)",
+                "Memory",
+            ],
+            tablefmt="github",
+            disable_numparse=True,
+        )
+    )
+    if regressions:
+        print(f"\n{regressions} benchmark(s) are more than {args.threshold}x slower.")
+        sys.exit(1)
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "compare":
+        parser = argparse.ArgumentParser(prog="run.py compare")
+        parser.add_argument("before", help="Results of the baseline")
+        parser.add_argument("after", help="Results to compare to the baseline")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=1.2,
+            help="Exit with an error if a benchmark is slower by more than this factor "
+            "(default: 1.2).",
+        )
+        compare(parser.parse_args(sys.argv[2:]))
+        return
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--sizes",
+        type=lambda s: [float(size) for size in s.split(",")],
+        default=[1e4, 1e5, 1e6],
+        help="Comma separated numbers of non-zeroes of the models (from 1e4 to 1e8).",
+    )
+    parser.add_argument(
+        "--spread",
+        type=float,
+        default=4.0,
+        help="Orders of magnitude spanned by the coefficients of each kind.",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--configs",
+        type=lambda s: s.split(","),
+        default=list(CONFIGS),
+        help=f"Comma separated configurations to benchmark among {', '.join(CONFIGS)}.",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=1,
+        help="Number of runs of each benchmark, the fastest is kept.",
+    )
+    parser.add_argument(
+        "--data-dir",
+        default=os.path.join(tempfile.gettempdir(), "lp-analyzer-benchmarks"),
+        help="Directory where the generated models are kept.",
+    )
+    parser.add_argument("-o", "--output", default="benchmark_results.json")
+    parser.add_argument(
+        "-v", "--verbose", action="store_true", help="Show the progress of each phase."
+    )
+    args = parser.parse_args()
+    unknown = set(args.configs) - set(CONFIGS)
+    if unknown:
+        parser.error(f"Unknown configurations: {', '.join(unknown)}")
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
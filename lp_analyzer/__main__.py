@@ -1,32 +1,819 @@
 import argparse
-from lp_analyzer.reader import MPSReader
-from lp_analyzer.analyze import full_analysis
+import contextlib
+import os
+import signal
+import sys
+from typing import Optional, Tuple
+
+# The other subsystems are imported by the commands using them, such that a command
+# doesn't pay for importing all of them
+from lp_analyzer.core import ColumnNotContiguousError, SparseLPModel
+from lp_analyzer.files import is_compressed, is_lp_file, strip_extensions
+from lp_analyzer.reader import (
+    LPReader,
+    MmapMPSReader,
+    MPSReader,
+    ParallelMPSReader,
+    SparseMPSReader,
+)
+
+
+def add_read_arguments(parser: argparse.ArgumentParser):
+    """Adds the options of how models are read, shared by the commands reading a model."""
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of processes used to read the model. "
+        "Values above 1 read the file in parallel and imply '--engine numpy'.",
+    )
+    parser.add_argument(
+        "--mmap",
+        action="store_true",
+        help="Read the file by memory-mapping it and tokenizing its bytes directly "
+        "(faster, implies '--engine numpy').",
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Save the parsed model to a cache such that the next analysis of the same file "
+        "doesn't need to parse it again (implies '--engine numpy').",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=None,
+        help="Directory of the cache (default: ~/.cache/lp-analyzer). Implies --cache.",
+    )
+
+
+def get_cache(args):
+    if args.cache or args.cache_dir is not None:
+        from lp_analyzer.cache import ModelCache
+
+        return ModelCache(args.cache_dir)
+    return None
+
+
+def read_sparse_model(args, input_file: Optional[str] = None) -> SparseLPModel:
+    """
+    Reads args.input_file (or input_file) with the options of add_read_arguments().
+    The commands other than the analysis work on the arrays of the matrix, so the model
+    is always read with the numpy engine.
+    """
+    return read_model(
+        input_file or args.input_file, "numpy", args.jobs, args.mmap, get_cache(args)
+    )
 
 
 def main():
+    if sys.argv[1:2] == ["diff"]:
+        diff_main(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ["scale"]:
+        scale_main(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ["check"]:
+        check_main(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ["drilldown"]:
+        drilldown_main(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ["parallel"]:
+        parallel_main(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ["index"]:
+        index_main(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ["query"]:
+        query_main(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ["serve"]:
+        serve_main(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ["client"]:
+        from lp_analyzer.client import main as client_main
+
+        client_main(sys.argv[2:])
+        return
+    from lp_analyzer.batch import analyze_batch, find_model_files, parse_size
+    from lp_analyzer.sampling import DEFAULT_BUDGET
+
     # Parse command line input
-    parser = argparse.ArgumentParser()
-    parser.add_argument("input_file", type=str, help="Path of input file")
+    parser = argparse.ArgumentParser(
+        epilog="To compare two models, run 'lp-analyzer diff before.mps after.mps'. "
+        "To get a suggested scaling factor for each family, run 'lp-analyzer scale model.mps'. "
+        "To check that the values are within thresholds (e.g. in CI), run "
+        "'lp-analyzer check --max 1e9 --min 1e-9 model.mps'. To break down the "
+        "coefficient range of each family by index value (e.g. by period), run "
+        "'lp-analyzer drilldown model.mps'. To find duplicate and parallel rows and "
+        "columns, run 'lp-analyzer parallel model.mps'. To query the coefficients of "
+        "a model without reading it again, run 'lp-analyzer index model.mps' once, then "
+        "e.g. 'lp-analyzer query model.sqlite --var-family X --below 1e-6'. To keep "
+        "models in memory between analyses, run 'lp-analyzer serve' and send it "
+        "requests with 'python -m lp_analyzer.client analyze model.mps'."
+    )
+    parser.add_argument(
+        "input_files",
+        type=str,
+        nargs="+",
+        help="Path of input file in the .mps or .lp format "
+        "(can be compressed with gzip, bzip2, xz or zstd). Several files, directories "
+        "or glob patterns (e.g. 'scenarios/*.mps') are analyzed in batch mode.",
+    )
     parser.add_argument(
         "-o",
         "--output-file",
         type=str,
-        help="Specify an output text file to store the log output.",
+        help="Specify an output text file to store the log output. "
+        "In batch mode, the file of the summary (default: lp_analyzer_summary.txt).",
+        default=None,
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["python", "numpy", "stream"],
+        default="python",
+        help="Analysis engine. 'numpy' reads the model into a compact array-based "
+        "representation and computes the same statistics with vectorized operations. "
+        "It is much faster and uses less memory on large models. 'stream' computes "
+        "the statistics while reading an .mps file, without keeping the coefficients, "
+        "so its memory only grows with the number of rows.",
+    )
+    add_read_arguments(parser)
+    parser.add_argument(
+        "--top-k",
+        type=int,
+        default=0,
+        help="List the K smallest and K largest coefficients of each family "
+        "with their row and column (default: 0, i.e. only the minimum and maximum).",
+    )
+    parser.add_argument(
+        "--top-dense",
+        type=int,
+        default=None,
+        help="Number of densest columns and of densest rows listed (default: 10).",
+    )
+    parser.add_argument(
+        "--dense-row-threshold",
+        type=int,
+        default=None,
+        help="Rows with more non-zeroes are flagged as dense "
+        "(default: 10 times the average number of non-zeroes per row, at least 100).",
+    )
+    parser.add_argument(
+        "--dense-col-threshold",
+        type=int,
+        default=None,
+        help="Columns with more non-zeroes are flagged as dense, "
+        "which can slow down barrier solvers (default: like rows).",
+    )
+    parser.add_argument(
+        "--json-output",
+        type=str,
         default=None,
+        help="Also save the statistics of each family, including the histograms of the "
+        "orders of magnitude of its coefficients, bounds and RHS values, to this JSON file.",
+    )
+    parser.add_argument(
+        "--metrics-json",
+        type=str,
+        default=None,
+        help="Save the duration, counts (rows, columns, non-zeroes), throughput and "
+        "peak memory of each phase (reading, each analysis pass, the report) to this JSON file.",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=None,
+        help="Batch mode: number of files analyzed in parallel (default: number of CPUs).",
+    )
+    parser.add_argument(
+        "--memory-budget",
+        type=parse_size,
+        default=None,
+        help="Batch mode: maximum estimated memory of the files analyzed at once "
+        "(e.g. '16G'). Larger files wait until enough of the others are done.",
+    )
+    parser.add_argument(
+        "--approx",
+        action="store_true",
+        help="Estimate the statistics of each family from random chunks of the file "
+        "(see --approx-budget) instead of reading all of it, for a quick look at huge "
+        "uncompressed .mps files. Counts are given with a 95%% confidence interval.",
+    )
+    parser.add_argument(
+        "--approx-budget",
+        type=parse_size,
+        default=DEFAULT_BUDGET,
+        help="With --approx, the number of bytes read (default: 16M).",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="With --approx, the seed of the random choice of chunks (default: 0).",
     )
     args = parser.parse_args()
-    main_without_argument_parser(args.input_file, args.output_file)
+    cache = get_cache(args)
+    density_options = dict(
+        top_dense=args.top_dense,
+        dense_row_threshold=args.dense_row_threshold,
+        dense_col_threshold=args.dense_col_threshold,
+    )
+
+    input_files = find_model_files(args.input_files)
+    if not input_files:
+        parser.error("No model files found.")
+    if args.approx and (is_compressed(input_files[0]) or is_lp_file(input_files[0])):
+        parser.error("--approx needs an uncompressed .mps file.")
+    if input_files != args.input_files or len(input_files) > 1:
+        if args.metrics_json is not None or args.json_output is not None:
+            parser.error(
+                "--metrics-json and --json-output aren't supported in batch mode."
+            )
+        if args.approx:
+            parser.error("--approx isn't supported in batch mode.")
+        if args.jobs > 1:
+            print("In batch mode, each file is read by a single process.")
+        _, failures = analyze_batch(
+            input_files,
+            args.output_file or "lp_analyzer_summary.txt",
+            args.engine,
+            args.mmap,
+            cache.cache_dir if cache is not None else None,
+            args.workers,
+            args.memory_budget,
+            args.top_k,
+            density_options,
+        )
+        if failures:
+            sys.exit(1)
+        return
+
+    main_without_argument_parser(
+        input_files[0],
+        args.output_file,
+        args.engine,
+        args.jobs,
+        args.mmap,
+        cache,
+        args.metrics_json,
+        args.json_output,
+        args.top_k,
+        density_options,
+        (args.approx_budget, args.seed) if args.approx else None,
+    )
+
+
+def diff_main(argv):
+    from lp_analyzer.diff import diff_models
+
+    parser = argparse.ArgumentParser(
+        prog="lp-analyzer diff",
+        description="Compares the statistics of each family of variables and "
+        "constraints of two models and, optionally, their entries.",
+    )
+    parser.add_argument("before", type=str, help="Path of the first model")
+    parser.add_argument("after", type=str, help="Path of the model to compare it to")
+    parser.add_argument(
+        "-o",
+        "--output-file",
+        type=str,
+        default=None,
+        help="Output text file (default: <after>_diff.txt).",
+    )
+    parser.add_argument(
+        "--entries",
+        action="store_true",
+        help="Also report the non-zeroes, RHS values and bounds that were added, "
+        "removed or changed.",
+    )
+    parser.add_argument(
+        "--rtol",
+        type=float,
+        default=0.0,
+        help="With --entries, values within this relative tolerance are equal "
+        "(default: 0).",
+    )
+    parser.add_argument(
+        "--max-examples",
+        type=int,
+        default=20,
+        help="With --entries, the number of entries listed of each kind (default: 20).",
+    )
+    add_read_arguments(parser)
+    args = parser.parse_args(argv)
+    output_file = args.output_file or strip_extensions(args.after) + "_diff.txt"
+
+    result = diff_models(
+        lambda: read_sparse_model(args, args.before),
+        lambda: read_sparse_model(args, args.after),
+        args.entries,
+        args.rtol,
+    )
+    with open(output_file, "w") as f:
+        f.write(
+            f"Differences from {args.before} to {args.after}\n\n"
+            + result.report(args.max_examples)
+        )
+    print(f"Saved diff to: {output_file}")
+
+
+def scale_main(argv):
+    from lp_analyzer.scaling import (
+        DEFAULT_MAX_PASSES,
+        DEFAULT_TOLERANCE,
+        suggest_scaling,
+    )
+
+    parser = argparse.ArgumentParser(
+        prog="lp-analyzer scale",
+        description="Suggests a power of 10 to scale each family of variables and "
+        "constraints by (from geometric mean and equilibration scaling of every row "
+        "and column) and reports the range of the coefficients before and after.",
+    )
+    parser.add_argument("input_file", type=str, help="Path of the model")
+    parser.add_argument(
+        "-o",
+        "--output-file",
+        type=str,
+        default=None,
+        help="Output text file (default: <input>_scaling.txt).",
+    )
+    parser.add_argument(
+        "--passes",
+        type=int,
+        default=DEFAULT_MAX_PASSES,
+        help=f"Maximum number of geometric mean passes (default: {DEFAULT_MAX_PASSES}).",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help="Stop the passes once the range of the matrix improves by less than this "
+        f"many orders of magnitude (default: {DEFAULT_TOLERANCE}).",
+    )
+    parser.add_argument(
+        "--no-equilibrate",
+        action="store_true",
+        help="Don't equilibrate the rows and columns after the geometric mean passes.",
+    )
+    add_read_arguments(parser)
+    args = parser.parse_args(argv)
+    output_file = args.output_file or strip_extensions(args.input_file) + "_scaling.txt"
+
+    model = read_sparse_model(args)
+    result = suggest_scaling(
+        model, args.passes, args.tolerance, equilibrate=not args.no_equilibrate
+    )
+    result.save(output_file)
+    print(f"Saved scaling suggestions to: {output_file}")
+
+
+def drilldown_main(argv):
+    from lp_analyzer.drilldown import DEFAULT_TOP_VALUES, get_drilldown
+
+    parser = argparse.ArgumentParser(
+        prog="lp-analyzer drilldown",
+        description="Breaks down the coefficient range of each family by the value of each "
+        "position of its indexes, e.g. to find the period or zone of the extreme "
+        "coefficients of 'GenCapacity(zone,period)'.",
+    )
+    parser.add_argument("input_file", type=str, help="Path of the model")
+    parser.add_argument(
+        "-o",
+        "--output-file",
+        type=str,
+        default=None,
+        help="Output text file (default: <input>_drilldown.txt).",
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=DEFAULT_TOP_VALUES,
+        help="Number of values with the widest range listed for each position of a "
+        f"family (default: {DEFAULT_TOP_VALUES}).",
+    )
+    parser.add_argument(
+        "--family",
+        action="append",
+        default=None,
+        help="Only break down this family of variables or constraints "
+        "(can be repeated).",
+    )
+    parser.add_argument(
+        "--json-output",
+        type=str,
+        default=None,
+        help="Also save the breakdown as JSON to this file.",
+    )
+    add_read_arguments(parser)
+    args = parser.parse_args(argv)
+    output_file = (
+        args.output_file or strip_extensions(args.input_file) + "_drilldown.txt"
+    )
+
+    model = read_sparse_model(args)
+    get_drilldown(model, args.top, args.family).save(output_file, args.json_output)
+
+
+def parallel_main(argv):
+    from lp_analyzer.parallel import (
+        DEFAULT_ROUNDING_TOLERANCE,
+        DEFAULT_TOP_GROUPS,
+        find_parallel,
+    )
+
+    parser = argparse.ArgumentParser(
+        prog="lp-analyzer parallel",
+        description="Finds the duplicate and parallel (proportional) rows and columns "
+        "of the matrix and counts them by family.",
+    )
+    parser.add_argument("input_file", type=str, help="Path of the model")
+    parser.add_argument(
+        "-o",
+        "--output-file",
+        type=str,
+        default=None,
+        help="Output text file (default: <input>_parallel.txt).",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_ROUNDING_TOLERANCE,
+        help="Coefficients divided by the largest one of their row (or column) are "
+        f"compared up to this tolerance (default: {DEFAULT_ROUNDING_TOLERANCE:g}).",
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=DEFAULT_TOP_GROUPS,
+        help="Number of largest groups of parallel rows or columns listed "
+        f"(default: {DEFAULT_TOP_GROUPS}).",
+    )
+    parser.add_argument(
+        "--json-output",
+        type=str,
+        default=None,
+        help="Also save the groups as JSON to this file.",
+    )
+    add_read_arguments(parser)
+    args = parser.parse_args(argv)
+    output_file = (
+        args.output_file or strip_extensions(args.input_file) + "_parallel.txt"
+    )
+
+    model = read_sparse_model(args)
+    find_parallel(model, args.tolerance, args.top).save(output_file, args.json_output)
 
 
-def main_without_argument_parser(input_file, output_file=None):
+def index_main(argv):
+    from lp_analyzer.database import build_index
+
+    parser = argparse.ArgumentParser(
+        prog="lp-analyzer index",
+        description="Saves the rows, columns, non-zeroes, RHS values and bounds of a "
+        "model to a SQLite database indexed by family and magnitude, such that "
+        "'lp-analyzer query' can find coefficients without reading the model again.",
+    )
+    parser.add_argument("input_file", type=str, help="Path of the model")
+    parser.add_argument(
+        "-o",
+        "--output-file",
+        type=str,
+        default=None,
+        help="Path of the database (default: <input>.sqlite).",
+    )
+    add_read_arguments(parser)
+    args = parser.parse_args(argv)
+    output_file = args.output_file or strip_extensions(args.input_file) + ".sqlite"
+
+    model = read_sparse_model(args)
+    build_index(model, output_file, source=args.input_file)
+    print(f"Saved index to: {output_file}")
+
+
+def query_main(argv):
+    from lp_analyzer.database import (
+        DEFAULT_QUERY_LIMIT,
+        CoefficientQuery,
+        is_stale,
+        make_query_report,
+        open_index,
+        query_coefficients,
+        run_sql,
+    )
+
+    parser = argparse.ArgumentParser(
+        prog="lp-analyzer query",
+        description="Lists the coefficients of a model indexed with 'lp-analyzer index', "
+        "e.g. those of family X in the constraints of family Y below 1e-6 with "
+        "'--var-family X --con-family Y --below 1e-6'.",
+    )
+    parser.add_argument("database", type=str, help="Path of the index")
+    parser.add_argument(
+        "--var-family",
+        action="append",
+        default=None,
+        help="Only the coefficients of this family of variables (can be repeated).",
+    )
+    parser.add_argument(
+        "--con-family",
+        action="append",
+        default=None,
+        help="Only the coefficients in this family of constraints (can be repeated).",
+    )
+    parser.add_argument(
+        "--below",
+        type=float,
+        default=None,
+        help="Only the coefficients whose absolute value is below this.",
+    )
+    parser.add_argument(
+        "--above",
+        type=float,
+        default=None,
+        help="Only the coefficients whose absolute value is above this.",
+    )
+    parser.add_argument("--row", type=str, default=None, help="Only this row.")
+    parser.add_argument("--column", type=str, default=None, help="Only this column.")
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=DEFAULT_QUERY_LIMIT,
+        help="Maximum number of coefficients (or rows of --sql) listed, the smallest "
+        f"in absolute value first (default: {DEFAULT_QUERY_LIMIT}, 0 for all).",
+    )
+    parser.add_argument(
+        "--largest",
+        action="store_true",
+        help="List the largest coefficients in absolute value first.",
+    )
+    parser.add_argument(
+        "--sql",
+        type=str,
+        default=None,
+        help="Run this SQL query on the tables metadata, families, rows, columns and "
+        "nonzeros instead.",
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        connection = open_index(args.database)
+    except (FileNotFoundError, ValueError) as e:
+        parser.error(str(e))
+    with contextlib.closing(connection):
+        if is_stale(connection):
+            print(
+                "The model file changed since it was indexed, re-run 'lp-analyzer index'."
+            )
+        if args.sql is not None:
+            print(run_sql(connection, args.sql, args.limit or None))
+            return
+        query = CoefficientQuery(
+            args.var_family,
+            args.con_family,
+            args.below,
+            args.above,
+            args.row,
+            args.column,
+        )
+        try:
+            count, coefficients = query_coefficients(
+                connection, query, args.limit or None, args.largest
+            )
+        except ValueError as e:
+            parser.error(str(e))
+        print(make_query_report(count, coefficients))
+
+
+def serve_main(argv):
+    from lp_analyzer.batch import parse_size
+    from lp_analyzer.client import DEFAULT_PORT
+    from lp_analyzer.server import DEFAULT_MEMORY_CAP, make_server
+
+    parser = argparse.ArgumentParser(
+        prog="lp-analyzer serve",
+        description="Answers analysis requests (full report, drilldown and threshold "
+        "checks) sent with 'python -m lp_analyzer.client', keeping the models it read "
+        "in memory such that the next requests about the same model take milliseconds.",
+    )
+    address = parser.add_mutually_exclusive_group()
+    address.add_argument(
+        "--socket", type=str, default=None, help="Listen on this Unix socket."
+    )
+    address.add_argument(
+        "--port",
+        type=int,
+        default=DEFAULT_PORT,
+        help=f"Listen on this port of localhost (default: {DEFAULT_PORT}).",
+    )
+    parser.add_argument(
+        "--memory-cap",
+        type=parse_size,
+        default=DEFAULT_MEMORY_CAP,
+        help="Estimated memory of the models kept in memory, the least recently used "
+        "are dropped beyond it (e.g. 8G, default: 4G).",
+    )
+    args = parser.parse_args(argv)
+    if args.socket is not None and os.path.exists(args.socket):
+        parser.error(f"{args.socket} already exists.")
+
+    server = make_server(args.socket, args.port, args.memory_cap)
+    # Stop (and remove the socket) when terminated too
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    print(
+        "Serving on "
+        + (args.socket if args.socket is not None else f"localhost:{args.port}")
+        + " (Ctrl+C to stop)"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def check_main(argv):
+    from lp_analyzer.batch import find_model_files
+    from lp_analyzer.check import Thresholds, check_thresholds
+
+    parser = argparse.ArgumentParser(
+        prog="lp-analyzer check",
+        description="Checks that the absolute values of the coefficients, RHS values and "
+        "bounds of models are within thresholds while reading them, stopping at the first "
+        "violation. Exits with code 1 if any value is outside of its thresholds. "
+        "Zeroes and infinite bounds are always allowed.",
+    )
+    parser.add_argument(
+        "input_files",
+        type=str,
+        nargs="+",
+        help="Paths of the models (files, directories or glob patterns).",
+    )
+    parser.add_argument(
+        "--min", type=float, default=None, help="Minimum of every kind of value."
+    )
+    parser.add_argument(
+        "--max", type=float, default=None, help="Maximum of every kind of value."
+    )
+    for kind, description in (
+        ("coef", "coefficients (including the objective)"),
+        ("rhs", "RHS values"),
+        ("bound", "bounds"),
+    ):
+        for limit in ("min", "max"):
+            parser.add_argument(
+                f"--{limit}-{kind}",
+                type=float,
+                default=None,
+                help=f"{limit.capitalize()}imum of the {description} "
+                f"(default: --{limit}).",
+            )
+    parser.add_argument(
+        "--max-violations",
+        type=int,
+        default=1,
+        help="Stop reading a model after this many violations "
+        "(default: 1, 0 to check the whole model).",
+    )
+    args = parser.parse_args(argv)
+
+    def limit(value, default):
+        return default if value is None else value
+
+    thresholds = Thresholds(
+        limit(args.min_coef, args.min),
+        limit(args.max_coef, args.max),
+        limit(args.min_rhs, args.min),
+        limit(args.max_rhs, args.max),
+        limit(args.min_bound, args.min),
+        limit(args.max_bound, args.max),
+    )
+    if thresholds.is_empty():
+        parser.error("No thresholds given (e.g. --max 1e9 --min 1e-9).")
+    input_files = find_model_files(args.input_files)
+    if not input_files:
+        parser.error("No model files found.")
+
+    failed = False
+    for input_file in input_files:
+        violations = check_thresholds(input_file, thresholds, args.max_violations)
+        for violation in violations:
+            print(f"{input_file}: {violation}")
+        if violations:
+            failed = True
+            stopped = 0 < args.max_violations <= len(violations)
+            print(
+                f"{input_file}: FAILED, {len(violations)} value(s) outside of the "
+                + "thresholds"
+                + (" (stopped reading)" if stopped else "")
+            )
+        else:
+            print(f"{input_file}: OK")
+    if failed:
+        sys.exit(1)
+
+
+def read_model(input_file, engine="python", jobs=1, use_mmap=False, cache=None):
+    """Reads the model with the reader that matches the engine and options."""
+    if cache is not None:
+        return cache.read(
+            input_file,
+            lambda: read_model(input_file, "numpy", jobs, use_mmap),
+        )
+    if is_lp_file(input_file):
+        if jobs > 1 or use_mmap:
+            print(".lp files are read on a single thread without --mmap.")
+        model = LPReader(input_file).read()
+        if engine == "numpy" or jobs > 1 or use_mmap:
+            model = SparseLPModel.from_lp_model(model)
+        return model
+    if is_compressed(input_file) and (jobs > 1 or use_mmap):
+        print("Compressed files are read on a single thread without --mmap.")
+        engine, jobs, use_mmap = "numpy", 1, False
+    try:
+        if jobs > 1:
+            return ParallelMPSReader(input_file, jobs).read()
+        if use_mmap:
+            return MmapMPSReader(input_file).read()
+        if engine == "numpy":
+            return SparseMPSReader(input_file).read()
+    except ColumnNotContiguousError as e:
+        # The numpy readers add the columns one after the other
+        print(f"{e} Reading the file with the python reader instead.")
+        return SparseLPModel.from_lp_model(MPSReader(input_file).read())
+    return MPSReader(input_file).read()
+
+
+def can_stream(input_file, jobs=1, use_mmap=False, cache=None) -> bool:
+    """Whether the stream engine can analyze the file with these options."""
+    return not is_lp_file(input_file) and jobs == 1 and not use_mmap and cache is None
+
+
+def main_without_argument_parser(
+    input_file,
+    output_file=None,
+    engine="python",
+    jobs=1,
+    use_mmap=False,
+    cache=None,
+    metrics_json=None,
+    json_output=None,
+    top_k=0,
+    density_options: Optional[dict] = None,
+    approx: Optional[Tuple[int, int]] = None,
+):
+    """approx: the budget in bytes and the seed of an approximate analysis (see sampling.py)"""
+    from lp_analyzer import instrumentation
+    from lp_analyzer.analyze import full_analysis, save_results
+
     if output_file is None:
-        output_file = input_file[:-4] + "_results.txt"
+        output_file = strip_extensions(input_file) + "_results.txt"
+
+    with contextlib.ExitStack() as stack:
+        if metrics_json is not None:
+            metrics = stack.enter_context(
+                instrumentation.listening(instrumentation.MetricsCollector())
+            )
+
+        if approx is not None:
+            # Estimate the statistics from random chunks of the file
+            from lp_analyzer.sampling import approximate_analysis
+
+            budget, seed = approx
+            approximate_analysis(input_file, budget, seed=seed).save(
+                output_file, json_output
+            )
+        elif engine == "stream" and can_stream(input_file, jobs, use_mmap, cache):
+            # Analyze the file while reading it, without building the model
+            from lp_analyzer.streaming import stream_analysis
+
+            with instrumentation.phase("stream"):
+                stats = stream_analysis(input_file, top_k, **(density_options or {}))
+            save_results(*stats, output_file, json_output)
+        else:
+            if engine == "stream":
+                print(
+                    "The stream engine only reads .mps files on a single thread "
+                    "without --mmap or --cache, using the python engine instead."
+                )
+            # Read input file and load into Model object
+            with instrumentation.phase("read") as phase:
+                model = read_model(input_file, engine, jobs, use_mmap, cache)
+                phase.count(**instrumentation.model_counts(model))
 
-    # Read input file and load into Model object
-    model = MPSReader(input_file).read()
+            # Analyze the model
+            full_analysis(
+                model, output_file, json_output, top_k, **(density_options or {})
+            )
 
-    # Analyze the model
-    full_analysis(model, output_file)
+    if metrics_json is not None:
+        metrics.save(metrics_json)
+        print(f"Saved metrics to: {metrics_json}")
 
 
 if __name__ == "__main__":
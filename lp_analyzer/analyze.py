@@ -2,10 +2,22 @@
 Provides functions to analyze a Model.
 """
 from tabulate import tabulate
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
+from bisect import bisect_right
+from itertools import zip_longest
+import json
 import math
 
-from .core import LPModel
+from . import instrumentation
+from .core import (
+    DECADE_EDGES,
+    ColumnIds,
+    ExtremeValues,
+    IndexSet,
+    LogHistogram,
+    SparseLPModel,
+    split_type_and_index,
+)
 from .util import print_progress
 
 include_obj_coef = False
@@ -40,6 +52,15 @@ class TableRow:
         return map(format_cell, self.get_table_row())
 
 
+# The value, row name and column name of a coefficient
+Coefficient = Tuple[float, str, str]
+
+
+def value_or_none(val):
+    """Returns None for the values shown as empty cells (0 or inf, i.e. not set)."""
+    return None if val == float("inf") or val == 0 else val
+
+
 def make_table(rows: List[TableRow]):
     return tabulate(
         map(
@@ -62,6 +83,8 @@ class VariableStat(TableRow):
     - Maximum bound for that variable
     - Geometric mean of upper bound and number of upper bounds
     - Geometric mean of lower bounds and number of lower bounds
+    - Histograms of the orders of magnitude of the coefficients and of the bounds
+    - Optionally, the k smallest and k largest coefficients (see get_variable_stats)
     """
 
     def __init__(self, name):
@@ -78,11 +101,20 @@ class VariableStat(TableRow):
         self.geom_lower_sum = 0
         self.geom_upper_count = 0
         self.geom_upper_sum = 0
-        self.indexes = set()
+        self.indexes = (
+            IndexSet()
+        )  # Index ids (see NameTable) of the columns in the matrix
         self.count = 0
+        self.coef_histogram = LogHistogram()
+        self.bound_histogram = LogHistogram()
+        self.smallest_coefs: List[Coefficient] = []
+        self.largest_coefs: List[Coefficient] = []
 
     def update_coef(self, val, ext):
         val = abs(val)  # We only care about magnitude of coefficients
+        if val:
+            # Inlined LogHistogram.add() since this is called for every non-zero
+            self.coef_histogram.counts[bisect_right(DECADE_EDGES, val)] += 1
 
         # If coef is less than the minimum update the minimum
         if val < self.min_coef:
@@ -114,6 +146,7 @@ class VariableStat(TableRow):
         val = abs(val)
 
         self.update_bound_min_max(val, ext)
+        self.bound_histogram.add(val)
 
         self.geom_lower_count += 1
         self.geom_lower_sum += math.log(val)
@@ -127,6 +160,7 @@ class VariableStat(TableRow):
         val = abs(val)
 
         self.update_bound_min_max(val, ext)
+        self.bound_histogram.add(val)
 
         self.geom_upper_count += 1
         self.geom_upper_sum += math.log(val)
@@ -156,21 +190,23 @@ class VariableStat(TableRow):
             if self.geom_upper_count == 0
             else math.exp(self.geom_upper_sum / self.geom_upper_count)
         )
-        if (self.min_coef, self.min_coef_index) == (self.max_coef, self.max_coef_index):
-            self.min_coef = "--"
-            self.min_coef_index = "--"
+        # The statistics aren't modified such that the table can be made several times
+        min_coef, min_coef_index = self.min_coef, self.min_coef_index
+        if (min_coef, min_coef_index) == (self.max_coef, self.max_coef_index):
+            min_coef = "--"
+            min_coef_index = "--"
         return [
             self.name,
             len(self.indexes),
             int(self.count / len(self.indexes)),
-            self.min_coef,
+            min_coef,
             self.max_coef,
-            int(math.log10(self.max_coef) - math.log10(self.min_coef))
-            if type(self.min_coef) == float and type(self.max_coef) == float
+            int(math.log10(self.max_coef) - math.log10(min_coef))
+            if type(min_coef) == float and type(self.max_coef) == float
             else None,
             self.min_bound,
             self.max_bound,
-            self.min_coef_index,
+            min_coef_index,
             self.max_coef_index,
             self.min_bound_index,
             self.max_bound_index,
@@ -178,6 +214,8 @@ class VariableStat(TableRow):
             lower_mean,
             self.geom_upper_count,
             upper_mean,
+            self.coef_histogram,
+            self.bound_histogram,
         ]
 
     def get_sort_key(self):
@@ -187,6 +225,28 @@ class VariableStat(TableRow):
             else None
         )
 
+    def to_dict(self):
+        """Returns the statistics in a JSON serializable form, unset values are None."""
+        return {
+            "name": self.name,
+            "columns": len(self.indexes),
+            "nonzeros": self.count,
+            "min_coef": value_or_none(self.min_coef),
+            "max_coef": value_or_none(self.max_coef),
+            "min_bound": value_or_none(self.min_bound),
+            "max_bound": value_or_none(self.max_bound),
+            "min_coef_index": self.min_coef_index,
+            "max_coef_index": self.max_coef_index,
+            "min_bound_index": self.min_bound_index,
+            "max_bound_index": self.max_bound_index,
+            "lower_bound_count": self.geom_lower_count,
+            "upper_bound_count": self.geom_upper_count,
+            "coef_histogram": self.coef_histogram.to_dict(),
+            "bound_histogram": self.bound_histogram.to_dict(),
+            "smallest_coefs": coefficients_to_dicts(self.smallest_coefs),
+            "largest_coefs": coefficients_to_dicts(self.largest_coefs),
+        }
+
     @staticmethod
     def get_table_header():
         return [
@@ -206,6 +266,8 @@ class VariableStat(TableRow):
             "Lower Bound Geometric Mean",
             "Upper bound count",
             "Upper bound geometric mean",
+            "Coef log10 histogram",
+            "Bound log10 histogram",
         ]
 
 
@@ -216,6 +278,8 @@ class ConstraintStat(TableRow):
     - The minimum and maximum right-hand side constant for the constraint
     - The minimum and maximum coefficients for that constaint
     - The specific index of the constraint on which the above statistics are found
+    - Histograms of the orders of magnitude of the coefficients and of the right-hand sides
+    - Optionally, the k smallest and k largest coefficients (see get_constraint_stats)
     """
 
     def __init__(self, name):
@@ -230,6 +294,10 @@ class ConstraintStat(TableRow):
         self.max_coef = 0
         self.count = 0
         self.num_rows = 0
+        self.coef_histogram = LogHistogram()
+        self.rhs_histogram = LogHistogram()
+        self.smallest_coefs: List[Coefficient] = []
+        self.largest_coefs: List[Coefficient] = []
 
     def get_sort_key(self):
         return (
@@ -243,6 +311,7 @@ class ConstraintStat(TableRow):
         if val is None:
             return
         val = abs(val)
+        self.rhs_histogram.add(val)
         if val < self.min_rhs:
             self.min_rhs = val
             self.min_rhs_ext = ext
@@ -261,29 +330,53 @@ class ConstraintStat(TableRow):
             self.max_coef_ext = ext
 
     def get_table_row(self):
-        if (self.min_coef, self.min_coef_ext) == (self.max_coef, self.max_coef_ext):
-            self.min_coef = "--"
-            self.min_coef_ext = "--"
-        if (self.min_rhs, self.min_rhs_ext) == (self.max_rhs, self.max_rhs_ext):
-            self.min_rhs = "--"
-            self.min_rhs_ext = "--"
+        min_coef, min_coef_ext = self.min_coef, self.min_coef_ext
+        if (min_coef, min_coef_ext) == (self.max_coef, self.max_coef_ext):
+            min_coef = "--"
+            min_coef_ext = "--"
+        min_rhs, min_rhs_ext = self.min_rhs, self.min_rhs_ext
+        if (min_rhs, min_rhs_ext) == (self.max_rhs, self.max_rhs_ext):
+            min_rhs = "--"
+            min_rhs_ext = "--"
         return [
             self.name,
             self.num_rows,
             int(self.count / self.num_rows),
-            self.min_coef,
+            min_coef,
             self.max_coef,
-            int(math.log10(self.max_coef) - math.log10(self.min_coef))
-            if type(self.min_coef) == float and type(self.max_coef) == float
+            int(math.log10(self.max_coef) - math.log10(min_coef))
+            if type(min_coef) == float and type(self.max_coef) == float
             else None,
-            self.min_rhs,
+            min_rhs,
             self.max_rhs,
-            self.min_coef_ext,
+            min_coef_ext,
             self.max_coef_ext,
-            self.min_rhs_ext,
+            min_rhs_ext,
             self.max_rhs_ext,
+            self.coef_histogram,
+            self.rhs_histogram,
         ]
 
+    def to_dict(self):
+        """Returns the statistics in a JSON serializable form, unset values are None."""
+        return {
+            "name": self.name,
+            "rows": self.num_rows,
+            "nonzeros": self.count,
+            "min_coef": value_or_none(self.min_coef),
+            "max_coef": value_or_none(self.max_coef),
+            "min_rhs": value_or_none(self.min_rhs),
+            "max_rhs": value_or_none(self.max_rhs),
+            "min_coef_index": self.min_coef_ext,
+            "max_coef_index": self.max_coef_ext,
+            "min_rhs_index": self.min_rhs_ext,
+            "max_rhs_index": self.max_rhs_ext,
+            "coef_histogram": self.coef_histogram.to_dict(),
+            "rhs_histogram": self.rhs_histogram.to_dict(),
+            "smallest_coefs": coefficients_to_dicts(self.smallest_coefs),
+            "largest_coefs": coefficients_to_dicts(self.largest_coefs),
+        }
+
     @staticmethod
     def get_table_header():
         return [
@@ -299,120 +392,312 @@ class ConstraintStat(TableRow):
             "Max coef index",
             "Min RHS index",
             "Max RHS index",
+            "Coef log10 histogram",
+            "RHS log10 histogram",
         ]
 
 
-class DensityTableRow(TableRow):
-    def __init__(self, var_name, count):
-        self.var_name, self.count = var_name, count
+def coefficients_to_dicts(coefficients: List[Coefficient]) -> List[dict]:
+    return [{"coef": val, "row": row, "column": col} for val, row, col in coefficients]
+
+
+def set_extreme_coefs(stat, extremes: ExtremeValues):
+    stat.smallest_coefs = [(val, *location) for val, location in extremes.smallest()]
+    stat.largest_coefs = [(val, *location) for val, location in extremes.largest()]
+
+
+class ExtremeCoefsRow(TableRow):
+    """
+    A row of the table of the k smallest and k largest coefficients of each family:
+    the rank-th smallest and rank-th largest coefficients of a family.
+    """
+
+    def __init__(
+        self,
+        stat,
+        rank: int,
+        order: int,
+        smallest: Optional[Coefficient],
+        largest: Optional[Coefficient],
+    ):
+        self.stat, self.rank, self.order = stat, rank, order
+        self.smallest, self.largest = smallest, largest
 
     def get_table_row(self):
-        return [self.var_name, self.count]
+        smallest = self.smallest or ("", "", "")
+        largest = self.largest or ("", "", "")
+        return [self.stat.name, self.rank, *smallest, *largest]
 
-    @staticmethod
-    def get_table_header():
-        return ["Variable", "Row Count"]
+    def get_sort_key(self):
+        """Families in the order of their table then by rank."""
+        return -self.order, -self.rank
+
+    def get_table_header(self):
+        kind = "Var Name" if isinstance(self.stat, VariableStat) else "Constraint Name"
+        return [
+            kind,
+            "Rank",
+            "Smallest coef",
+            "Row",
+            "Column",
+            "Largest coef",
+            "Row",
+            "Column",
+        ]
 
 
-def get_variable_stats(model):
-    var_stats = {}
-    for row in print_progress(
-        model.rows.values(), message="Analyzing variable coefficients"
+def make_extreme_coefs_rows(stats) -> List[ExtremeCoefsRow]:
+    """Returns the rows of the families with extreme coefficients, in the order of make_table()."""
+    rows = []
+    ordered = sorted(stats, key=lambda s: s.get_sort_key(), reverse=True)
+    for order, stat in enumerate(ordered):
+        coefs = zip_longest(stat.smallest_coefs, stat.largest_coefs)
+        for rank, (smallest, largest) in enumerate(coefs, 1):
+            rows.append(ExtremeCoefsRow(stat, rank, order, smallest, largest))
+    return rows
+
+
+def get_variable_stats(model, top_k=0):
+    """
+    Returns the statistics of each family of variables.
+    If top_k is positive, the top_k smallest and largest coefficients of each family
+    (ignoring zeroes) are also kept.
+    """
+    # Rows and columns are grouped by the family ids interned while reading the model
+    # rather than by splitting the name of the variable of every non-zero.
+    col_ids = model.col_ids
+    columns = ColumnIds(model)
+    col_families = model.col_table.name_families
+    families = model.col_table.families
+    var_stats: Dict[int, VariableStat] = {}
+    # Which columns are in the matrix, to count the distinct indexes of each family
+    used_cols = bytearray(len(col_ids))
+    extremes: Dict[int, ExtremeValues] = {}
+    for row_id, row in enumerate(
+        print_progress(model.rows.values(), message="Analyzing variable coefficients")
     ):
         # Skip the objective, we want values only in the matrix
         if row.is_objective and not include_obj_coef:
             continue
         for var_name, coef in row.coefficients.items():
-            var_name, var_index = split_type_and_index(var_name)
+            try:
+                col_id = col_ids[var_name]
+            except KeyError:
+                # The column was added to the model without add_column()
+                col_id = columns[var_name]
+                col_families = columns.col_table.name_families
+                families = columns.col_table.families
+                if col_id == len(used_cols):
+                    used_cols.append(0)
+            family = col_families[col_id]
 
             try:
-                var_stat = var_stats[var_name]
+                var_stat = var_stats[family]
             except KeyError:
-                var_stat = VariableStat(var_name)
-                var_stats[var_name] = var_stat
+                var_stat = VariableStat(families[family])
+                var_stats[family] = var_stat
 
             var_stat.update_coef(coef, row.row_name)
-            var_stat.indexes.add(var_index)
+            used_cols[col_id] = 1
             var_stat.count += 1
+            if top_k and coef:
+                try:
+                    family_extremes = extremes[family]
+                except KeyError:
+                    family_extremes = extremes[family] = ExtremeValues(top_k)
+                family_extremes.add(
+                    abs(coef), row_id << 32 | col_id, (row.row_name, var_name)
+                )
+
+    col_indexes = columns.col_table.name_indexes
+    for col_id, used in enumerate(used_cols):
+        if used:
+            var_stats[col_families[col_id]].indexes.add(col_indexes[col_id])
 
     for bound in print_progress(
         model.bounds.values(), message="Analyzing variable bounds"
     ):
-        var_name, var_index = split_type_and_index(bound.name)
+        col_id = columns[bound.name]
+        family = columns.col_table.name_families[col_id]
 
         try:
-            var_stat = var_stats[var_name]
+            var_stat = var_stats[family]
         except KeyError:
-            var_stat = VariableStat(var_name)
-            var_stats[var_name] = var_stat
+            var_stat = VariableStat(columns.col_table.families[family])
+            var_stats[family] = var_stat
 
+        var_index = columns.col_table.index_of(col_id)
         var_stat.update_lower_bound(bound.lhs_bound, var_index)
         var_stat.update_upper_bound(bound.rhs_bound, var_index)
 
+    for family, family_extremes in extremes.items():
+        set_extreme_coefs(var_stats[family], family_extremes)
+
     return list(var_stats.values())
 
 
-def get_constraint_stats(model):
-    row_stats: Dict[str, ConstraintStat] = {}
-    for full_name, row in print_progress(
-        model.rows.items(), message="Analyzing constraints"
+def get_constraint_stats(model, top_k=0):
+    """
+    Returns the statistics of each family of constraints (including the objective).
+    If top_k is positive, the top_k smallest and largest coefficients of each family
+    (ignoring zeroes) are also kept.
+    """
+    row_families = model.row_table.name_families
+    families = model.row_table.families
+    row_stats: Dict[int, ConstraintStat] = {}
+    extremes: Dict[int, ExtremeValues] = {}
+    columns = ColumnIds(model)
+    for row_id, row in enumerate(
+        print_progress(model.rows.values(), message="Analyzing constraints")
     ):
         min_pair, max_pair = row.coefficient_range()
         min_var, min_coef = min_pair
         max_var, max_coef = max_pair
-        row_name, row_index = split_type_and_index(full_name)
+        family = row_families[row_id]
 
         try:
-            row_stat = row_stats[row_name]
+            row_stat = row_stats[family]
         except KeyError:
-            row_stat = ConstraintStat(row_name)
-            row_stats[row_name] = row_stat
+            row_stat = ConstraintStat(families[family])
+            row_stats[family] = row_stat
 
         row_stat.update_min_coef(min_coef, min_var)
         row_stat.update_max_coef(max_coef, max_var)
-        row_stat.update_rhs(row.rhs_value, row_index)
+        row_stat.coef_histogram.add_all(row.coefficients.values())
+        if top_k:
+            try:
+                family_extremes = extremes[family]
+            except KeyError:
+                family_extremes = extremes[family] = ExtremeValues(top_k)
+            # Most rows can be skipped using their minimum and maximum coefficients
+            for var_name, coef in (
+                row.coefficients.items()
+                if family_extremes.may_keep(min_coef, max_coef)
+                else ()
+            ):
+                if coef:
+                    family_extremes.add(
+                        abs(coef),
+                        row_id << 32 | columns[var_name],
+                        (row.row_name, var_name),
+                    )
+        if row.rhs_value is not None:
+            row_stat.update_rhs(row.rhs_value, model.row_table.index_of(row_id))
         row_stat.num_rows += 1
         row_stat.count += len(row.coefficients)
 
+    for family, family_extremes in extremes.items():
+        set_extreme_coefs(row_stats[family], family_extremes)
+
     return list(row_stats.values())
 
 
-def find_dense_columns(model: LPModel, n=10):
+def get_stats(model, top_k=0) -> Tuple[List[VariableStat], List[ConstraintStat]]:
     """
-    Unused method that returns the dense columns. For now,
-    the average density of an equation is sufficient.
-    """
-    densities = {}
-    for row in model.rows.values():
-        for var, coef in row.coefficients.items():
-            if var not in densities:
-                densities[var] = 1
-            else:
-                densities[var] += 1
-
-    densities = tuple(sorted(densities.items(), key=lambda x: x[1], reverse=True))[:n]
-    densities = tuple(map(lambda d: DensityTableRow(d[0], d[1]), densities))
+    Returns the statistics of each family of variables and of constraints.
+    The vectorized engine is used if the model is a SparseLPModel.
 
-    return densities
-
-
-def split_type_and_index(name: str) -> Tuple[str, str]:
-    row_type, _, index = name.partition("(")
-    index = index[: index.find(")")]
-    return row_type, index
-
-
-def full_analysis(model, outfile):
-    var_stats = get_variable_stats(model)
-    constraint_stats = get_constraint_stats(model)
-
-    str_output = (
+    :param top_k: number of smallest and of largest coefficients kept for each family
+    """
+    counts = instrumentation.model_counts(model)
+    if isinstance(model, SparseLPModel):
+        # Imported here since the vectorized engine builds on this module
+        from . import vectorized
+
+        get_var_stats = vectorized.get_variable_stats
+        get_con_stats = vectorized.get_constraint_stats
+    else:
+        get_var_stats, get_con_stats = get_variable_stats, get_constraint_stats
+    with instrumentation.phase("variable_stats", **counts):
+        var_stats = get_var_stats(model, top_k)
+    with instrumentation.phase("constraint_stats", **counts):
+        constraint_stats = get_con_stats(model, top_k)
+    return var_stats, constraint_stats
+
+
+def make_report(
+    var_stats: List[VariableStat], constraint_stats: List[ConstraintStat], density=None
+) -> str:
+    """Returns the tables of the statistics and, if given, of the DensityStats."""
+    return (
         "Created by Martin Staadecker's LP analyzer tool. Enjoy! (https://github.com/staadecker/lp-analyzer)\n\n"
         + make_table(var_stats)
+        + make_extreme_coefs_table(var_stats)
         + "\n\n"
         + make_table(constraint_stats)
+        + make_extreme_coefs_table(constraint_stats)
+        + ("" if density is None else "\n\n" + density.report())
     )
 
-    with open(outfile, "w") as f:
-        f.write(str_output)
+
+def make_extreme_coefs_table(stats) -> str:
+    """Returns the table of the extreme coefficients of each family, if they were kept."""
+    rows = make_extreme_coefs_rows(stats)
+    return "\n\n" + make_table(rows) if rows else ""
+
+
+def make_json(
+    var_stats: List[VariableStat], constraint_stats: List[ConstraintStat], density=None
+) -> dict:
+    """Returns the statistics of each family in a JSON serializable form."""
+    result = {
+        "variables": [stat.to_dict() for stat in var_stats],
+        "constraints": [stat.to_dict() for stat in constraint_stats],
+    }
+    if density is not None:
+        result["density"] = density.to_dict()
+    return result
+
+
+def get_density(
+    model,
+    top_dense: Optional[int] = None,
+    dense_row_threshold: Optional[int] = None,
+    dense_col_threshold: Optional[int] = None,
+):
+    """Returns the DensityStats of the model (see density.get_density_stats)."""
+    # Imported here since the density module builds on this module
+    from . import density
+
+    if top_dense is None:
+        top_dense = density.DEFAULT_TOP_N
+    with instrumentation.phase("density", **instrumentation.model_counts(model)):
+        return density.get_density_stats(
+            model, top_dense, dense_row_threshold, dense_col_threshold
+        )
+
+
+def full_analysis(
+    model,
+    outfile,
+    json_file=None,
+    top_k=0,
+    top_dense: Optional[int] = None,
+    dense_row_threshold: Optional[int] = None,
+    dense_col_threshold: Optional[int] = None,
+):
+    """
+    Analyzes the model and saves the tables to outfile
+    and, if json_file is given, the statistics as JSON.
+    If top_k is positive, the top_k smallest and largest coefficients of each family
+    are also listed. The other parameters are those of get_density().
+    """
+    var_stats, constraint_stats = get_stats(model, top_k)
+    density = get_density(model, top_dense, dense_row_threshold, dense_col_threshold)
+    save_results(var_stats, constraint_stats, density, outfile, json_file)
+
+
+def save_results(var_stats, constraint_stats, density, outfile, json_file=None):
+    """Saves the tables to outfile and, if json_file is given, the statistics as JSON."""
+    with instrumentation.phase("report") as phase:
+        str_output = make_report(var_stats, constraint_stats, density)
+
+        with open(outfile, "w") as f:
+            f.write(str_output)
+        if json_file is not None:
+            with open(json_file, "w") as f:
+                json.dump(make_json(var_stats, constraint_stats, density), f, indent=2)
+        phase.count(table_rows=len(var_stats) + len(constraint_stats))
     print(f"Saved results to: {outfile}")
+    if json_file is not None:
+        print(f"Saved statistics to: {json_file}")
@@ -0,0 +1,321 @@
+"""
+Provides an API to analyze models that are already in memory
+without writing them to an .mps file and reading it back.
+
+- model_from_matrix() builds a SparseLPModel from a constraint matrix (e.g. a scipy.sparse matrix)
+  along with the names of the rows and columns, the RHS values and the bounds.
+- model_from_pyomo() builds a SparseLPModel from the linear representation
+  that Pyomo generates for the objective and each constraint of a model (requires pyomo).
+- analyze() returns the statistics of a model as VariableStat and ConstraintStat objects
+  rather than writing them to a file.
+
+For example:
+
+    model = model_from_matrix(A, row_names, col_names, row_types, rhs, lower, upper, objective=c)
+    result = analyze(model)
+    for stat in result.variable_stats:
+        print(stat.name, stat.min_coef, stat.max_coef)
+"""
+import math
+from array import array
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .analyze import (
+    ConstraintStat,
+    VariableStat,
+    get_density,
+    get_stats,
+    make_json,
+    make_report,
+)
+from .core import SparseLPModel
+from .vectorized import as_numpy
+
+# Types of the constraints, see the ROWS section of .mps files
+ROW_TYPES = ("L", "G", "E")
+
+
+class AnalysisResult:
+    """
+    The statistics of each family of variables and of constraints of a model
+    and its dense rows and columns (a DensityStats).
+    """
+
+    def __init__(
+        self,
+        variable_stats: List[VariableStat],
+        constraint_stats: List[ConstraintStat],
+        density=None,
+    ):
+        self.variable_stats = variable_stats
+        self.constraint_stats = constraint_stats
+        self.density = density
+
+    def report(self) -> str:
+        """Returns the tables that full_analysis() writes to its output file."""
+        return make_report(self.variable_stats, self.constraint_stats, self.density)
+
+    def to_dict(self) -> dict:
+        """Returns the statistics (including the histograms) in a JSON serializable form."""
+        return make_json(self.variable_stats, self.constraint_stats, self.density)
+
+    def save(self, outfile):
+        with open(outfile, "w") as f:
+            f.write(self.report())
+
+
+def analyze(
+    model,
+    top_k=0,
+    top_dense: Optional[int] = None,
+    dense_row_threshold: Optional[int] = None,
+    dense_col_threshold: Optional[int] = None,
+) -> AnalysisResult:
+    """
+    Analyzes an LPModel or a SparseLPModel (with the vectorized engine).
+    If top_k is positive, the top_k smallest and largest coefficients of each family
+    are kept (see VariableStat.smallest_coefs and largest_coefs).
+    The other parameters are those of get_density().
+    """
+    var_stats, constraint_stats = get_stats(model, top_k)
+    density = get_density(model, top_dense, dense_row_threshold, dense_col_threshold)
+    return AnalysisResult(var_stats, constraint_stats, density)
+
+
+def _finite_or_nan(values: Optional[Sequence[float]], size: int) -> np.ndarray:
+    if values is None:
+        return np.full(size, math.nan)
+    values = np.asarray(values, dtype=np.float64).ravel()
+    if len(values) != size:
+        raise ValueError(f"Expected {size} values but got {len(values)}.")
+    return np.where(np.isfinite(values), values, math.nan)
+
+
+def _model_from_csc(
+    col_starts: np.ndarray,
+    row_ids: np.ndarray,
+    values: np.ndarray,
+    row_names: Sequence[str],
+    row_types: Sequence[str],
+    rhs: np.ndarray,
+    col_names: Sequence[str],
+    lower: np.ndarray,
+    upper: np.ndarray,
+) -> SparseLPModel:
+    """
+    Builds a SparseLPModel from a matrix in CSC format where the objective (if any)
+    is a row of type 'N'. Explicit zeroes are dropped like they would be from an .mps file.
+    """
+    is_nonzero = values != 0
+    if not is_nonzero.all():
+        nonzeros_before = np.concatenate(([0], np.cumsum(is_nonzero)))
+        col_starts = nonzeros_before[col_starts]
+        row_ids, values = row_ids[is_nonzero], values[is_nonzero]
+
+    model = SparseLPModel()
+    model.add_rows([str(name) for name in row_names], list(row_types))
+    as_numpy(model.rhs)[:] = np.where(
+        np.asarray(row_types) == "N", math.nan, np.nan_to_num(rhs)
+    )
+    col_ends = np.ascontiguousarray(col_starts[1:], dtype=np.int64)
+    model.add_columns([str(name) for name in col_names], col_ends)
+    model.row_indices.frombytes(np.ascontiguousarray(row_ids, dtype=np.int32).tobytes())
+    model.values.frombytes(np.ascontiguousarray(values, dtype=np.float64).tobytes())
+
+    as_numpy(model.lower)[:] = lower
+    as_numpy(model.upper)[:] = upper
+    has_bound = ~(np.isnan(lower) & np.isnan(upper))
+    model.bound_order.frombytes(np.flatnonzero(has_bound).astype(np.int32).tobytes())
+    return model
+
+
+def model_from_matrix(
+    matrix,
+    row_names: Sequence[str],
+    col_names: Sequence[str],
+    row_types: Optional[Sequence[str]] = None,
+    rhs: Optional[Sequence[float]] = None,
+    lower: Optional[Sequence[float]] = None,
+    upper: Optional[Sequence[float]] = None,
+    objective: Optional[Sequence[float]] = None,
+    objective_name: str = "obj",
+) -> SparseLPModel:
+    """
+    Builds a SparseLPModel from a constraint matrix.
+
+    Names should follow the family(index) convention, e.g. 'GenCapacity(1,2020)',
+    since rows and columns are grouped by family in the analysis.
+
+    :param matrix: the constraint matrix with a row per constraint and a column per variable.
+        A scipy.sparse matrix or any object with a shape and a tocsc() method returning
+        an object with the indptr, indices and data arrays of the CSC format.
+    :param row_types: 'L' (<=), 'G' (>=) or 'E' (=) for each row. Defaults to 'E'.
+    :param rhs: the right-hand side value of each row. Defaults to 0.
+    :param lower: the lower bound of each column. Infinite or NaN values are not bounds.
+    :param upper: the upper bound of each column. Infinite or NaN values are not bounds.
+    :param objective: the coefficient of each column in the objective function, if any.
+        It's added as the first row, named objective_name.
+    """
+    num_rows, num_cols = matrix.shape
+    if len(row_names) != num_rows or len(col_names) != num_cols:
+        raise ValueError(
+            f"The matrix has shape {matrix.shape} but there are {len(row_names)} "
+            f"row names and {len(col_names)} column names."
+        )
+    if row_types is None:
+        row_types = ["E"] * num_rows
+    row_types = list(row_types)
+    if len(row_types) != num_rows or not set(row_types) <= set(ROW_TYPES):
+        raise ValueError(f"Expected a row type among {ROW_TYPES} for each row.")
+    rhs = np.zeros(num_rows) if rhs is None else _finite_or_nan(rhs, num_rows)
+
+    csc = matrix.tocsc()
+    if not getattr(csc, "has_canonical_format", True):
+        csc = csc.copy()
+        csc.sum_duplicates()
+    col_starts = np.asarray(csc.indptr, dtype=np.int64)
+    row_ids = np.asarray(csc.indices, dtype=np.int32)
+    values = np.asarray(csc.data, dtype=np.float64)
+
+    row_names = list(row_names)
+    if objective is not None:
+        if hasattr(objective, "toarray"):  # A sparse vector
+            objective = objective.toarray()
+        objective = np.asarray(objective, dtype=np.float64).ravel()
+        if len(objective) != num_cols:
+            raise ValueError(f"Expected {num_cols} objective coefficients.")
+        # The objective is the first row, its coefficient comes first in each column
+        in_objective = objective != 0
+        objective_before = np.concatenate(([0], np.cumsum(in_objective)))
+        new_starts = col_starts + objective_before
+        new_row_ids = np.empty(new_starts[-1], dtype=np.int32)
+        new_values = np.empty(new_starts[-1], dtype=np.float64)
+        objective_cols = np.flatnonzero(in_objective)
+        new_row_ids[new_starts[objective_cols]] = 0
+        new_values[new_starts[objective_cols]] = objective[objective_cols]
+        nonzero_cols = np.repeat(np.arange(num_cols), np.diff(col_starts))
+        positions = np.arange(len(values)) + objective_before[nonzero_cols + 1]
+        new_row_ids[positions] = row_ids + 1
+        new_values[positions] = values
+        col_starts, row_ids, values = new_starts, new_row_ids, new_values
+        row_names = [objective_name] + row_names
+        row_types = ["N"] + row_types
+        rhs = np.concatenate(([math.nan], rhs))
+
+    return _model_from_csc(
+        col_starts,
+        row_ids,
+        values,
+        row_names,
+        row_types,
+        rhs,
+        col_names,
+        _finite_or_nan(lower, num_cols),
+        _finite_or_nan(upper, num_cols),
+    )
+
+
+def _pyomo_name(component) -> str:
+    """Returns the name of a Pyomo component in the family(index) convention, e.g. x(1,2) for x[1,2]."""
+    return component.getname(fully_qualified=True).replace("[", "(").replace("]", ")")
+
+
+def model_from_pyomo(pyomo_model) -> SparseLPModel:
+    """
+    Builds a SparseLPModel from the active objective and constraints of a Pyomo model
+    using the linear representation Pyomo generates for each of them (requires pyomo).
+
+    Like in the .lp files Pyomo writes, ranged constraints (lower <= body <= upper) are split
+    into two rows prefixed with 'r_l_' and 'r_u_' and fixed variables are constants.
+    """
+    try:
+        from pyomo.core import Constraint, Objective, value
+        from pyomo.repn import generate_standard_repn
+    except ImportError:
+        raise ImportError(
+            "Analyzing Pyomo models requires the pyomo package. "
+            "Run 'pip install lp-analyzer[pyomo]'."
+        )
+
+    row_names: List[str] = []
+    row_types: List[str] = []
+    rhs: List[float] = []
+    row_ids, col_ids, values = array("i"), array("i"), array("d")
+    variable_ids: Dict[
+        int, int
+    ] = {}  # Column id of each variable, keyed by id(variable)
+    variables = []
+
+    def get_repn(component, expression):
+        repn = generate_standard_repn(expression, compute_values=True, quadratic=False)
+        if not repn.is_linear():
+            raise ValueError(f"{component.name} is not linear.")
+        return repn
+
+    def add_row(name: str, row_type: str, repn, rhs_value: float):
+        row_id = len(row_names)
+        row_names.append(name)
+        row_types.append(row_type)
+        rhs.append(rhs_value)
+        for variable, coef in zip(repn.linear_vars, repn.linear_coefs):
+            col_id = variable_ids.get(id(variable))
+            if col_id is None:
+                col_id = variable_ids[id(variable)] = len(variables)
+                variables.append(variable)
+            row_ids.append(row_id)
+            col_ids.append(col_id)
+            values.append(coef)
+
+    objectives = list(pyomo_model.component_data_objects(Objective, active=True))
+    if len(objectives) > 1:
+        raise ValueError(
+            "Models with more than one active objective can't be analyzed."
+        )
+    for objective in objectives:
+        # The constant term of the objective doesn't matter
+        repn = get_repn(objective, objective.expr)
+        add_row(_pyomo_name(objective), "N", repn, math.nan)
+
+    for constraint in pyomo_model.component_data_objects(
+        Constraint, active=True, descend_into=True
+    ):
+        repn = get_repn(constraint, constraint.body)
+        constant = value(repn.constant)
+        lower = None if constraint.lower is None else value(constraint.lower) - constant
+        upper = None if constraint.upper is None else value(constraint.upper) - constant
+        name = _pyomo_name(constraint)
+        if constraint.equality:
+            add_row(name, "E", repn, upper)
+        elif lower is not None and upper is not None:
+            add_row("r_l_" + name, "G", repn, lower)
+            add_row("r_u_" + name, "L", repn, upper)
+        elif upper is not None:
+            add_row(name, "L", repn, upper)
+        elif lower is not None:
+            add_row(name, "G", repn, lower)
+
+    # Sort the non-zeroes by column (then row) to get the CSC format
+    row_ids, col_ids, values = (
+        as_numpy(row_ids),
+        as_numpy(col_ids),
+        as_numpy(values),
+    )
+    order = np.lexsort((row_ids, col_ids))
+    col_starts = np.concatenate(
+        ([0], np.cumsum(np.bincount(col_ids, minlength=len(variables))))
+    )
+
+    return _model_from_csc(
+        col_starts.astype(np.int64),
+        row_ids[order],
+        values[order],
+        row_names,
+        row_types,
+        np.array(rhs, dtype=np.float64),
+        [_pyomo_name(variable) for variable in variables],
+        # None (no bound) is converted to NaN
+        _finite_or_nan([variable.lb for variable in variables], len(variables)),
+        _finite_or_nan([variable.ub for variable in variables], len(variables)),
+    )
@@ -0,0 +1,279 @@
+"""
+Provides analyze_batch() which analyzes many model files (e.g. one per scenario of a study)
+in a pool of processes and summarizes how the coefficient range of each family of variables
+and constraints varies between them.
+
+Each model is read and analyzed in a worker process which saves its results file like a single
+analysis would. To bound memory, a model is only started when the estimated peak memory of the
+models being analyzed (a multiple of their file size) fits within the memory budget.
+"""
+import collections
+import concurrent.futures
+import contextlib
+import glob
+import math
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+from .analyze import TableRow, get_density, get_stats, make_report, make_table
+from .files import is_compressed, is_model_file, strip_extensions
+
+# Peak memory used to read then analyze a model per byte of (uncompressed) file,
+# measured on SWITCH-like models (see generator.py)
+MEMORY_PER_FILE_BYTE = {"python": 7, "numpy": 5, "stream": 3}
+# Typical ratio between the size of a model file and of its compressed version
+COMPRESSION_RATIO = 5
+
+# The minimum and maximum absolute coefficient of each family of a model,
+# keyed by ('Variable' or 'Constraint', family name)
+FamilyCoefficients = Dict[Tuple[str, str], Tuple[float, float]]
+
+
+def parse_size(size: str) -> int:
+    """Returns the number of bytes of a size such as '8G', '500MB' or '1.5GiB'."""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d*)?)\s*([kmgt]?)(?:i?b)?\s*", size.lower())
+    if match is None:
+        raise ValueError(f"Invalid size: {size!r} (expected e.g. '500M' or '8G')")
+    return int(float(match[1]) * 1024 ** " kmgt".index(match[2] or " "))
+
+
+def find_model_files(paths: List[str]) -> List[str]:
+    """
+    Returns the model files (.mps or .lp, compressed or not) matching the paths.
+    Each path is a file, a directory (whose model files are used) or a glob pattern.
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(
+                os.path.join(path, name)
+                for name in sorted(os.listdir(path))
+                if is_model_file(name) and os.path.isfile(os.path.join(path, name))
+            )
+        elif glob.has_magic(path):
+            files.extend(
+                match for match in sorted(glob.glob(path)) if os.path.isfile(match)
+            )
+        else:
+            files.append(path)
+    # Remove duplicates while keeping the order
+    return list(dict.fromkeys(files))
+
+
+def estimate_memory(path, engine="python") -> int:
+    """Returns the estimated peak memory in bytes used to read then analyze the model file."""
+    size = os.path.getsize(path)
+    if is_compressed(path):
+        size *= COMPRESSION_RATIO
+    return size * MEMORY_PER_FILE_BYTE[engine]
+
+
+def scenario_name(path) -> str:
+    return os.path.basename(strip_extensions(path))
+
+
+def output_files(paths: List[str]) -> Dict[str, str]:
+    """
+    Returns the results file of each model, named like a single analysis would name it
+    unless several models would share it (e.g. model.mps and model.lp).
+    """
+    outputs = {path: strip_extensions(path) + "_results.txt" for path in paths}
+    counts = collections.Counter(outputs.values())
+    return {
+        path: output if counts[output] == 1 else path + "_results.txt"
+        for path, output in outputs.items()
+    }
+
+
+def analyze_file(
+    path,
+    output_file,
+    engine="python",
+    use_mmap=False,
+    cache_dir=None,
+    top_k=0,
+    density_options: Optional[dict] = None,
+) -> FamilyCoefficients:
+    """
+    Reads and analyzes a model file (in a worker process), saves its results to output_file
+    and returns the coefficients of each family for the summary.
+    """
+    # Imported here since __main__ imports this module
+    from .__main__ import can_stream, read_model
+    from .cache import ModelCache
+    from .streaming import stream_analysis
+
+    # The output of the workers would be interleaved
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        cache = ModelCache(cache_dir) if cache_dir is not None else None
+        if engine == "stream" and can_stream(path, 1, use_mmap, cache):
+            var_stats, constraint_stats, density = stream_analysis(
+                path, top_k, **(density_options or {})
+            )
+        else:
+            model = read_model(path, engine, 1, use_mmap, cache)
+            var_stats, constraint_stats = get_stats(model, top_k)
+            density = get_density(model, **(density_options or {}))
+        with open(output_file, "w") as f:
+            f.write(make_report(var_stats, constraint_stats, density))
+
+    coefficients = {}
+    for kind, stats in (("Variable", var_stats), ("Constraint", constraint_stats)):
+        for stat in stats:
+            coefficients[(kind, stat.name)] = (stat.min_coef, stat.max_coef)
+    return coefficients
+
+
+class FamilySummary(TableRow):
+    """A row of the summary table: how the coefficients of a family vary between scenarios."""
+
+    def __init__(self, kind: str, name: str):
+        self.kind, self.name = kind, name
+        self.num_scenarios = 0
+        self.min_coef = float("inf")
+        self.max_coef = 0
+        # Range (in orders of magnitude) of the coefficients in each scenario
+        self.ranges: Dict[str, float] = {}
+
+    def update(self, scenario: str, min_coef: float, max_coef: float):
+        self.num_scenarios += 1
+        self.min_coef = min(self.min_coef, min_coef)
+        self.max_coef = max(self.max_coef, max_coef)
+        if 0 < min_coef <= max_coef < float("inf"):
+            self.ranges[scenario] = math.log10(max_coef) - math.log10(min_coef)
+
+    def get_table_row(self):
+        row = [self.kind, self.name, self.num_scenarios, self.min_coef, self.max_coef]
+        if not self.ranges:
+            return row + ["", "", "", ""]
+        narrowest = min(self.ranges, key=self.ranges.get)
+        widest = max(self.ranges, key=self.ranges.get)
+        return row + [
+            f"{self.ranges[narrowest]:.1f}",
+            f"{self.ranges[widest]:.1f}",
+            narrowest,
+            widest,
+        ]
+
+    def get_sort_key(self):
+        return max(self.ranges.values(), default=-1)
+
+    @staticmethod
+    def get_table_header():
+        return [
+            "Kind",
+            "Family",
+            "Scenarios",
+            "Min coef",
+            "Max coef",
+            "Min range",
+            "Max range",
+            "Narrowest in",
+            "Widest in",
+        ]
+
+
+def make_summary(results: Dict[str, FamilyCoefficients]) -> str:
+    """Returns a table of the coefficients of each family across the models (by path)."""
+    families: Dict[Tuple[str, str], FamilySummary] = {}
+    for path, coefficients in results.items():
+        for (kind, name), (min_coef, max_coef) in coefficients.items():
+            summary = families.get((kind, name))
+            if summary is None:
+                summary = families[(kind, name)] = FamilySummary(kind, name)
+            summary.update(scenario_name(path), min_coef, max_coef)
+    if not families:
+        return "No families to summarize."
+    return make_table(list(families.values()))
+
+
+def analyze_batch(
+    paths: List[str],
+    summary_file,
+    engine="python",
+    use_mmap=False,
+    cache_dir=None,
+    workers: Optional[int] = None,
+    memory_budget: Optional[int] = None,
+    top_k=0,
+    density_options: Optional[dict] = None,
+) -> Tuple[Dict[str, FamilyCoefficients], Dict[str, Exception]]:
+    """
+    Analyzes the model files in a pool of processes then saves a summary to summary_file.
+    The results of each file are saved next to it (see output_files()).
+
+    :param workers: number of processes (defaults to the number of CPUs)
+    :param memory_budget: maximum estimated memory (in bytes) of the models analyzed at once.
+        A model that doesn't fit on its own is still analyzed, once no other model is.
+    :param top_k: number of smallest and of largest coefficients listed for each family
+        in the results file of each model
+    :param density_options: keyword arguments of get_density() (e.g. top_dense)
+    :return: the coefficients of each family of the models that were analyzed (by path)
+        and the exception raised by those that couldn't be
+    """
+    workers = max(1, min(workers or os.cpu_count() or 1, len(paths)))
+    estimates = {path: estimate_memory(path, engine) for path in paths}
+    outputs = output_files(paths)
+    pending = list(paths)
+    running: Dict[concurrent.futures.Future, str] = {}
+    in_flight = 0
+    results: Dict[str, FamilyCoefficients] = {}
+    failures: Dict[str, Exception] = {}
+
+    def fits(path) -> bool:
+        if not running or memory_budget is None:
+            return True
+        return in_flight + estimates[path] <= memory_budget
+
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        while pending or running:
+            # Start the next models that fit in the memory budget
+            while pending and len(running) < workers:
+                path = next((path for path in pending if fits(path)), None)
+                if path is None:
+                    break
+                pending.remove(path)
+                future = executor.submit(
+                    analyze_file,
+                    path,
+                    outputs[path],
+                    engine,
+                    use_mmap,
+                    cache_dir,
+                    top_k,
+                    density_options,
+                )
+                running[future] = path
+                in_flight += estimates[path]
+
+            done, _ = concurrent.futures.wait(
+                running, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                path = running.pop(future)
+                in_flight -= estimates[path]
+                count = f"({len(results) + len(failures) + 1}/{len(paths)})"
+                try:
+                    results[path] = future.result()
+                    print(f"Analyzed {path} {count}")
+                except Exception as e:
+                    failures[path] = e
+                    print(f"Failed to analyze {path} {count}: {e}")
+
+    # Keep the order of the paths in the summary
+    results = {path: results[path] for path in paths if path in results}
+    summary = (
+        "Created by Martin Staadecker's LP analyzer tool. Enjoy! (https://github.com/staadecker/lp-analyzer)\n\n"
+        + f"Coefficients of each family across {len(results)} models. "
+        + "Ranges are in orders of magnitude.\n\n"
+        + make_summary(results)
+    )
+    if failures:
+        summary += "\n\nFailed to analyze:\n" + "".join(
+            f"- {path}: {error}\n" for path, error in failures.items()
+        )
+    with open(summary_file, "w") as f:
+        f.write(summary)
+    print(f"Saved summary to: {summary_file}")
+    return results, failures
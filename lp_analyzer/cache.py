@@ -0,0 +1,235 @@
+"""
+Provides ModelCache which saves parsed models (SparseLPModel) to binary .npz files
+such that the next analysis of the same file can skip parsing it.
+
+Cache entries are validated against the size and modification time of the model file
+as well as a hash of its first and last megabyte (or, optionally, of its whole content).
+When the cache directory grows beyond its maximum size, the least recently used entries are removed.
+"""
+import hashlib
+import json
+import os
+import tempfile
+from typing import Callable, Optional
+
+import numpy as np
+
+from .core import NameTable, SparseLPModel
+from .vectorized import as_numpy
+
+# Increment when the contents of the cache files change to invalidate old entries
+CACHE_FORMAT_VERSION = 2
+
+# Arrays of SparseLPModel that are saved as is
+MODEL_ARRAYS = (
+    "rhs",
+    "col_starts",
+    "row_indices",
+    "values",
+    "lower",
+    "upper",
+    "bound_order",
+)
+
+
+def default_cache_dir() -> str:
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(cache_home, "lp-analyzer")
+
+
+def hash_file(filename, sample_size: Optional[int] = 1 << 20) -> str:
+    """
+    Returns a hash of the content of the file.
+    If sample_size is not None, only the first and last sample_size bytes are hashed.
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    with open(filename, "rb") as f:
+        if sample_size is None:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                hasher.update(block)
+        else:
+            hasher.update(f.read(sample_size))
+            f.seek(max(f.tell(), os.path.getsize(filename) - sample_size))
+            hasher.update(f.read(sample_size))
+    return hasher.hexdigest()
+
+
+def _join_names(names) -> np.ndarray:
+    return np.frombuffer("\n".join(names).encode(), dtype=np.uint8)
+
+
+def _split_names(data: np.ndarray, count: int):
+    return data.tobytes().decode().split("\n") if count else []
+
+
+def _name_table_arrays(prefix: str, table: NameTable) -> dict:
+    return {
+        prefix + "_families": _join_names(table.families),
+        prefix + "_indexes": _join_names(table.indexes),
+        prefix + "_name_families": as_numpy(table.name_families),
+        prefix + "_name_indexes": as_numpy(table.name_indexes),
+    }
+
+
+def _load_name_table(data, prefix: str, metadata: dict) -> NameTable:
+    """Loads a name table saved by _name_table_arrays() without splitting the names again."""
+    table = NameTable()
+    table.families = _split_names(
+        data[prefix + "_families"], metadata[prefix + "_num_families"]
+    )
+    table.indexes = _split_names(
+        data[prefix + "_indexes"], metadata[prefix + "_num_indexes"]
+    )
+    table.family_ids = {name: i for i, name in enumerate(table.families)}
+    table.index_ids = {name: i for i, name in enumerate(table.indexes)}
+    for name in ("name_families", "name_indexes"):
+        getattr(table, name).frombytes(memoryview(data[prefix + "_" + name]).cast("B"))
+    return table
+
+
+def save_model(model: SparseLPModel, path, metadata: dict):
+    """Saves the model to an .npz file along with metadata (a JSON-serializable dict)."""
+    metadata = dict(
+        metadata,
+        objective=model.objective,
+        num_rows=model.num_rows,
+        num_cols=model.num_cols,
+    )
+    for prefix, table in (("row", model.row_table), ("col", model.col_table)):
+        metadata[prefix + "_num_families"] = len(table.families)
+        metadata[prefix + "_num_indexes"] = len(table.indexes)
+    np.savez(
+        path,
+        metadata=np.frombuffer(json.dumps(metadata).encode(), dtype=np.uint8),
+        row_names=_join_names(model.row_names),
+        row_types=_join_names(model.row_types),
+        col_names=_join_names(model.col_names),
+        **_name_table_arrays("row", model.row_table),
+        **_name_table_arrays("col", model.col_table),
+        **{name: as_numpy(getattr(model, name)) for name in MODEL_ARRAYS},
+    )
+
+
+def read_metadata(path) -> dict:
+    with np.load(path) as data:
+        return json.loads(data["metadata"].tobytes())
+
+
+def load_model(path) -> SparseLPModel:
+    """Loads a model saved with save_model()."""
+    model = SparseLPModel()
+    with np.load(path) as data:
+        metadata = json.loads(data["metadata"].tobytes())
+        model.objective = metadata["objective"]
+        model.row_names = _split_names(data["row_names"], metadata["num_rows"])
+        model.row_types = _split_names(data["row_types"], metadata["num_rows"])
+        model.col_names = _split_names(data["col_names"], metadata["num_cols"])
+        model.row_table = _load_name_table(data, "row", metadata)
+        model.col_table = _load_name_table(data, "col", metadata)
+        for name in MODEL_ARRAYS:
+            values = getattr(model, name)
+            del values[:]
+            values.frombytes(memoryview(data[name]).cast("B"))
+    model.row_ids = {name: i for i, name in enumerate(model.row_names)}
+    model.col_ids = {name: i for i, name in enumerate(model.col_names)}
+    return model
+
+
+class ModelCache:
+    """
+    A directory of parsed models keyed by the path of their model file.
+
+    :param cache_dir: directory where the models are saved
+    :param max_size: maximum total size of the cache in bytes, the least recently used models are removed first
+    :param full_hash: if True, entries are validated by hashing the entire model file rather than
+        relying on its modification time (slower, but survives the file being touched or copied)
+    """
+
+    def __init__(self, cache_dir=None, max_size=20 << 30, full_hash=False):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_size = max_size
+        self.full_hash = full_hash
+
+    def entry_path(self, filename) -> str:
+        key = hashlib.blake2b(
+            os.path.abspath(filename).encode(), digest_size=16
+        ).hexdigest()
+        return os.path.join(self.cache_dir, key + ".npz")
+
+    def _file_metadata(self, filename) -> dict:
+        stat = os.stat(filename)
+        metadata = {
+            "version": CACHE_FORMAT_VERSION,
+            "source": os.path.abspath(filename),
+            "size": stat.st_size,
+        }
+        if self.full_hash:
+            metadata["hash"] = hash_file(filename, sample_size=None)
+        else:
+            metadata["mtime_ns"] = stat.st_mtime_ns
+            metadata["hash"] = hash_file(filename)
+        return metadata
+
+    def load(self, filename) -> Optional[SparseLPModel]:
+        """Returns the cached model for the file or None if there is no valid cache entry."""
+        path = self.entry_path(filename)
+        if not os.path.exists(path):
+            return None
+        try:
+            cached = read_metadata(path)
+        except Exception:
+            return None  # Corrupted entry, it will be overwritten
+        expected = self._file_metadata(filename)
+        if any(cached.get(key) != value for key, value in expected.items()):
+            return None
+        model = load_model(path)
+        os.utime(path)  # Mark as recently used
+        return model
+
+    def save(self, filename, model: SparseLPModel):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        metadata = self._file_metadata(filename)
+        # Write to a temporary file first such that entries are never partially written
+        fd, temp_path = tempfile.mkstemp(suffix=".npz.tmp", dir=self.cache_dir)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                save_model(model, f, metadata)
+            os.replace(temp_path, self.entry_path(filename))
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        self.evict()
+
+    def evict(self):
+        """Removes the least recently used entries until the cache fits within max_size."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".npz"):
+                # Batch workers share the cache, another one may have evicted the entry
+                try:
+                    stat = os.stat(os.path.join(self.cache_dir, name))
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, name))
+        total_size = sum(size for _, size, _ in entries)
+        # Always keep the most recent entry, even if it's larger than max_size
+        for _, size, name in sorted(entries)[:-1]:
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                pass
+            total_size -= size
+
+    def read(self, filename, read: Callable[[], SparseLPModel]) -> SparseLPModel:
+        """Returns the cached model for the file, or reads it with read() and caches it."""
+        model = self.load(filename)
+        if model is not None:
+            print(f"Loaded model from cache: {self.entry_path(filename)}")
+            return model
+        model = read()
+        self.save(filename, model)
+        return model
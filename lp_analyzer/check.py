@@ -0,0 +1,303 @@
+"""
+Provides check_thresholds() which checks that the absolute values of the coefficients,
+RHS values and bounds of a model are within thresholds, e.g. to reject badly scaled
+models in continuous integration.
+
+.mps files are streamed through ThresholdReader, an MPSReader that checks each value as it
+is parsed instead of building a model, and stops reading at the first violation (or after
+a given number of them). .lp files are read into a LPModel and checked afterwards, and
+models already in memory can be checked with check_model().
+"""
+import math
+import os
+from typing import Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from .core import SparseLPModel
+from .files import is_lp_file, open_model_file
+from .reader import LPReader, MPSReader
+from .util import iter_lines, print_progress
+from .vectorized import as_numpy, nonzero_col_ids
+
+COEFFICIENT, RHS, BOUND = "coefficient", "RHS", "bound"
+BOUND_NAMES = {"UP": "upper bound", "LO": "lower bound", "FX": "fixed bound"}
+
+
+class Thresholds:
+    """
+    The range of absolute values allowed for each kind of value (None means no limit).
+
+    Zeroes are always allowed and so are infinite bounds.
+    """
+
+    def __init__(
+        self,
+        min_coef: Optional[float] = None,
+        max_coef: Optional[float] = None,
+        min_rhs: Optional[float] = None,
+        max_rhs: Optional[float] = None,
+        min_bound: Optional[float] = None,
+        max_bound: Optional[float] = None,
+    ):
+        def limits(low, high):
+            return (0.0 if low is None else low, math.inf if high is None else high)
+
+        self.ranges = {
+            COEFFICIENT: limits(min_coef, max_coef),
+            RHS: limits(min_rhs, max_rhs),
+            BOUND: limits(min_bound, max_bound),
+        }
+
+    def is_empty(self) -> bool:
+        return all(limits == (0.0, math.inf) for limits in self.ranges.values())
+
+
+class Violation:
+    """A value outside of its thresholds and where it was found."""
+
+    def __init__(
+        self,
+        kind: str,
+        value: float,
+        limit: float,
+        row: Optional[str],
+        column: Optional[str],
+        line_number: Optional[int] = None,
+    ):
+        self.kind, self.value, self.limit = kind, value, limit
+        self.row, self.column = row, column
+        # None when the location in the file isn't known (.lp files)
+        self.line_number = line_number
+
+    def __str__(self):
+        location = "" if self.line_number is None else f"line {self.line_number}: "
+        names = " in ".join(name for name in (self.column, self.row) if name)
+        direction = "below" if abs(self.value) < self.limit else "above"
+        return (
+            f"{location}{self.kind} {self.value:.1e} of {names} "
+            + f"is {direction} {self.limit:g}"
+        )
+
+    def to_dict(self):
+        return {
+            "kind": self.kind,
+            "value": self.value,
+            "limit": self.limit,
+            "row": self.row,
+            "column": self.column,
+            "line": self.line_number,
+        }
+
+
+def _violated_limit(value: float, limits) -> Optional[float]:
+    """Returns the limit that the absolute value violates, if any."""
+    low, high = limits
+    value = abs(value)
+    if value == 0:
+        return None
+    if value < low:
+        return low
+    if value > high:
+        return high
+    return None
+
+
+class ThresholdReader(MPSReader):
+    """
+    ThresholdReader streams an .mps file and collects the values outside of the thresholds.
+
+    No model is built: only the values are parsed, and the reading stops once
+    max_violations values are found.
+    """
+
+    def __init__(
+        self,
+        filename,
+        thresholds: Thresholds,
+        max_violations: Optional[int] = 1,
+        threaded_decompression=True,
+    ):
+        super().__init__(filename, threaded_decompression)
+        self.model = None
+        self.violations: List[Violation] = []
+        self._limit = max_violations or math.inf
+        self._coef_low, self._coef_high = thresholds.ranges[COEFFICIENT]
+        self._rhs_limits = thresholds.ranges[RHS]
+        self._bound_limits = thresholds.ranges[BOUND]
+        # Number of the line being parsed
+        self.line_number = 0
+
+    def check(self) -> List[Violation]:
+        with open_model_file(self.filename, self.threaded_decompression) as (
+            file,
+            get_position,
+        ):
+            lines = print_progress(
+                iter_lines(file),
+                message="Checking model",
+                total=os.path.getsize(self.filename),
+                get_position=get_position,
+            )
+            self._parse_lines(self._number_lines(lines))
+        return self.violations
+
+    def is_done(self) -> bool:
+        """Whether max_violations values were found."""
+        return len(self.violations) >= self._limit
+
+    def _number_lines(self, lines: Iterable[str]) -> Iterator[str]:
+        """Yields the lines while counting them, until enough violations are found."""
+        for self.line_number, line in enumerate(lines, 1):
+            yield line
+            if self.is_done():
+                return
+
+    def _add_violation(self, kind, value, limit, row, column):
+        self.violations.append(
+            Violation(kind, value, limit, row, column, self.line_number)
+        )
+
+    def _read_row(self, row: List):
+        """Rows aren't needed to check the values."""
+
+    def _read_column(self, line: List):
+        """Checks the coefficients of a line from the COLUMNS section"""
+        var_name = line[0]
+        if var_name == "MARKER" and line[1] == "'MARKER'":
+            return
+        low, high = self._coef_low, self._coef_high
+        for i in range(1, len(line), 2):
+            value = float(line[i + 1])
+            # Most values are within the thresholds so this is checked first
+            if low <= abs(value) <= high or value == 0:
+                continue
+            limit = _violated_limit(value, (low, high))
+            self._add_violation(COEFFICIENT, value, limit, line[i], var_name)
+            if self.is_done():
+                return
+
+    def _read_rhs(self, line: List):
+        """Checks the values of a line from the RHS section"""
+        for i in range(1, len(line), 2):
+            value = float(line[i + 1])
+            limit = _violated_limit(value, self._rhs_limits)
+            if limit is not None:
+                self._add_violation(RHS, value, limit, line[i], None)
+                if self.is_done():
+                    return
+
+    def _read_bound(self, line: List):
+        """Checks the value (if any) of a line from the BOUNDS section"""
+        if len(line) < 4:
+            return
+        value = float(line[3])
+        if math.isinf(value):
+            return
+        limit = _violated_limit(value, self._bound_limits)
+        if limit is not None:
+            kind = BOUND_NAMES.get(line[0], BOUND)
+            self._add_violation(kind, value, limit, None, line[2])
+
+
+def check_sparse_model(
+    model: SparseLPModel, thresholds: Thresholds, max_violations=1
+) -> List[Violation]:
+    """
+    Returns the values of a SparseLPModel outside of the thresholds (at most max_violations)
+    in the order of an .mps file: coefficients by column, RHS values then bounds.
+    """
+    limit = max_violations or math.inf
+    violations: List[Violation] = []
+
+    def add_violations(limits_kind, values: np.ndarray, location):
+        """location(i) returns the kind, row and column of values[i]."""
+        low, high = thresholds.ranges[limits_kind]
+        magnitudes = np.abs(values)
+        is_violation = (magnitudes != 0) & ((magnitudes < low) | (magnitudes > high))
+        for i in np.flatnonzero(is_violation).tolist():
+            if len(violations) >= limit:
+                return
+            kind, row, column = location(i)
+            value = float(values[i])
+            violated = _violated_limit(value, (low, high))
+            violations.append(Violation(kind, value, violated, row, column))
+
+    row_ids, col_ids = as_numpy(model.row_indices), nonzero_col_ids(model)
+    add_violations(
+        COEFFICIENT,
+        as_numpy(model.values),
+        lambda i: (
+            COEFFICIENT,
+            model.row_names[row_ids[i]],
+            model.col_names[col_ids[i]],
+        ),
+    )
+    rhs = as_numpy(model.rhs)
+    rows = np.flatnonzero(~np.isnan(rhs))
+    if model.objective is not None:
+        rows = rows[rows != model.objective]
+    add_violations(RHS, rhs[rows], lambda i: (RHS, model.row_names[rows[i]], None))
+
+    # The lower then upper bound of each column in the order they were first set
+    bound_order = as_numpy(model.bound_order)
+    cols = np.repeat(bound_order, 2)
+    values = np.column_stack(
+        (as_numpy(model.lower)[bound_order], as_numpy(model.upper)[bound_order])
+    ).ravel()
+    # Unset (NaN) and infinite bounds are allowed
+    positions = np.flatnonzero(np.isfinite(values))
+    add_violations(
+        BOUND,
+        values[positions],
+        lambda i: (
+            ("lower bound", "upper bound")[positions[i] % 2],
+            None,
+            model.col_names[cols[positions[i]]],
+        ),
+    )
+    return violations
+
+
+def check_model(model, thresholds: Thresholds, max_violations=1) -> List[Violation]:
+    """Returns the values of a model outside of the thresholds (at most max_violations)."""
+    if isinstance(model, SparseLPModel):
+        return check_sparse_model(model, thresholds, max_violations)
+    limit = max_violations or math.inf
+    violations: List[Violation] = []
+
+    def values():
+        for row in model.rows.values():
+            for col_name, value in row.coefficients.items():
+                yield COEFFICIENT, value, row.row_name, col_name
+            if not row.is_objective and row.rhs_value is not None:
+                yield RHS, row.rhs_value, row.row_name, None
+        for bound in model.bounds.values():
+            for kind, value in (
+                ("lower bound", bound.lhs_bound),
+                ("upper bound", bound.rhs_bound),
+            ):
+                if value is not None and not math.isinf(value):
+                    yield kind, value, None, bound.name
+
+    for kind, value, row, column in values():
+        ranges = thresholds.ranges[kind if kind in (COEFFICIENT, RHS) else BOUND]
+        violated = _violated_limit(value, ranges)
+        if violated is not None:
+            violations.append(Violation(kind, value, violated, row, column))
+            if len(violations) >= limit:
+                break
+    return violations
+
+
+def check_thresholds(
+    filename: str, thresholds: Thresholds, max_violations: Optional[int] = 1
+) -> List[Violation]:
+    """
+    Returns the values of the model file outside of the thresholds, in the order of the file.
+
+    :param max_violations: stop at this many violations (0 or None: check the whole file)
+    """
+    if is_lp_file(filename):
+        return check_model(LPReader(filename).read(), thresholds, max_violations)
+    return ThresholdReader(filename, thresholds, max_violations).check()
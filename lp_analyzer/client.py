@@ -0,0 +1,143 @@
+"""
+A thin client of the analysis server (see server.py).
+
+It only imports the standard library such that a request takes milliseconds:
+run it as 'python -m lp_analyzer.client' (or 'lp-analyzer client', which also imports
+the analysis modules).
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import sys
+from typing import Optional
+
+DEFAULT_PORT = 8765
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """An HTTP connection over a Unix socket."""
+
+    def __init__(self, socket_path: str, timeout=None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.socket_path)
+
+
+class ServerError(Exception):
+    """The server couldn't answer the request."""
+
+
+def request(
+    endpoint: str,
+    payload: Optional[dict] = None,
+    socket_path: Optional[str] = None,
+    port=DEFAULT_PORT,
+) -> dict:
+    """
+    Sends a request to the server (on socket_path if given, else on localhost:port)
+    and returns its JSON answer. Requests with a payload are POSTed.
+    """
+    if socket_path is not None:
+        connection = UnixHTTPConnection(socket_path)
+    else:
+        connection = http.client.HTTPConnection("localhost", port)
+    try:
+        if payload is None:
+            connection.request("GET", endpoint)
+        else:
+            connection.request(
+                "POST",
+                endpoint,
+                body=json.dumps(payload),
+                headers={"Content-Type": "application/json"},
+            )
+        response = connection.getresponse()
+        answer = json.loads(response.read())
+    finally:
+        connection.close()
+    if response.status != 200:
+        raise ServerError(answer.get("error", response.reason))
+    return answer
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="lp-analyzer client",
+        description="Sends a request to 'lp-analyzer serve', which keeps the models "
+        "it read in memory, and prints the answer.",
+    )
+    address = parser.add_mutually_exclusive_group()
+    address.add_argument("--socket", type=str, default=None, help="Unix socket.")
+    address.add_argument(
+        "--port",
+        type=int,
+        default=DEFAULT_PORT,
+        help=f"Port on localhost (default: {DEFAULT_PORT}).",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    analyze = commands.add_parser("analyze", help="The tables of the full report.")
+    analyze.add_argument("input_file", type=str, help="Path of the model")
+    analyze.add_argument(
+        "--top-k",
+        type=int,
+        default=0,
+        help="List the K smallest and K largest coefficients of each family.",
+    )
+    analyze.add_argument("--top-dense", type=int, default=None)
+    analyze.add_argument("--dense-row-threshold", type=int, default=None)
+    analyze.add_argument("--dense-col-threshold", type=int, default=None)
+
+    drilldown = commands.add_parser(
+        "drilldown", help="The coefficient range of each family by index value."
+    )
+    drilldown.add_argument("input_file", type=str, help="Path of the model")
+    drilldown.add_argument("--top", type=int, default=None)
+    drilldown.add_argument("--family", action="append", default=None)
+
+    check = commands.add_parser(
+        "check", help="The values outside of thresholds (exits with code 1 if any)."
+    )
+    check.add_argument("input_file", type=str, help="Path of the model")
+    for option in (
+        "min",
+        "max",
+        "min-coef",
+        "max-coef",
+        "min-rhs",
+        "max-rhs",
+        "min-bound",
+        "max-bound",
+    ):
+        check.add_argument(f"--{option}", type=float, default=None)
+    check.add_argument("--max-violations", type=int, default=1)
+
+    commands.add_parser("status", help="The models kept in memory.")
+    args = parser.parse_args(argv)
+
+    if args.command == "status":
+        payload = None
+    else:
+        payload = {
+            name: value
+            for name, value in vars(args).items()
+            if name not in ("socket", "port", "command") and value is not None
+        }
+        # The server may run in another directory
+        payload["input_file"] = os.path.abspath(args.input_file)
+    try:
+        answer = request("/" + args.command, payload, args.socket, args.port)
+    except (OSError, ServerError) as e:
+        sys.exit(f"lp-analyzer client: {e}")
+    print(answer["report"])
+    if answer.get("failed"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,230 @@
-from typing import Dict, Optional, Tuple
+import functools
+import math
+from array import array
+from bisect import bisect_right
+from heapq import heappush, heapreplace
+from typing import Dict, Iterable, List, Optional, Tuple
 
 # Mapping of row types to user friendly outputs. Used when printing rows.
 # RHS values are on the left, hence why >= and <= are flipped.
 SYMBOL_MAPPING = {"L": ">=", "G": "<=", "E": "=", "N": "Obj:"}
 
 
+def split_type_and_index(name: str) -> Tuple[str, str]:
+    row_type, _, index = name.partition("(")
+    index = index[: index.find(")")]
+    return row_type, index
+
+
+class NameTable:
+    """
+    Interns the names of rows (or columns) into a pair of integer ids: the id of their family
+    and the id of their index (see split_type_and_index), e.g. 'GenCapacity(1,2020)' is
+    in family 'GenCapacity' with index '1,2020'.
+
+    Names are split once when they're added (while reading the model) such that the analysis
+    can group rows and columns by integer ids. The i-th name added is in family
+    families[name_families[i]] and has index indexes[name_indexes[i]].
+    """
+
+    def __init__(self):
+        self.families: List[str] = []
+        self.family_ids: Dict[str, int] = {}
+        self.indexes: List[str] = []
+        self.index_ids: Dict[str, int] = {}
+        self.name_families = array("i")
+        self.name_indexes = array("i")
+
+    def __len__(self):
+        return len(self.name_families)
+
+    def add(self, name: str):
+        self.extend((name,))
+
+    def extend(self, names: Iterable[str]):
+        family_ids, index_ids = self.family_ids, self.index_ids
+        families, indexes = self.families, self.indexes
+        name_families, name_indexes = self.name_families, self.name_indexes
+        # Many names have a new index so get() is used rather than the (slower) KeyError
+        for name in names:
+            family, index = split_type_and_index(name)
+            family_id = family_ids.get(family)
+            if family_id is None:
+                family_id = family_ids[family] = len(families)
+                families.append(family)
+            index_id = index_ids.get(index)
+            if index_id is None:
+                index_id = index_ids[index] = len(indexes)
+                indexes.append(index)
+            name_families.append(family_id)
+            name_indexes.append(index_id)
+
+    def family_of(self, name_id: int) -> str:
+        return self.families[self.name_families[name_id]]
+
+    def index_of(self, name_id: int) -> str:
+        return self.indexes[self.name_indexes[name_id]]
+
+
+class IndexSet:
+    """
+    A set of index ids (see NameTable) stored as a bitmap, i.e. one bit per index id.
+    Used to count the distinct indexes of a family using much less memory than a set of strings.
+    """
+
+    __slots__ = ("bits", "count")
+
+    def __init__(self, bits: Optional[bytearray] = None, count: Optional[int] = None):
+        """
+        :param bits: bitmap where bit i of byte j is set if index id 8 * j + i is in the set
+        :param count: number of bits set in the bitmap, counted if not given
+        """
+        self.bits = bytearray() if bits is None else bits
+        if count is None:
+            count = sum(bin(byte).count("1") for byte in self.bits)
+        self.count = count
+
+    def add(self, index_id: int):
+        byte, mask = index_id >> 3, 1 << (index_id & 7)
+        if byte >= len(self.bits):
+            self.bits.extend(bytes(byte + 1 - len(self.bits)))
+        if not self.bits[byte] & mask:
+            self.bits[byte] |= mask
+            self.count += 1
+
+    def __contains__(self, index_id: int) -> bool:
+        byte = index_id >> 3
+        return byte < len(self.bits) and bool(self.bits[byte] & (1 << (index_id & 7)))
+
+    def __len__(self):
+        return self.count
+
+
+# Decades of the buckets of a LogHistogram: bucket i counts the values in
+# [10^(MIN_DECADE + i), 10^(MIN_DECADE + i + 1)). The first and last buckets also count
+# the values below and above the range.
+MIN_DECADE, MAX_DECADE = -15, 15
+NUM_DECADES = MAX_DECADE - MIN_DECADE + 1
+# The lower edge of every bucket but the first, such that bisect_right() returns the bucket
+DECADE_EDGES = [float(f"1e{e}") for e in range(MIN_DECADE + 1, MAX_DECADE + 1)]
+HISTOGRAM_BARS = "▁▂▃▄▅▆▇█"
+_bucket_of = functools.partial(bisect_right, DECADE_EDGES)
+
+
+class LogHistogram:
+    """
+    Counts the absolute values of a family (e.g. its coefficients) by order of magnitude
+    in a fixed number of buckets (see DECADE_EDGES), such that its memory doesn't
+    depend on the number of values. Zeroes aren't counted.
+    """
+
+    __slots__ = ("counts",)
+
+    def __init__(self, counts: Optional[List[int]] = None):
+        self.counts = [0] * NUM_DECADES if counts is None else counts
+
+    def add(self, val: float):
+        if val:
+            self.counts[bisect_right(DECADE_EDGES, abs(val))] += 1
+
+    def add_all(self, values: Iterable[float]):
+        counts = self.counts
+        for bucket in map(_bucket_of, map(abs, filter(None, values))):
+            counts[bucket] += 1
+
+    def decades(self) -> Tuple[int, List[int]]:
+        """Returns the first decade with values and the counts from it to the last one."""
+        used = [i for i, count in enumerate(self.counts) if count]
+        if not used:
+            return 0, []
+        return MIN_DECADE + used[0], self.counts[used[0] : used[-1] + 1]
+
+    def __len__(self):
+        return sum(self.counts)
+
+    def __str__(self):
+        """
+        Returns the histogram as bars from its first to its last decade with values,
+        e.g. '-3 ▁█·▂ +0' when most values are between 0.01 and 0.1.
+        Decades with few values still get the smallest bar so that outliers are visible.
+        """
+        first, counts = self.decades()
+        if not counts:
+            return ""
+        largest = max(counts)
+        bars = "".join(
+            HISTOGRAM_BARS[math.ceil(count * len(HISTOGRAM_BARS) / largest) - 1]
+            if count
+            else "·"
+            for count in counts
+        )
+        return f"{first:+d} {bars} {first + len(counts) - 1:+d}"
+
+    def to_dict(self):
+        first, counts = self.decades()
+        return {"min_decade": first, "counts": counts}
+
+
+class ExtremeValues:
+    """
+    Keeps the k smallest and the k largest values added (e.g. the absolute coefficients
+    of a family) with their location, in two heaps of at most k entries.
+    Ties are broken by the smallest key (the position in row-major order, see add()).
+    """
+
+    __slots__ = ("k", "smallest_heap", "largest_heap")
+
+    def __init__(self, k: int):
+        self.k = k
+        # The largest of the smallest values is at the root, hence the negated entries
+        self.smallest_heap: List[Tuple[float, int, tuple]] = []
+        self.largest_heap: List[Tuple[float, int, tuple]] = []
+
+    def add(self, val: float, key: int, location: tuple):
+        """
+        :param key: unique key of the value, e.g. row id << 32 | column id
+        :param location: e.g. the names of its row and column
+        """
+        # Values are compared before making entries since most values are in neither heap
+        largest = self.largest_heap
+        if len(largest) < self.k:
+            heappush(largest, (val, -key, location))
+        elif val >= largest[0][0]:
+            entry = (val, -key, location)
+            if entry > largest[0]:
+                heapreplace(largest, entry)
+
+        smallest = self.smallest_heap
+        if len(smallest) < self.k:
+            heappush(smallest, (-val, -key, location))
+        elif val <= -smallest[0][0]:
+            entry = (-val, -key, location)
+            if entry > smallest[0]:
+                heapreplace(smallest, entry)
+
+    def may_keep(self, min_val: float, max_val: float) -> bool:
+        """
+        Returns whether any value between min_val and max_val could be kept if added
+        with a larger key than the values added so far, e.g. the coefficients of the next row.
+        """
+        return (
+            len(self.largest_heap) < self.k
+            or len(self.smallest_heap) < self.k
+            or max_val > self.largest_heap[0][0]
+            or min_val < -self.smallest_heap[0][0]
+        )
+
+    def smallest(self) -> List[Tuple[float, tuple]]:
+        """Returns the smallest values and their location in increasing order."""
+        return [
+            (-val, location) for val, _, location in sorted(self.smallest_heap)[::-1]
+        ]
+
+    def largest(self) -> List[Tuple[float, tuple]]:
+        """Returns the largest values and their location in decreasing order."""
+        return [(val, location) for val, _, location in sorted(self.largest_heap)[::-1]]
+
+
 class LPModel:
     """Represents a linear model. Contains all the rows, variable bounds and objective function."""
 
@@ -12,12 +232,30 @@ class LPModel:
         self.objective: Optional[Row] = None  # Reference to the objective function
         self.rows: Dict[str, Row] = {}  # Will include the objective function
         self.bounds: Dict[str, Bound] = {}
+        # Families and indexes of the rows (in the same order as self.rows) and of the columns.
+        # Columns are numbered in the order they're added with add_column().
+        self.row_table = NameTable()
+        self.col_table = NameTable()
+        self.col_ids: Dict[str, int] = {}
+
+    @property
+    def num_rows(self) -> int:
+        return len(self.rows)
+
+    @property
+    def num_cols(self) -> int:
+        return len(self.col_ids)
+
+    @property
+    def num_nonzeros(self) -> int:
+        return sum(len(row.coefficients) for row in self.rows.values())
 
     def add_row(self, row_name: str, row_type: str):
         assert (
             row_name not in self.rows
         )  # Make sure it doesn't already exist (don't want to overwrite)
         self.rows[row_name] = Row(row_name, row_type)
+        self.row_table.add(row_name)
         if row_type == "N":  # If row is the objective row
             if self.objective is not None:
                 raise Exception("Can't set objective, it already exists")
@@ -25,6 +263,14 @@ class LPModel:
             self.objective.rhs_value = None  # No RHS value for the objective function
             self.rows[row_name].is_objective = True
 
+    def add_column(self, col_name: str) -> int:
+        """Adds the column (variable) to the name table if it isn't there yet and returns its id."""
+        col_id = self.col_ids.get(col_name)
+        if col_id is None:
+            col_id = self.col_ids[col_name] = len(self.col_ids)
+            self.col_table.add(col_name)
+        return col_id
+
     def print_model(self):
         print("OBJECTIVE")
         self.objective.print()
@@ -37,6 +283,31 @@ class LPModel:
             bound.print()
 
 
+class ColumnIds:
+    """
+    Looks up the ids of the columns of an LPModel without modifying it. The columns that are
+    in its rows or bounds but weren't added with add_column() get the next ids, in copies of
+    its col_ids and col_table (made at the first such column).
+    """
+
+    def __init__(self, model: LPModel):
+        self.col_ids = model.col_ids
+        self.col_table = model.col_table
+        self._copied = False
+
+    def __getitem__(self, col_name: str) -> int:
+        col_id = self.col_ids.get(col_name)
+        if col_id is None:
+            if not self._copied:
+                self.col_ids = dict(self.col_ids)
+                self.col_table = NameTable()
+                self.col_table.extend(self.col_ids)
+                self._copied = True
+            col_id = self.col_ids[col_name] = len(self.col_ids)
+            self.col_table.add(col_name)
+        return col_id
+
+
 class Row:
     """A constraint or the objective function in the model."""
 
@@ -103,3 +374,207 @@ class Bound:
             print(self.lhs_bound, "<=", self.name)
         else:
             print("unbounded ", self.name)
+
+
+class ColumnNotContiguousError(Exception):
+    """
+    The entries of a column aren't contiguous in the COLUMNS section, which SparseLPModel
+    requires since its columns are added one after the other.
+    """
+
+
+class SparseLPModel:
+    """
+    Compact, array-backed representation of a linear model.
+
+    Rows and columns are identified by integer ids (their position in row_names and col_names).
+    The constraint matrix is stored in compressed sparse column (CSC) format: the non-zeroes of
+    column j are values[col_starts[j]:col_starts[j + 1]] and their row ids are the matching
+    entries of row_indices. This takes 12 bytes per non-zero (a 4-byte row id and an 8-byte value)
+    rather than a dictionary entry keyed by the variable name.
+
+    RHS values and bounds are stored per row and per column. A bound that is not set is NaN,
+    as is the RHS of the objective function (equivalent to None in LPModel).
+    """
+
+    def __init__(self):
+        self.objective: Optional[int] = None  # Row id of the objective function
+        self.row_names: List[str] = []
+        self.row_types: List[str] = []
+        self.row_ids: Dict[str, int] = {}
+        self.row_table = NameTable()
+        self.rhs = array("d")
+
+        self.col_names: List[str] = []
+        self.col_ids: Dict[str, int] = {}
+        self.col_table = NameTable()
+        self.col_starts = array("q", [0])
+        self.row_indices = array("i")
+        self.values = array("d")
+        self.lower = array("d")
+        self.upper = array("d")
+        # Column ids in the order their bounds were first set.
+        # Preserves the order in which LPModel.bounds would list them.
+        self.bound_order = array("i")
+
+    @property
+    def num_rows(self) -> int:
+        return len(self.row_names)
+
+    @property
+    def num_cols(self) -> int:
+        return len(self.col_names)
+
+    @property
+    def num_nonzeros(self) -> int:
+        return len(self.values)
+
+    def add_row(self, row_name: str, row_type: str) -> int:
+        assert (
+            row_name not in self.row_ids
+        )  # Make sure it doesn't already exist (don't want to overwrite)
+        row_id = len(self.row_names)
+        self.row_ids[row_name] = row_id
+        self.row_names.append(row_name)
+        self.row_types.append(row_type)
+        self.row_table.add(row_name)
+        if row_type == "N":  # If row is the objective row
+            if self.objective is not None:
+                raise Exception("Can't set objective, it already exists")
+            self.objective = row_id
+            self.rhs.append(math.nan)  # No RHS value for the objective function
+        else:
+            self.rhs.append(0.0)
+        return row_id
+
+    def add_column(self, col_name: str) -> int:
+        """
+        Adds an empty column after all the existing columns. Non-zeroes can then be added
+        by appending to row_indices and values and updating col_starts[-1].
+        """
+        if col_name in self.col_ids:
+            raise ColumnNotContiguousError(
+                f"Column {col_name} already exists. The entries of a column must be contiguous."
+            )
+        col_id = len(self.col_names)
+        self.col_ids[col_name] = col_id
+        self.col_names.append(col_name)
+        self.col_table.add(col_name)
+        self.col_starts.append(len(self.values))
+        self.lower.append(math.nan)
+        self.upper.append(math.nan)
+        return col_id
+
+    def add_rows(self, row_names: List[str], row_types: List[str]):
+        """Adds many rows at once. Same as calling add_row() for each row, but faster."""
+        first_id = len(self.row_names)
+        self.row_ids.update(zip(row_names, range(first_id, first_id + len(row_names))))
+        if len(self.row_ids) != first_id + len(row_names):
+            raise Exception("Row names must be unique.")
+        self.row_names.extend(row_names)
+        self.row_types.extend(row_types)
+        self.row_table.extend(row_names)
+        self.rhs.extend(array("d", [0.0]) * len(row_names))
+        # Objective rows have no RHS value
+        if "N" in row_types:
+            for i, row_type in enumerate(row_types):
+                if row_type == "N":
+                    if self.objective is not None:
+                        raise Exception("Can't set objective, it already exists")
+                    self.objective = first_id + i
+                    self.rhs[self.objective] = math.nan
+
+    def add_columns(self, col_names: List[str], col_ends):
+        """
+        Adds many columns at once whose non-zeroes are then appended to row_indices and values.
+        col_ends contains the end offset of each column in row_indices and values
+        (an array or NumPy array of 64-bit integers).
+        """
+        first_id = len(self.col_names)
+        self.col_ids.update(zip(col_names, range(first_id, first_id + len(col_names))))
+        if len(self.col_ids) != first_id + len(col_names):
+            seen = set(self.col_names)
+            for col_name in col_names:
+                if col_name in seen:
+                    break
+                seen.add(col_name)
+            raise ColumnNotContiguousError(
+                f"Column {col_name} already exists. The entries of a column must be contiguous."
+            )
+        self.col_names.extend(col_names)
+        self.col_table.extend(col_names)
+        self.col_starts.frombytes(memoryview(col_ends).cast("B"))
+        self.lower.extend(array("d", [math.nan]) * len(col_names))
+        self.upper.extend(array("d", [math.nan]) * len(col_names))
+
+    def nbytes(self) -> int:
+        """Returns the number of bytes used by the arrays of the model (excludes the name tables)."""
+        return sum(
+            a.itemsize * len(a)
+            for a in (
+                self.rhs,
+                self.col_starts,
+                self.row_indices,
+                self.values,
+                self.lower,
+                self.upper,
+                self.bound_order,
+            )
+        )
+
+    @classmethod
+    def from_lp_model(cls, lp_model: LPModel) -> "SparseLPModel":
+        """
+        Converts an LPModel to an equivalent SparseLPModel.
+        Columns are numbered in the order they first appear in the rows, then in the bounds.
+        """
+        model = cls()
+        columns: Dict[str, Tuple[array, array]] = {}
+        for row in lp_model.rows.values():
+            row_id = model.add_row(row.row_name, row.row_type)
+            if row.rhs_value is not None:
+                model.rhs[row_id] = row.rhs_value
+            for col_name, value in row.coefficients.items():
+                try:
+                    row_indices, values = columns[col_name]
+                except KeyError:
+                    row_indices, values = columns[col_name] = array("i"), array("d")
+                row_indices.append(row_id)
+                values.append(value)
+        for col_name, (row_indices, values) in columns.items():
+            model.add_column(col_name)
+            model.row_indices.extend(row_indices)
+            model.values.extend(values)
+            model.col_starts[-1] = len(model.values)
+        for bound in lp_model.bounds.values():
+            col_id = model.col_ids.get(bound.name)
+            if col_id is None:
+                col_id = model.add_column(bound.name)
+            model.bound_order.append(col_id)
+            if bound.lhs_bound is not None:
+                model.lower[col_id] = bound.lhs_bound
+            if bound.rhs_bound is not None:
+                model.upper[col_id] = bound.rhs_bound
+        return model
+
+    def to_lp_model(self) -> LPModel:
+        """Converts the model to an equivalent LPModel (uses much more memory)."""
+        model = LPModel()
+        for row_name, row_type in zip(self.row_names, self.row_types):
+            model.add_row(row_name, row_type)
+        for col_name in self.col_names:
+            model.add_column(col_name)
+        rows = [model.rows[row_name] for row_name in self.row_names]
+        for row, rhs in zip(rows, self.rhs):
+            if not math.isnan(rhs):
+                row.rhs_value = rhs
+        for col_id, col_name in enumerate(self.col_names):
+            for i in range(self.col_starts[col_id], self.col_starts[col_id + 1]):
+                rows[self.row_indices[i]].coefficients[col_name] = self.values[i]
+        for col_id in self.bound_order:
+            bound = Bound(self.col_names[col_id])
+            lower, upper = self.lower[col_id], self.upper[col_id]
+            bound.lhs_bound = None if math.isnan(lower) else lower
+            bound.rhs_bound = None if math.isnan(upper) else upper
+            model.bounds[bound.name] = bound
+        return model
@@ -0,0 +1,329 @@
+"""
+Provides build_index() which saves the rows, columns, non-zeroes, RHS values and bounds of a
+model to a SQLite database, and query_coefficients() which finds the coefficients of families
+in it, e.g. the coefficients of GenCapacity in the Max_Dispatch constraints below 1e-6, in
+milliseconds instead of reading (or grepping) the model file again.
+
+The non-zeroes are stored with the families of their row and column and their magnitude
+(absolute value), indexed such that queries by family and magnitude only read the matching
+entries. Indexes are created once the tables are filled, which is much faster than
+updating them while inserting. The database is written to a temporary file and renamed once
+complete, such that an interrupted indexing doesn't leave a partial database.
+"""
+import math
+import os
+import pathlib
+import sqlite3
+import tempfile
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from tabulate import tabulate
+
+from .core import LPModel, SparseLPModel
+from .util import timed
+from .vectorized import as_numpy, nonzero_col_ids
+
+# Increment when the schema changes to reject databases written by older versions
+INDEX_FORMAT_VERSION = 1
+DEFAULT_QUERY_LIMIT = 20
+
+SCHEMA = """
+CREATE TABLE metadata (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE families (id INTEGER PRIMARY KEY, kind TEXT, name TEXT);
+CREATE TABLE rows (
+    id INTEGER PRIMARY KEY, name TEXT, family INTEGER, idx TEXT, type TEXT, rhs REAL
+);
+CREATE TABLE columns (
+    id INTEGER PRIMARY KEY, name TEXT, family INTEGER, idx TEXT, lower REAL, upper REAL
+);
+CREATE TABLE nonzeros (
+    row INTEGER, col INTEGER, row_family INTEGER, col_family INTEGER,
+    value REAL, magnitude REAL
+);
+"""
+INDEXES = """
+CREATE UNIQUE INDEX families_name ON families (kind, name);
+CREATE UNIQUE INDEX rows_name ON rows (name);
+CREATE INDEX rows_family ON rows (family, idx);
+CREATE UNIQUE INDEX columns_name ON columns (name);
+CREATE INDEX columns_family ON columns (family, idx);
+CREATE INDEX nonzeros_families ON nonzeros (col_family, row_family, magnitude);
+CREATE INDEX nonzeros_row_family ON nonzeros (row_family, magnitude);
+CREATE INDEX nonzeros_magnitude ON nonzeros (magnitude);
+CREATE INDEX nonzeros_row ON nonzeros (row);
+CREATE INDEX nonzeros_col ON nonzeros (col);
+"""
+
+
+def _or_null(values: np.ndarray) -> List[Optional[float]]:
+    """Returns the values with None (NULL) instead of NaN."""
+    return [None if math.isnan(value) else value for value in values.tolist()]
+
+
+def _nonzero_rows(
+    model: SparseLPModel, num_row_families: int, chunk_size=1 << 20
+) -> Iterator[Tuple[int, int, int, int, float, float]]:
+    """Yields the rows of the nonzeros table, converting the arrays by chunks."""
+    row_ids = as_numpy(model.row_indices)
+    col_ids = nonzero_col_ids(model)
+    values = as_numpy(model.values)
+    row_families = as_numpy(model.row_table.name_families)
+    col_families = as_numpy(model.col_table.name_families) + num_row_families
+    for start in range(0, len(values), chunk_size):
+        rows = row_ids[start : start + chunk_size]
+        cols = col_ids[start : start + chunk_size]
+        chunk_values = values[start : start + chunk_size]
+        yield from zip(
+            rows.tolist(),
+            cols.tolist(),
+            row_families[rows].tolist(),
+            col_families[cols].tolist(),
+            chunk_values.tolist(),
+            np.abs(chunk_values).tolist(),
+        )
+
+
+def build_index(model, db_path: str, source: Optional[str] = None):
+    """
+    Saves the model to a new SQLite database at db_path (replacing any existing file).
+    An LPModel is first converted to a SparseLPModel.
+
+    :param source: the path of the model file, saved such that queries can warn when it
+        changed since it was indexed
+    """
+    if isinstance(model, LPModel):
+        model = SparseLPModel.from_lp_model(model)
+
+    with timed("Indexing model"):
+        directory = os.path.dirname(os.path.abspath(db_path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        os.close(fd)
+        try:
+            connection = sqlite3.connect(tmp_path)
+            try:
+                _fill(connection, model, source)
+            finally:
+                connection.close()
+            os.replace(tmp_path, db_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+
+def _fill(connection: sqlite3.Connection, model: SparseLPModel, source: Optional[str]):
+    # The database is only renamed once complete so it doesn't need to survive crashes
+    connection.execute("PRAGMA journal_mode = OFF")
+    connection.execute("PRAGMA synchronous = OFF")
+    connection.executescript(SCHEMA)
+    metadata = {"version": str(INDEX_FORMAT_VERSION)}
+    if source is not None:
+        stat = os.stat(source)
+        metadata.update(
+            source=os.path.abspath(source),
+            size=str(stat.st_size),
+            mtime=str(stat.st_mtime_ns),
+        )
+    connection.executemany("INSERT INTO metadata VALUES (?, ?)", metadata.items())
+
+    # Column families are numbered after the row families
+    row_table, col_table = model.row_table, model.col_table
+    num_row_families = len(row_table.families)
+    connection.executemany(
+        "INSERT INTO families VALUES (?, ?, ?)",
+        [(i, "Constraint", name) for i, name in enumerate(row_table.families)]
+        + [
+            (num_row_families + i, "Variable", name)
+            for i, name in enumerate(col_table.families)
+        ],
+    )
+    connection.executemany(
+        "INSERT INTO rows VALUES (?, ?, ?, ?, ?, ?)",
+        zip(
+            range(model.num_rows),
+            model.row_names,
+            row_table.name_families,
+            map(row_table.indexes.__getitem__, row_table.name_indexes),
+            model.row_types,
+            _or_null(as_numpy(model.rhs)),
+        ),
+    )
+    connection.executemany(
+        "INSERT INTO columns VALUES (?, ?, ?, ?, ?, ?)",
+        zip(
+            range(model.num_cols),
+            model.col_names,
+            (family + num_row_families for family in col_table.name_families),
+            map(col_table.indexes.__getitem__, col_table.name_indexes),
+            _or_null(as_numpy(model.lower)),
+            _or_null(as_numpy(model.upper)),
+        ),
+    )
+    connection.executemany(
+        "INSERT INTO nonzeros VALUES (?, ?, ?, ?, ?, ?)",
+        _nonzero_rows(model, num_row_families),
+    )
+    connection.executescript(INDEXES)
+    connection.commit()
+
+
+def open_index(db_path: str) -> sqlite3.Connection:
+    """Opens a database written by build_index(), checking that it's from this version."""
+    if not os.path.isfile(db_path):
+        raise FileNotFoundError(
+            f"No index at {db_path}, create it with 'lp-analyzer index'"
+        )
+    # Read-only such that queries can't modify the index
+    uri = pathlib.Path(db_path).resolve().as_uri() + "?mode=ro"
+    connection = sqlite3.connect(uri, uri=True)
+    try:
+        version = connection.execute(
+            "SELECT value FROM metadata WHERE key = 'version'"
+        ).fetchone()
+    except sqlite3.DatabaseError:
+        version = None
+    if version is None or version[0] != str(INDEX_FORMAT_VERSION):
+        connection.close()
+        raise ValueError(f"{db_path} isn't an index of this version, re-create it")
+    return connection
+
+
+def is_stale(connection: sqlite3.Connection) -> bool:
+    """Whether the indexed model file changed (or was removed) since it was indexed."""
+    metadata = dict(connection.execute("SELECT key, value FROM metadata"))
+    if "source" not in metadata:
+        return False
+    try:
+        stat = os.stat(metadata["source"])
+    except OSError:
+        return True
+    return (str(stat.st_size), str(stat.st_mtime_ns)) != (
+        metadata["size"],
+        metadata["mtime"],
+    )
+
+
+def _family_ids(connection, kind: str, names: Sequence[str]) -> List[int]:
+    """Returns the ids of the families, raising a ValueError if one isn't in the index."""
+    placeholders = ", ".join("?" * len(names))
+    ids = dict(
+        connection.execute(
+            f"SELECT name, id FROM families WHERE kind = ? AND name IN ({placeholders})",
+            (kind, *names),
+        )
+    )
+    unknown = [name for name in names if name not in ids]
+    if unknown:
+        raise ValueError(
+            f"Unknown {kind.lower()} families: {', '.join(unknown)} "
+            + "(list them with --sql 'SELECT kind, name FROM families')"
+        )
+    return list(ids.values())
+
+
+def _check_name(connection, table: str, name: str):
+    """Raises a ValueError if the row (or column) isn't in the index."""
+    if connection.execute(f"SELECT 1 FROM {table} WHERE name = ?", (name,)).fetchone():
+        return
+    raise ValueError(f"Unknown {table[:-1]}: {name}")
+
+
+class CoefficientQuery:
+    """
+    The coefficients matching all the given conditions (None means any), where below and
+    above are strict limits on their absolute value. Families, rows and columns that aren't
+    in the index are reported with a ValueError.
+    """
+
+    def __init__(
+        self,
+        var_families: Optional[Sequence[str]] = None,
+        con_families: Optional[Sequence[str]] = None,
+        below: Optional[float] = None,
+        above: Optional[float] = None,
+        row: Optional[str] = None,
+        column: Optional[str] = None,
+    ):
+        self.var_families, self.con_families = var_families, con_families
+        self.below, self.above = below, above
+        self.row, self.column = row, column
+
+    def where(self, connection) -> Tuple[str, list]:
+        """Returns the WHERE clause on the nonzeros table (n) and its parameters."""
+        conditions, parameters = [], []
+        for families, kind, column in (
+            (self.var_families, "Variable", "n.col_family"),
+            (self.con_families, "Constraint", "n.row_family"),
+        ):
+            if families is not None:
+                ids = _family_ids(connection, kind, families)
+                conditions.append(f"{column} IN ({', '.join('?' * len(ids))})")
+                parameters.extend(ids)
+        if self.below is not None:
+            conditions.append("n.magnitude < ?")
+            parameters.append(self.below)
+        if self.above is not None:
+            conditions.append("n.magnitude > ?")
+            parameters.append(self.above)
+        for name, table, column in (
+            (self.row, "rows", "n.row"),
+            (self.column, "columns", "n.col"),
+        ):
+            if name is not None:
+                _check_name(connection, table, name)
+                conditions.append(f"{column} = (SELECT id FROM {table} WHERE name = ?)")
+                parameters.append(name)
+        return " AND ".join(conditions) or "1", parameters
+
+
+def query_coefficients(
+    connection: sqlite3.Connection,
+    query: CoefficientQuery,
+    limit: Optional[int] = DEFAULT_QUERY_LIMIT,
+    largest=False,
+) -> Tuple[int, List[Tuple[str, str, float]]]:
+    """
+    Returns the number of coefficients matching the query and the (at most limit)
+    smallest ones in absolute value (or the largest ones) as (row, column, value).
+    """
+    where, parameters = query.where(connection)
+    (count,) = connection.execute(
+        f"SELECT COUNT(*) FROM nonzeros n WHERE {where}", parameters
+    ).fetchone()
+    rows = connection.execute(
+        "SELECT r.name, c.name, n.value FROM nonzeros n "
+        + "JOIN rows r ON r.id = n.row JOIN columns c ON c.id = n.col "
+        + f"WHERE {where} ORDER BY n.magnitude {'DESC' if largest else 'ASC'} "
+        + "LIMIT ?",
+        parameters + [-1 if limit is None else limit],
+    ).fetchall()
+    return count, rows
+
+
+def make_query_report(count: int, coefficients: List[Tuple[str, str, float]]) -> str:
+    report = f"{count} matching coefficients"
+    if count > len(coefficients):
+        report += f", showing {len(coefficients)}"
+    if coefficients:
+        report += "\n\n" + tabulate(
+            [(row, column, repr(value)) for row, column, value in coefficients],
+            headers=["Row", "Column", "Value"],
+            tablefmt="github",
+            disable_numparse=True,
+        )
+    return report
+
+
+def run_sql(connection: sqlite3.Connection, sql: str, limit=None) -> str:
+    """Returns the result of an SQL query on the index as a table (of at most limit rows)."""
+    cursor = connection.execute(sql)
+    rows = cursor.fetchmany(limit + 1) if limit is not None else cursor.fetchall()
+    table = tabulate(
+        rows[:limit],
+        headers=[description[0] for description in cursor.description or ()],
+        tablefmt="github",
+        disable_numparse=True,
+    )
+    if limit is not None and len(rows) > limit:
+        table += f"\n\nOnly the first {limit} rows are shown"
+    return table
@@ -0,0 +1,294 @@
+"""
+Provides get_density_stats() which finds the dense rows and columns of a model.
+
+Dense columns (and, to a lesser extent, dense rows) make the normal equations of barrier
+solvers dense, so the rows and columns with more non-zeroes than a threshold are flagged.
+The number of non-zeroes of every row and column (without the objective) is counted once
+into arrays, from which the densest ones are selected with a partial sort (argpartition)
+and the density of each family is aggregated with grouped reductions.
+"""
+import collections
+import itertools
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .analyze import TableRow, make_table
+from .core import LPModel, NameTable, SparseLPModel
+from .util import timed
+from .vectorized import as_numpy
+
+DEFAULT_TOP_N = 10
+# Unless a threshold is given, rows (or columns) with more than DENSE_RATIO times
+# their average number of non-zeroes, and at least MIN_DENSE, are dense
+DENSE_RATIO = 10
+MIN_DENSE = 100
+
+
+def count_nonzeros(model) -> Tuple[np.ndarray, np.ndarray, List[str], NameTable]:
+    """
+    Returns the number of entries (including explicit zeroes) of each row and column
+    without the objective, whose row count is 0, and the names and name table of the
+    columns. The model isn't modified: the columns of an LPModel that were added to its
+    rows without add_column() follow the others.
+    """
+    if isinstance(model, SparseLPModel):
+        row_ids = as_numpy(model.row_indices)
+        col_counts = np.diff(as_numpy(model.col_starts))
+        row_counts = np.bincount(row_ids, minlength=model.num_rows)
+        if model.objective is not None:
+            in_objective = np.flatnonzero(row_ids == model.objective)
+            objective_cols = (
+                np.searchsorted(as_numpy(model.col_starts), in_objective, side="right")
+                - 1
+            )
+            col_counts -= np.bincount(objective_cols, minlength=model.num_cols)
+            row_counts[model.objective] = 0
+        return row_counts, col_counts, model.col_names, model.col_table
+
+    rows = [row for row in model.rows.values() if not row.is_objective]
+    # Counts the names of the columns of every row in a single C loop
+    names = collections.Counter(
+        itertools.chain.from_iterable(row.coefficients.keys() for row in rows)
+    )
+    col_ids, col_names, col_table = model.col_ids, list(model.col_ids), model.col_table
+    missing = [name for name in names if name not in col_ids]
+    if missing:
+        col_ids = dict(col_ids)
+        col_ids.update(
+            zip(missing, range(len(col_names), len(col_names) + len(missing)))
+        )
+        col_names += missing
+        col_table = NameTable()
+        col_table.extend(col_names)
+    col_counts = np.zeros(len(col_names), dtype=np.int64)
+    col_counts[[col_ids[name] for name in names]] = list(names.values())
+    row_counts = np.fromiter(
+        (
+            0 if row.is_objective else len(row.coefficients)
+            for row in model.rows.values()
+        ),
+        dtype=np.int64,
+        count=model.num_rows,
+    )
+    return row_counts, col_counts, col_names, col_table
+
+
+def default_threshold(counts: np.ndarray) -> int:
+    nonempty = counts[counts > 0]
+    average = nonempty.mean() if len(nonempty) else 0
+    return max(MIN_DENSE, int(DENSE_RATIO * average))
+
+
+def densest(counts: np.ndarray, n) -> np.ndarray:
+    """Returns the ids of the n largest counts (decreasing, ties by id) without sorting all."""
+    n = min(n, len(counts))
+    if n == 0:
+        return np.empty(0, dtype=np.int64)
+    kth = -np.partition(-counts, n - 1)[n - 1]
+    # The counts above the n-th one, then the ties with it of the smallest ids
+    above = np.flatnonzero(counts > kth)
+    candidates = np.concatenate(
+        [above, np.flatnonzero(counts == kth)[: n - len(above)]]
+    )
+    order = np.lexsort((candidates, -counts[candidates]))
+    return candidates[order]
+
+
+class FamilyDensity(TableRow):
+    """A row of the table of the number of non-zeroes of the rows (or columns) of each family."""
+
+    def __init__(self, kind, name, count, total, max_count, densest_name, num_dense):
+        self.kind, self.name = kind, name
+        self.count, self.total, self.max_count = count, total, max_count
+        self.densest_name, self.num_dense = densest_name, num_dense
+
+    def get_table_row(self):
+        return [
+            self.kind,
+            self.name,
+            self.count,
+            f"{self.total / self.count:.1f}",
+            self.max_count,
+            self.densest_name,
+            self.num_dense,
+        ]
+
+    def get_sort_key(self):
+        return self.max_count
+
+    @staticmethod
+    def get_table_header():
+        return [
+            "Kind",
+            "Family",
+            "Count",
+            "Avg non-zeroes",
+            "Max non-zeroes",
+            "Densest",
+            "Dense",
+        ]
+
+    def to_dict(self):
+        return {
+            "kind": self.kind,
+            "family": self.name,
+            "count": self.count,
+            "nonzeros": self.total,
+            "max_nonzeros": self.max_count,
+            "densest": self.densest_name,
+            "dense": self.num_dense,
+        }
+
+
+class DenseEntry(TableRow):
+    """A row of the table of the densest rows and columns."""
+
+    def __init__(self, kind, name, count, is_dense):
+        self.kind, self.name, self.count, self.is_dense = kind, name, count, is_dense
+
+    def get_table_row(self):
+        return [self.kind, self.name, self.count, "yes" if self.is_dense else ""]
+
+    def get_sort_key(self):
+        return self.count
+
+    @staticmethod
+    def get_table_header():
+        return ["Kind", "Name", "Non-zeroes", "Dense"]
+
+    def to_dict(self):
+        return {
+            "kind": self.kind,
+            "name": self.name,
+            "nonzeros": self.count,
+            "dense": self.is_dense,
+        }
+
+
+def family_density(
+    kind, table: NameTable, counts: np.ndarray, ids: np.ndarray, threshold, names
+) -> List[FamilyDensity]:
+    """Aggregates the counts of the rows (or columns) ids by family."""
+    families = as_numpy(table.name_families)[ids]
+    counts = counts[ids]
+    num_families = len(table.families)
+    num_names = np.bincount(families, minlength=num_families)
+    totals = np.bincount(families, weights=counts, minlength=num_families)
+    num_dense = np.bincount(families[counts > threshold], minlength=num_families)
+    # The first of each family once sorted by family then decreasing count is its densest
+    order = np.lexsort((-counts, families))
+    firsts = order[np.flatnonzero(np.r_[True, np.diff(families[order]) != 0])]
+    return [
+        FamilyDensity(
+            kind,
+            table.families[family],
+            int(num_names[family]),
+            int(totals[family]),
+            int(counts[first]),
+            names[ids[first]],
+            int(num_dense[family]),
+        )
+        for family, first in zip(families[firsts].tolist(), firsts.tolist())
+    ]
+
+
+class DensityStats:
+    """The densest rows and columns of a model and the density of each family."""
+
+    def __init__(
+        self,
+        row_threshold: int,
+        col_threshold: int,
+        num_dense_rows: int,
+        num_dense_cols: int,
+        families: List[FamilyDensity],
+        densest: List[DenseEntry],
+    ):
+        self.row_threshold, self.col_threshold = row_threshold, col_threshold
+        self.num_dense_rows, self.num_dense_cols = num_dense_rows, num_dense_cols
+        self.families = families
+        self.densest = densest
+
+    def report(self) -> str:
+        report = (
+            f"Dense columns (more than {self.col_threshold} non-zeroes): "
+            + f"{self.num_dense_cols}\n"
+            + f"Dense rows (more than {self.row_threshold} non-zeroes): "
+            + f"{self.num_dense_rows}"
+        )
+        if self.families:
+            report += "\n\n" + make_table(self.families)
+        if self.densest:
+            report += "\n\n" + make_table(self.densest)
+        return report
+
+    def to_dict(self):
+        return {
+            "row_threshold": self.row_threshold,
+            "col_threshold": self.col_threshold,
+            "dense_rows": self.num_dense_rows,
+            "dense_cols": self.num_dense_cols,
+            "families": [family.to_dict() for family in self.families],
+            "densest": [entry.to_dict() for entry in self.densest],
+        }
+
+
+def get_density_stats(
+    model,
+    top_n=DEFAULT_TOP_N,
+    row_threshold: Optional[int] = None,
+    col_threshold: Optional[int] = None,
+) -> DensityStats:
+    """
+    Counts the non-zeroes of every row and column of an LPModel or a SparseLPModel.
+
+    :param top_n: number of densest columns and of densest rows listed
+    :param row_threshold: rows with more non-zeroes are dense
+        (default: DENSE_RATIO times the average, at least MIN_DENSE)
+    :param col_threshold: columns with more non-zeroes are dense (default: like rows)
+    """
+    with timed("Finding dense rows and columns"):
+        row_counts, col_counts, col_names, col_table = count_nonzeros(model)
+        if isinstance(model, LPModel):
+            row_names = list(model.rows)
+            objective = next(
+                (i for i, row in enumerate(model.rows.values()) if row.is_objective),
+                None,
+            )
+        else:
+            row_names = model.row_names
+            objective = model.objective
+        if row_threshold is None:
+            row_threshold = default_threshold(row_counts)
+        if col_threshold is None:
+            col_threshold = default_threshold(col_counts)
+
+        # The columns in the matrix and every row but the objective, like the statistics
+        cols = np.flatnonzero(col_counts)
+        is_row = np.ones(len(row_counts), dtype=bool)
+        if objective is not None:
+            is_row[objective] = False
+        rows = np.flatnonzero(is_row)
+
+        families = family_density(
+            "Variable", col_table, col_counts, cols, col_threshold, col_names
+        ) + family_density(
+            "Constraint", model.row_table, row_counts, rows, row_threshold, row_names
+        )
+        densest_entries = [
+            DenseEntry(kind, names[i], int(counts[i]), bool(counts[i] > threshold))
+            for kind, names, counts, ids, threshold in (
+                ("Variable", col_names, col_counts, cols, col_threshold),
+                ("Constraint", row_names, row_counts, rows, row_threshold),
+            )
+            for i in ids[densest(counts[ids], top_n)].tolist()
+        ]
+        return DensityStats(
+            row_threshold,
+            col_threshold,
+            int(np.count_nonzero(row_counts > row_threshold)),
+            int(np.count_nonzero(col_counts > col_threshold)),
+            families,
+            densest_entries,
+        )
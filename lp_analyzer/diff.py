@@ -0,0 +1,389 @@
+"""
+Provides diff_models() which compares two models (e.g. before and after rescaling a module):
+the statistics of each family of variables and constraints and, optionally, the individual
+entries (non-zeroes, RHS values and bounds) that were added, removed or changed.
+
+The models are read one after the other. Of the first model, only its statistics and
+(for the entry diff) a compact copy of its entries are kept while the second is read:
+the entries are keyed by integer ids shared by both models, sorted, then joined with NumPy.
+This takes 16 bytes per entry of each model rather than two LPModels.
+"""
+import math
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from tabulate import tabulate
+
+from .analyze import ConstraintStat, TableRow, VariableStat, get_stats, make_table
+from .core import NameTable, SparseLPModel
+from .vectorized import as_numpy, nonzero_col_ids
+
+# The statistics that are compared, with the names of the columns of the diff table
+COMPARED_STATS = (
+    "Count",
+    "Min coef",
+    "Max coef",
+    "Coef range",
+    "Min RHS/bound",
+    "Max RHS/bound",
+)
+
+
+def _coef_range(min_coef, max_coef) -> Optional[float]:
+    if 0 < min_coef <= max_coef < float("inf"):
+        return math.log10(max_coef) - math.log10(min_coef)
+    return None
+
+
+def family_values(stat) -> Dict[str, Optional[float]]:
+    """Returns the compared statistics of a VariableStat or ConstraintStat."""
+    if isinstance(stat, VariableStat):
+        count = len(stat.indexes)
+        min_other, max_other = stat.min_bound, stat.max_bound
+    else:
+        count = stat.num_rows
+        min_other, max_other = stat.min_rhs, stat.max_rhs
+    values = (
+        count,
+        stat.min_coef,
+        stat.max_coef,
+        _coef_range(stat.min_coef, stat.max_coef),
+        min_other,
+        max_other,
+    )
+    result = dict(zip(COMPARED_STATS, values))
+    # Unset minimums are infinite and unset maximums are 0
+    for name in ("Min coef", "Max coef", "Min RHS/bound", "Max RHS/bound"):
+        if result[name] in (float("inf"), 0):
+            result[name] = None
+    return result
+
+
+def _format_value(name: str, value) -> str:
+    if value is None:
+        return ""
+    if name == "Count":
+        return str(value)
+    if name == "Coef range":
+        return f"{value:.1f}"
+    return f"{value:.1e}"
+
+
+class FamilyDiff(TableRow):
+    """A row of the diff table: the statistics of a family before and after."""
+
+    def __init__(self, kind: str, name: str, before, after):
+        self.kind, self.name = kind, name
+        self.before = None if before is None else family_values(before)
+        self.after = None if after is None else family_values(after)
+
+    @property
+    def change(self) -> Optional[str]:
+        if self.before is None:
+            return "added"
+        if self.after is None:
+            return "removed"
+        if self.before != self.after:
+            return "changed"
+        return None
+
+    def get_table_row(self):
+        row = [self.kind, self.name, self.change]
+        for name in COMPARED_STATS:
+            before = after = ""
+            if self.before is not None:
+                before = _format_value(name, self.before[name])
+            if self.after is not None:
+                after = _format_value(name, self.after[name])
+            if self.before is None:
+                row.append(after)
+            elif self.after is None or before != after:
+                row.append(f"{before} -> {after}")
+            else:
+                row.append(before)
+        return row
+
+    def get_formatted_table_row(self):
+        return self.get_table_row()
+
+    def get_sort_key(self):
+        """Families whose coefficient range grew the most come first."""
+        before = (self.before or {}).get("Coef range") or 0
+        after = (self.after or {}).get("Coef range") or 0
+        return after - before
+
+    @staticmethod
+    def get_table_header():
+        return ["Kind", "Family", "Change", *COMPARED_STATS]
+
+
+def diff_stats(
+    before: Tuple[List[VariableStat], List[ConstraintStat]],
+    after: Tuple[List[VariableStat], List[ConstraintStat]],
+) -> List[FamilyDiff]:
+    """Returns the families that were added, removed or whose statistics changed."""
+    diffs = []
+    for kind, before_stats, after_stats in (
+        ("Variable", before[0], after[0]),
+        ("Constraint", before[1], after[1]),
+    ):
+        before_by_name = {stat.name: stat for stat in before_stats}
+        after_by_name = {stat.name: stat for stat in after_stats}
+        for name in list(dict.fromkeys([*before_by_name, *after_by_name])):
+            diff = FamilyDiff(
+                kind, name, before_by_name.get(name), after_by_name.get(name)
+            )
+            if diff.change is not None:
+                diffs.append(diff)
+    return diffs
+
+
+class SharedNames:
+    """Integer ids of the row (or column) names shared by the compared models."""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.names: List[str] = []
+        self.table = NameTable()  # Families of the names, by id
+
+    def get_ids(self, names: List[str]) -> np.ndarray:
+        ids = self.ids
+        first_new = len(self.names)
+        result = []
+        for name in names:
+            name_id = ids.get(name)
+            if name_id is None:
+                name_id = ids[name] = len(self.names)
+                self.names.append(name)
+            result.append(name_id)
+        self.table.extend(self.names[first_new:])
+        return np.array(result, dtype=np.int64)
+
+
+# Kinds of entries, the key of an entry is (row id << 32) | column id
+ENTRY_KINDS = ("Coefficient", "RHS", "Lower bound", "Upper bound")
+
+
+class ModelEntries:
+    """The entries of a model sorted by their key (see ENTRY_KINDS)."""
+
+    def __init__(self, model: SparseLPModel, rows: SharedNames, cols: SharedNames):
+        row_ids = rows.get_ids(model.row_names)
+        col_ids = cols.get_ids(model.col_names)
+        self.entries: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+        keys = (row_ids[as_numpy(model.row_indices)] << 32) | col_ids[
+            nonzero_col_ids(model)
+        ]
+        self._add("Coefficient", keys, as_numpy(model.values))
+        # A missing RHS is 0, the objective has none (NaN)
+        rhs = as_numpy(model.rhs)
+        has_rhs = ~np.isnan(rhs) & (rhs != 0)
+        self._add("RHS", row_ids[has_rhs] << 32, rhs[has_rhs])
+        # A missing lower bound is 0 (like in .mps files)
+        lower = as_numpy(model.lower)
+        is_set = ~np.isnan(lower) & (lower != 0)
+        self._add("Lower bound", col_ids[is_set], lower[is_set])
+        upper = as_numpy(model.upper)
+        is_set = ~np.isnan(upper)
+        self._add("Upper bound", col_ids[is_set], upper[is_set])
+
+    def _add(self, kind: str, keys: np.ndarray, values: np.ndarray):
+        # Sorts by key. If an entry is repeated, its last value is kept like in LPModel.
+        keys, first = np.unique(keys[::-1], return_index=True)
+        self.entries[kind] = (keys, np.ascontiguousarray(values[::-1][first]))
+
+
+class EntryDiff:
+    """The entries of one kind that were added, removed or changed."""
+
+    def __init__(self, kind: str, before: ModelEntries, after: ModelEntries, rtol=0.0):
+        self.kind = kind
+        before_keys, before_values = before.entries[kind]
+        after_keys, after_values = after.entries[kind]
+        _, before_common, after_common = np.intersect1d(
+            before_keys, after_keys, assume_unique=True, return_indices=True
+        )
+        is_removed = np.ones(len(before_keys), dtype=bool)
+        is_removed[before_common] = False
+        is_added = np.ones(len(after_keys), dtype=bool)
+        is_added[after_common] = False
+        is_changed = ~np.isclose(
+            before_values[before_common], after_values[after_common], rtol=rtol, atol=0
+        )
+
+        self.removed_keys = before_keys[is_removed]
+        self.removed_values = before_values[is_removed]
+        self.added_keys = after_keys[is_added]
+        self.added_values = after_values[is_added]
+        self.changed_keys = before_keys[before_common[is_changed]]
+        self.changed_before = before_values[before_common[is_changed]]
+        self.changed_after = after_values[after_common[is_changed]]
+
+    def __len__(self):
+        return len(self.removed_keys) + len(self.added_keys) + len(self.changed_keys)
+
+
+class ModelDiff:
+    """The result of diff_models()."""
+
+    def __init__(self, families: List[FamilyDiff], num_families: int):
+        self.families = families
+        self.num_families = num_families  # In either model
+        self.entries: Optional[List[EntryDiff]] = None
+        self.rows: Optional[SharedNames] = None
+        self.cols: Optional[SharedNames] = None
+
+    def _name(self, kind: str, key: int) -> Tuple[str, str]:
+        if kind in ("Lower bound", "Upper bound"):
+            return "", self.cols.names[key]
+        row = self.rows.names[key >> 32]
+        return row, "" if kind == "RHS" else self.cols.names[key & 0xFFFFFFFF]
+
+    def _families(self, kind: str, keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the row and column family ids of the entries (-1 if there is none)."""
+        none = np.full(len(keys), -1, dtype=np.int64)
+        col_families = as_numpy(self.cols.table.name_families)
+        if kind in ("Lower bound", "Upper bound"):
+            return none, col_families[keys]
+        row_families = as_numpy(self.rows.table.name_families)[keys >> 32]
+        if kind == "RHS":
+            return row_families, none
+        return row_families, col_families[keys & 0xFFFFFFFF]
+
+    def entry_summary(self) -> str:
+        """Returns a table of the number of entries added, removed and changed by family."""
+        counts: Dict[Tuple[str, str, str], List[int]] = {}
+        for diff in self.entries:
+            for i, keys in enumerate(
+                (diff.added_keys, diff.removed_keys, diff.changed_keys)
+            ):
+                row_families, col_families = self._families(diff.kind, keys)
+                pairs, pair_counts = np.unique(
+                    np.column_stack((row_families, col_families)),
+                    axis=0,
+                    return_counts=True,
+                )
+                for (row_family, col_family), count in zip(
+                    pairs.tolist(), pair_counts.tolist()
+                ):
+                    key = (
+                        diff.kind,
+                        "" if row_family < 0 else self.rows.table.families[row_family],
+                        "" if col_family < 0 else self.cols.table.families[col_family],
+                    )
+                    counts.setdefault(key, [0, 0, 0])[i] += count
+        rows = sorted(
+            ([*key, *count] for key, count in counts.items()),
+            key=lambda row: sum(row[3:]),
+            reverse=True,
+        )
+        return tabulate(
+            rows,
+            headers=[
+                "Entry",
+                "Row family",
+                "Column family",
+                "Added",
+                "Removed",
+                "Changed",
+            ],
+            tablefmt="github",
+            disable_numparse=True,
+        )
+
+    def entry_examples(self, max_examples=20) -> str:
+        """Returns a table of the entries that changed the most, then of the added and removed entries."""
+        examples = []
+        for diff in self.entries:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                ratio = np.abs(
+                    np.log10(np.abs(diff.changed_after / diff.changed_before))
+                )
+            # A change of sign is the largest change
+            ratio[np.sign(diff.changed_after) != np.sign(diff.changed_before)] = np.inf
+            for i in np.argsort(-ratio, kind="stable")[:max_examples].tolist():
+                examples.append(
+                    (
+                        ratio[i],
+                        diff.kind,
+                        *self._name(diff.kind, int(diff.changed_keys[i])),
+                        f"{diff.changed_before[i]:.6g}",
+                        f"{diff.changed_after[i]:.6g}",
+                    )
+                )
+        examples.sort(key=lambda example: example[0], reverse=True)
+        rows = [example[1:] for example in examples[:max_examples]]
+        for diff in self.entries:
+            for keys, values, is_added in (
+                (diff.added_keys, diff.added_values, True),
+                (diff.removed_keys, diff.removed_values, False),
+            ):
+                for key, value in zip(
+                    keys[:max_examples].tolist(), values[:max_examples].tolist()
+                ):
+                    value = f"{value:.6g}"
+                    rows.append(
+                        (
+                            diff.kind,
+                            *self._name(diff.kind, key),
+                            "" if is_added else value,
+                            value if is_added else "",
+                        )
+                    )
+        return tabulate(
+            rows,
+            headers=["Entry", "Row", "Column", "Before", "After"],
+            tablefmt="github",
+            disable_numparse=True,
+        )
+
+    def report(self, max_examples=20) -> str:
+        report = (
+            f"{len(self.families)} of {self.num_families} families were added, "
+            "removed or have different statistics.\n\n"
+        )
+        if self.families:
+            report += make_table(self.families) + "\n"
+        if self.entries is not None:
+            counts = ", ".join(f"{diff.kind}: {len(diff)}" for diff in self.entries)
+            report += f"\nEntries added, removed or changed. {counts}.\n"
+            if any(len(diff) for diff in self.entries):
+                report += "\n" + self.entry_summary() + "\n\n"
+                report += self.entry_examples(max_examples) + "\n"
+        return report
+
+
+def diff_models(read_before, read_after, entries=False, rtol=0.0) -> ModelDiff:
+    """
+    Compares two models. read_before and read_after are functions that read each model
+    (e.g. with read_model()) such that they're read one after the other.
+
+    :param entries: if True, also compares the individual entries of the models
+        (which requires a SparseLPModel)
+    :param rtol: relative tolerance under which the values of entries are considered equal
+    """
+    rows, cols = SharedNames(), SharedNames()
+    stats = []
+    model_entries = []
+    for read in (read_before, read_after):
+        model = read()
+        stats.append(get_stats(model))
+        if entries:
+            if not isinstance(model, SparseLPModel):
+                model = SparseLPModel.from_lp_model(model)
+            model_entries.append(ModelEntries(model, rows, cols))
+        del model  # Free the model before reading the next one
+
+    families = diff_stats(*stats)
+    num_families = len(
+        {("Variable", stat.name) for stat in stats[0][0] + stats[1][0]}
+        | {("Constraint", stat.name) for stat in stats[0][1] + stats[1][1]}
+    )
+    result = ModelDiff(families, num_families)
+    if entries:
+        result.entries = [
+            EntryDiff(kind, *model_entries, rtol=rtol) for kind in ENTRY_KINDS
+        ]
+        result.rows, result.cols = rows, cols
+    return result
@@ -0,0 +1,242 @@
+"""
+Provides get_drilldown() which breaks down the coefficient range of each family by the
+components of its indexes, e.g. to find that the extreme coefficients of 'GenCapacity(zone,period)'
+are all in period 2050.
+
+Indexes are split on commas once per distinct index (see NameTable) into a matrix of integer
+component ids with a column per position. The minimum, maximum and number of the non-zeroes
+(without the objective) of every row and column are reduced first, then grouped by
+(family, component) for each position with grouped reductions, such that the passes over the
+non-zeroes don't depend on the number of positions.
+"""
+import itertools
+import json
+import math
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .analyze import TableRow, make_table
+from .core import LPModel, NameTable, SparseLPModel
+from .util import timed
+from .vectorized import as_numpy, nonzero_col_ids, segments
+
+# Number of components listed for each position of the index of a family
+DEFAULT_TOP_VALUES = 5
+
+
+def split_indexes(table: NameTable) -> Tuple[np.ndarray, List[str]]:
+    """
+    Returns the ids of the components of every index of the table, as a matrix with a row per
+    index id and a column per position (-1 past the last component), and the components
+    sorted such that their ids are in the order of their strings.
+    """
+    split = [index.split(",") if index else [] for index in table.indexes]
+    lengths = np.fromiter(map(len, split), dtype=np.int64, count=len(split))
+    parts = np.array(list(itertools.chain.from_iterable(split)), dtype=str)
+    components, component_ids = np.unique(parts, return_inverse=True)
+    ids = np.full((len(split), lengths.max(initial=0)), -1, dtype=np.int64)
+    starts = np.cumsum(lengths) - lengths
+    positions = np.arange(len(parts)) - np.repeat(starts, lengths)
+    ids[np.repeat(np.arange(len(split)), lengths), positions] = component_ids
+    return ids, components.tolist()
+
+
+def name_extremes(
+    name_ids: np.ndarray, values: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Returns the names with values and, for each, the number of values, their minimum and
+    their maximum.
+    """
+    order = np.argsort(name_ids, kind="stable")
+    starts, names = segments(name_ids[order])
+    if len(order) == 0:
+        empty = np.empty(0)
+        return names, empty.astype(np.int64), empty, empty
+    values = values[order]
+    counts = np.diff(np.r_[starts, len(order)])
+    return (
+        names,
+        counts,
+        np.minimum.reduceat(values, starts),
+        np.maximum.reduceat(values, starts),
+    )
+
+
+class ComponentStat(TableRow):
+    """A row of the drilldown table: the coefficients of a family at one value of a position."""
+
+    def __init__(self, kind, family, position, component, count, min_coef, max_coef):
+        self.kind, self.family = kind, family
+        # 1 for the first component of the indexes
+        self.position, self.component = position, component
+        self.count, self.min_coef, self.max_coef = count, min_coef, max_coef
+
+    @property
+    def coef_range(self) -> float:
+        return math.log10(self.max_coef) - math.log10(self.min_coef)
+
+    def get_table_row(self):
+        return [
+            self.kind,
+            self.family,
+            self.position,
+            self.component,
+            self.count,
+            self.min_coef,
+            self.max_coef,
+            int(self.coef_range),
+        ]
+
+    def get_sort_key(self):
+        return self.coef_range
+
+    @staticmethod
+    def get_table_header():
+        return [
+            "Kind",
+            "Family",
+            "Position",
+            "Value",
+            "Non-zeroes",
+            "Min coef",
+            "Max coef",
+            "Coef range",
+        ]
+
+    def to_dict(self):
+        return {
+            "kind": self.kind,
+            "family": self.family,
+            "position": self.position,
+            "value": self.component,
+            "nonzeros": self.count,
+            "min_coef": self.min_coef,
+            "max_coef": self.max_coef,
+        }
+
+
+class Drilldown:
+    """The coefficient range of each family at each value of each position of its indexes."""
+
+    def __init__(self, stats: List[ComponentStat], top_n: int):
+        self.stats = stats
+        self.top_n = top_n
+
+    def report(self) -> str:
+        report = (
+            "Coefficient range of each family by index value\n\n"
+            + f"For each position of the indexes of a family, the {self.top_n} values "
+            + "with the widest range are listed.\n"
+            + "Positions where every index of the family has the same value are skipped."
+        )
+        if self.stats:
+            report += "\n\n" + make_table(self.stats)
+        else:
+            report += "\n\nNo index position has several values."
+        return report
+
+    def to_dict(self):
+        return {"top_n": self.top_n, "values": [stat.to_dict() for stat in self.stats]}
+
+    def save(self, output_file: str, json_file: Optional[str] = None):
+        """Saves the report and, optionally, the breakdown as JSON."""
+        with open(output_file, "w") as f:
+            f.write(self.report())
+        print(f"Saved drilldown to: {output_file}")
+        if json_file is not None:
+            with open(json_file, "w") as f:
+                json.dump(self.to_dict(), f, indent=2)
+            print(f"Saved drilldown as JSON to: {json_file}")
+
+
+def family_components(
+    kind: str,
+    table: NameTable,
+    name_ids: np.ndarray,
+    values: np.ndarray,
+    top_n: int,
+    families: Optional[Sequence[str]] = None,
+) -> List[ComponentStat]:
+    """
+    Returns the ComponentStats of the top_n widest ranges at each position of each family
+    given the non-zeroes of the names name_ids (rows or columns).
+    """
+    names, counts, low, high = name_extremes(name_ids, values)
+    name_families = as_numpy(table.name_families)[names].astype(np.int64)
+    if families is not None:
+        keep = np.isin(name_families, [table.family_ids.get(f, -1) for f in families])
+        names, counts, low, high = names[keep], counts[keep], low[keep], high[keep]
+        name_families = name_families[keep]
+    ids, components = split_indexes(table)
+    name_components = ids[as_numpy(table.name_indexes)[names]]
+
+    stats = []
+    for position in range(ids.shape[1]):
+        is_set = name_components[:, position] >= 0
+        keys = (
+            name_families[is_set] * len(components) + name_components[is_set, position]
+        )
+        order = np.argsort(keys, kind="stable")
+        starts, keys = segments(keys[order])
+        if len(starts) == 0:
+            continue
+        group_counts = np.add.reduceat(counts[is_set][order], starts)
+        group_low = np.minimum.reduceat(low[is_set][order], starts)
+        group_high = np.maximum.reduceat(high[is_set][order], starts)
+        group_families, group_components = np.divmod(keys, len(components))
+        # Families with several values at this position, then the widest ranges first
+        # (ties by component, i.e. in the order of their strings)
+        family_starts, _ = segments(group_families)
+        num_values = np.diff(np.r_[family_starts, len(keys)])
+        log_range = np.log10(group_high) - np.log10(group_low)
+        order = np.lexsort((group_components, -log_range, group_families))
+        # The rank of each group in its family
+        ranks = np.arange(len(keys)) - np.repeat(family_starts, num_values)
+        selected = order[(ranks < top_n) & (np.repeat(num_values, num_values) > 1)]
+        for i in selected.tolist():
+            stats.append(
+                ComponentStat(
+                    kind,
+                    table.families[group_families[i]],
+                    position + 1,
+                    components[group_components[i]],
+                    int(group_counts[i]),
+                    float(group_low[i]),
+                    float(group_high[i]),
+                )
+            )
+    return stats
+
+
+def get_drilldown(
+    model, top_n=DEFAULT_TOP_VALUES, families: Optional[Sequence[str]] = None
+) -> Drilldown:
+    """
+    Breaks down the coefficient range (without the objective) of each family by the value of
+    each position of its indexes. An LPModel is first converted to a SparseLPModel.
+
+    :param top_n: number of values (with the widest ranges) listed per position of a family
+    :param families: only break down these families of variables and constraints
+    """
+    if isinstance(model, LPModel):
+        model = SparseLPModel.from_lp_model(model)
+
+    with timed("Breaking down the coefficient ranges by index"):
+        row_ids = as_numpy(model.row_indices)
+        col_ids = nonzero_col_ids(model)
+        values = np.abs(as_numpy(model.values))
+        keep = values != 0
+        if model.objective is not None:
+            keep &= row_ids != model.objective
+        row_ids, col_ids, values = row_ids[keep], col_ids[keep], values[keep]
+        return Drilldown(
+            family_components(
+                "Variable", model.col_table, col_ids, values, top_n, families
+            )
+            + family_components(
+                "Constraint", model.row_table, row_ids, values, top_n, families
+            ),
+            top_n,
+        )
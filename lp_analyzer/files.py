@@ -0,0 +1,146 @@
+"""
+Provides open_model_file() which opens a model file for reading
+and transparently decompresses .gz, .bz2, .xz and .zst files while streaming.
+"""
+import bz2
+import gzip
+import io
+import lzma
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from typing import BinaryIO, Callable, Iterator, Tuple, TextIO
+
+
+def _open_zstd(raw: BinaryIO) -> BinaryIO:
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError(
+            "Reading .zst files requires the zstandard package. "
+            "Run 'pip install lp-analyzer[zstd]'."
+        )
+    return zstandard.ZstdDecompressor().stream_reader(raw)
+
+
+# Mapping of file extensions to the function that wraps the raw file to decompress it.
+DECOMPRESSORS = {
+    ".gz": lambda raw: gzip.GzipFile(fileobj=raw),
+    ".bz2": bz2.BZ2File,
+    ".xz": lzma.LZMAFile,
+    ".zst": _open_zstd,
+}
+
+
+def is_compressed(filename: str) -> bool:
+    return os.path.splitext(filename)[1].lower() in DECOMPRESSORS
+
+
+def is_lp_file(filename: str) -> bool:
+    """Returns True if the file is in the .lp format (e.g. 'model.lp' or 'model.lp.gz') rather than .mps."""
+    if is_compressed(filename):
+        filename = os.path.splitext(filename)[0]
+    return os.path.splitext(filename)[1].lower() == ".lp"
+
+
+def is_model_file(filename: str) -> bool:
+    """Returns True if the file is an .mps or .lp file, compressed or not."""
+    if is_compressed(filename):
+        filename = os.path.splitext(filename)[0]
+    return os.path.splitext(filename)[1].lower() in (".mps", ".lp")
+
+
+def strip_extensions(filename: str) -> str:
+    """Removes the compression (if any) and model extensions, e.g. 'model.mps.gz' -> 'model'."""
+    if is_compressed(filename):
+        filename = os.path.splitext(filename)[0]
+    return os.path.splitext(filename)[0]
+
+
+class ThreadedReader(io.RawIOBase):
+    """
+    Reads a binary file (e.g. a decompressing file) in a background thread.
+
+    Decompression releases the GIL so this lets decompression overlap with parsing.
+    At most max_blocks blocks are read ahead so memory stays bounded.
+    """
+
+    def __init__(self, file: BinaryIO, block_size=1 << 20, max_blocks=8):
+        super().__init__()
+        self._file = file
+        self._block_size = block_size
+        self._queue = queue.Queue(max_blocks)
+        self._buffer = memoryview(b"")
+        self._eof = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._read_ahead, daemon=True)
+        self._thread.start()
+
+    def _read_ahead(self):
+        try:
+            while not self._stop.is_set():
+                block = self._file.read(self._block_size)
+                self._queue.put(block)
+                if not block:
+                    return
+        except BaseException as e:
+            # Re-raised in the reading thread
+            self._queue.put(e)
+
+    def readable(self):
+        return True
+
+    def readinto(self, b) -> int:
+        if not self._buffer:
+            if self._eof:
+                return 0
+            block = self._queue.get()
+            if isinstance(block, BaseException):
+                raise block
+            if not block:
+                self._eof = True
+                return 0
+            self._buffer = memoryview(block)
+        n = min(len(b), len(self._buffer))
+        b[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        return n
+
+    def close(self):
+        if not self.closed:
+            # Unblock the background thread if it's waiting for space in the queue
+            self._stop.set()
+            while self._thread.is_alive():
+                try:
+                    self._queue.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            self._file.close()
+        super().close()
+
+
+@contextmanager
+def open_model_file(
+    filename: str, threaded_decompression=True
+) -> Iterator[Tuple[TextIO, Callable[[], int]]]:
+    """
+    Opens a model file for reading as text, decompressing it on the fly if it is compressed.
+
+    Yields the file and a function that returns how many bytes of the file on disk have been read.
+    Since this ends at os.path.getsize(filename) even for compressed files, it can be used for progress.
+    If threaded_decompression is True, compressed files are decompressed in a separate thread.
+    """
+    raw = open(filename, "rb")
+    try:
+        extension = os.path.splitext(filename)[1].lower()
+        if extension in DECOMPRESSORS:
+            binary = DECOMPRESSORS[extension](raw)
+            if threaded_decompression:
+                binary = io.BufferedReader(ThreadedReader(binary), 1 << 20)
+        else:
+            binary = raw
+        with io.TextIOWrapper(binary) as file:
+            yield file, raw.tell
+    finally:
+        raw.close()
@@ -0,0 +1,261 @@
+"""
+Provides write_switch_like_model() which writes a synthetic .mps model shaped like
+a SWITCH power system planning model (https://switch-model.org/).
+
+Models are deterministic (the same arguments always give the same file) and
+can be generated at any size, which makes them suitable for benchmarks and tests.
+Names follow the family(index) convention of Pyomo, e.g. DispatchGen(G12,345).
+
+The model has zones connected by transmission lines and generation projects in each zone
+that are built during investment periods and dispatched at every timepoint:
+
+- Gen_Capacity(g,p): GenCapacity(g,p) = sum of BuildGen(g,q) for q <= p
+- Enforce_Build_Units(g,p): BuildGen(g,p) = unit size * BuildUnits(g,p) (integer variable)
+- Max_Dispatch(g,t): DispatchGen(g,t) <= capacity factor * GenCapacity(g,period of t)
+- Max_Tx(l,t): DispatchTx(l,t) <= TxCapacity(l)
+- Zone_Energy_Balance(z,t): generation + imports * efficiency - exports = demand
+"""
+from typing import List, Tuple
+
+import numpy as np
+
+from .util import print_progress
+
+PROJECTS_PER_ZONE = 8
+LINES_PER_ZONE = 2
+NUM_PERIODS = 4
+# Fraction of the projects that are built in discrete units (integer variables)
+DISCRETE_FRACTION = 0.25
+OBJECTIVE = "Minimize_System_Cost"
+
+
+class ModelShape:
+    """The number of zones, projects, lines, periods and timepoints of a generated model."""
+
+    def __init__(self, num_zones: int, num_timepoints: int):
+        self.num_zones = num_zones
+        self.num_projects = num_zones * PROJECTS_PER_ZONE
+        self.num_lines = num_zones * LINES_PER_ZONE if num_zones > 1 else 0
+        self.num_periods = NUM_PERIODS
+        self.num_timepoints = max(num_timepoints, NUM_PERIODS)
+
+    @classmethod
+    def for_nonzeros(cls, num_nonzeros: int) -> "ModelShape":
+        """Returns the shape of a model with approximately num_nonzeros non-zeroes."""
+        # Like real models, larger models have both more zones and more timepoints
+        num_zones = max(1, round(2 * (num_nonzeros / 1e4) ** 0.25))
+        shape = cls(num_zones, 1)
+        num_timepoints = (
+            num_nonzeros - shape.fixed_nonzeros()
+        ) / shape.nonzeros_per_timepoint()
+        return cls(num_zones, round(num_timepoints))
+
+    def nonzeros_per_timepoint(self) -> int:
+        # DispatchGen: objective, Max_Dispatch and Zone_Energy_Balance
+        # GenCapacity: Max_Dispatch
+        # DispatchTx: objective, Max_Tx and both Zone_Energy_Balance, TxCapacity: Max_Tx
+        return 4 * self.num_projects + 5 * self.num_lines
+
+    def fixed_nonzeros(self) -> int:
+        # BuildGen: objective and Gen_Capacity of the later periods,
+        # GenCapacity: objective and Gen_Capacity, TxCapacity: objective
+        builds = self.num_projects * self.num_periods * (self.num_periods + 1) // 2
+        return builds + 3 * self.num_projects * self.num_periods + self.num_lines
+
+    @property
+    def num_nonzeros(self) -> int:
+        """The approximate number of non-zeroes (discrete projects have a few more)."""
+        return (
+            self.fixed_nonzeros() + self.nonzeros_per_timepoint() * self.num_timepoints
+        )
+
+
+def _log_uniform(rng: np.random.Generator, low: float, spread: float, size):
+    """Returns values between low and low * 10 ** spread, uniformly distributed in log space."""
+    return low * 10 ** rng.uniform(0, spread, size)
+
+
+def _format(values: np.ndarray) -> List[str]:
+    return [f"{value:.6g}" for value in np.ravel(values).tolist()]
+
+
+class _ColumnWriter:
+    """Writes the COLUMNS section one column at a time, two entries per line."""
+
+    def __init__(self, file):
+        self.file = file
+        self.lines: List[str] = []
+        self.num_nonzeros = 0
+
+    def write(self, col_name: str, entries: List[Tuple[str, str]]):
+        for i in range(0, len(entries), 2):
+            line = f"    {col_name}"
+            for row_name, value in entries[i : i + 2]:
+                line += f"  {row_name}  {value}"
+            self.lines.append(line)
+        self.num_nonzeros += len(entries)
+        if len(self.lines) >= 10000:
+            self.flush()
+
+    def marker(self, marker_type: str):
+        self.lines.append(f"    MARKER  'MARKER'  '{marker_type}'")
+
+    def flush(self):
+        if self.lines:
+            self.file.write("\n".join(self.lines) + "\n")
+            self.lines = []
+
+
+def write_switch_like_model(
+    path, num_nonzeros: int = 10000, coef_spread: float = 4.0, seed: int = 0
+) -> int:
+    """
+    Writes a SWITCH-like model with approximately num_nonzeros non-zeroes to an .mps file.
+
+    :param coef_spread: the number of orders of magnitude spanned by the values of each kind
+        (costs, capacity factors, demands, etc.). Larger spreads give worse conditioned models.
+    :param seed: seed of the random values, the same arguments always give the same file
+    :return: the number of non-zeroes that were written
+    """
+    shape = ModelShape.for_nonzeros(num_nonzeros)
+    rng = np.random.default_rng(seed)
+    num_zones, num_projects = shape.num_zones, shape.num_projects
+    num_periods, num_timepoints = shape.num_periods, shape.num_timepoints
+    spread = coef_spread
+
+    periods = [str(2020 + 10 * p) for p in range(num_periods)]
+    timepoints = [str(t) for t in range(num_timepoints)]
+    # Timepoints are split evenly between the periods
+    timepoint_periods = [
+        t * num_periods // num_timepoints for t in range(num_timepoints)
+    ]
+    projects = [f"G{g}" for g in range(num_projects)]
+    project_zones = [f"Z{g // PROJECTS_PER_ZONE}" for g in range(num_projects)]
+    is_discrete = (rng.random(num_projects) < DISCRETE_FRACTION).tolist()
+    lines = [f"L{l}" for l in range(shape.num_lines)]
+    # Each zone is connected to the next one (a ring) and to one further away
+    chord = num_zones // 2 - 1 if num_zones > 3 else 0
+    line_zones = []
+    for l in range(shape.num_lines):
+        zone = l // LINES_PER_ZONE
+        to_zone = (zone + 1 + (l % LINES_PER_ZONE) * chord) % num_zones
+        line_zones.append((f"Z{zone}", f"Z{to_zone}"))
+
+    with open(path, "w") as f:
+        f.write(f"NAME          SWITCH_LIKE\nROWS\n N  {OBJECTIVE}\n")
+        for g, project in enumerate(projects):
+            for period in periods:
+                f.write(f" E  Gen_Capacity({project},{period})\n")
+                if is_discrete[g]:
+                    f.write(f" E  Enforce_Build_Units({project},{period})\n")
+        # Rows are written one timepoint at a time to bound memory on large models
+        for t in timepoints:
+            row_lines = [f" L  Max_Dispatch({project},{t})" for project in projects]
+            row_lines += [f" L  Max_Tx({line},{t})" for line in lines]
+            row_lines += [
+                f" E  Zone_Energy_Balance(Z{z},{t})" for z in range(num_zones)
+            ]
+            f.write("\n".join(row_lines) + "\n")
+
+        f.write("COLUMNS\n")
+        columns = _ColumnWriter(f)
+        project_periods = (num_projects, num_periods)
+        build_costs = _format(_log_uniform(rng, 1e4, spread, project_periods))
+        fixed_costs = _format(_log_uniform(rng, 1e2, spread, project_periods))
+        unit_sizes = _format(-_log_uniform(rng, 1, spread, num_projects))
+        for g, project in enumerate(projects):
+            for p, period in enumerate(periods):
+                # A project built in period p is available in all later periods
+                entries = [(OBJECTIVE, build_costs[g * num_periods + p])]
+                entries += [
+                    (f"Gen_Capacity({project},{later})", "-1") for later in periods[p:]
+                ]
+                if is_discrete[g]:
+                    entries.append((f"Enforce_Build_Units({project},{period})", "1"))
+                columns.write(f"BuildGen({project},{period})", entries)
+            if is_discrete[g]:
+                columns.marker("INTORG")
+                for period in periods:
+                    columns.write(
+                        f"BuildUnits({project},{period})",
+                        [(f"Enforce_Build_Units({project},{period})", unit_sizes[g])],
+                    )
+                columns.marker("INTEND")
+
+        # The capacity of a project in a period limits its dispatch at every timepoint of
+        # that period. The coefficients are the (negated) capacity factors.
+        for g, project in enumerate(projects):
+            capacity_factors = _format(
+                -_log_uniform(rng, 10**-spread, spread, num_timepoints)
+            )
+            for p, period in enumerate(periods):
+                entries = [
+                    (OBJECTIVE, fixed_costs[g * num_periods + p]),
+                    (f"Gen_Capacity({project},{period})", "1"),
+                ]
+                entries += [
+                    (f"Max_Dispatch({project},{t})", capacity_factors[i])
+                    for i, t in enumerate(timepoints)
+                    if timepoint_periods[i] == p
+                ]
+                columns.write(f"GenCapacity({project},{period})", entries)
+        tx_capacity_costs = _format(_log_uniform(rng, 1e3, spread, len(lines)))
+        for l, line in enumerate(lines):
+            entries = [(OBJECTIVE, tx_capacity_costs[l])]
+            entries += [(f"Max_Tx({line},{t})", "-1") for t in timepoints]
+            columns.write(f"TxCapacity({line})", entries)
+
+        # Dispatch decisions, one column per project (or line) and timepoint
+        timepoint_weights = _log_uniform(rng, 1, spread / 2, num_timepoints)
+        for i, t in enumerate(
+            print_progress(timepoints, "Writing model", check_progress_every=10)
+        ):
+            variable_costs = _format(
+                _log_uniform(rng, 1e-1, spread, num_projects) * timepoint_weights[i]
+            )
+            for g, project in enumerate(projects):
+                columns.write(
+                    f"DispatchGen({project},{t})",
+                    [
+                        (OBJECTIVE, variable_costs[g]),
+                        (f"Max_Dispatch({project},{t})", "1"),
+                        (f"Zone_Energy_Balance({project_zones[g]},{t})", "1"),
+                    ],
+                )
+            tx_costs = _format(
+                _log_uniform(rng, 1e-2, spread, len(lines)) * timepoint_weights[i]
+            )
+            efficiencies = _format(1 - _log_uniform(rng, 1e-3, 2, len(lines)) / 10)
+            for l, line in enumerate(lines):
+                from_zone, to_zone = line_zones[l]
+                columns.write(
+                    f"DispatchTx({line},{t})",
+                    [
+                        (OBJECTIVE, tx_costs[l]),
+                        (f"Max_Tx({line},{t})", "1"),
+                        (f"Zone_Energy_Balance({from_zone},{t})", "-1"),
+                        (f"Zone_Energy_Balance({to_zone},{t})", efficiencies[l]),
+                    ],
+                )
+        columns.flush()
+
+        f.write("RHS\n")
+        demands = _format(_log_uniform(rng, 10, spread, (num_timepoints, num_zones)))
+        for i, demand in enumerate(demands):
+            zone, t = i % num_zones, timepoints[i // num_zones]
+            f.write(f"    RHS  Zone_Energy_Balance(Z{zone},{t})  {demand}\n")
+
+        f.write("BOUNDS\n")
+        max_builds = _format(_log_uniform(rng, 10, spread, project_periods))
+        for g, project in enumerate(projects):
+            for p, period in enumerate(periods):
+                max_build = max_builds[g * num_periods + p]
+                f.write(f" UP BND  BuildGen({project},{period})  {max_build}\n")
+        existing_tx = _format(_log_uniform(rng, 10, spread, len(lines)))
+        for l, line in enumerate(lines):
+            # Some lines can't be expanded
+            bound_type = "FX" if l % 3 == 0 else "LO"
+            f.write(f" {bound_type} BND  TxCapacity({line})  {existing_tx[l]}\n")
+        f.write("ENDATA\n")
+
+    return columns.num_nonzeros
@@ -0,0 +1,260 @@
+"""
+Instrumentation of the phases of an analysis: reading the model, each analysis pass
+and rendering the report.
+
+Phases are timed and can record counts (e.g. of the rows, columns and non-zeroes processed)
+from which the throughput is derived. Listeners registered with add_listener() are notified
+when phases start, make progress and end. This is how progress is printed (ConsoleListener,
+registered by default) and how metrics are collected (MetricsCollector, e.g. for --metrics-json).
+
+When no listener wants progress updates (e.g. stdout is not a terminal),
+print_progress() doesn't check the progress at all.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+
+def get_rss() -> int:
+    """Returns the resident set size of the process in bytes."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        # Not Linux, fall back to the peak of the whole process
+        import resource
+
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+class PeakMemory:
+    """Context manager that samples the resident set size in a thread to find its peak."""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.start = self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while True:
+            self.peak = max(self.peak, get_rss())
+            if self._stop.wait(self.interval):
+                return
+
+    def __enter__(self):
+        self.start = self.peak = get_rss()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, get_rss())
+
+
+class Phase:
+    """
+    A timed phase of the analysis.
+
+    :param name: identifies the phase, e.g. 'read' or 'variable_stats'
+    :param message: if set, the message printed while the phase runs (e.g. 'Analyzing constraints')
+    :param parent: the phase that was running when this one started, if any
+    """
+
+    def __init__(self, name: str, message: Optional[str], parent: Optional["Phase"]):
+        self.name = name
+        self.message = message
+        self.parent = parent
+        self.counts: Dict[str, int] = {}
+        self.start_time = time.perf_counter()
+        self.end_time: Optional[float] = None
+        self.peak_rss: Optional[
+            int
+        ] = None  # In bytes, only if a listener samples memory
+
+    def count(self, **counts: int):
+        """Records counts for the phase, e.g. phase.count(rows=10, nonzeros=100)."""
+        self.counts.update(counts)
+
+    @property
+    def seconds(self) -> float:
+        end_time = time.perf_counter() if self.end_time is None else self.end_time
+        return end_time - self.start_time
+
+    @property
+    def path(self) -> str:
+        """The names of the parent phases and of this phase, e.g. 'read/Loading model from file'."""
+        return self.name if self.parent is None else f"{self.parent.path}/{self.name}"
+
+    @property
+    def nonzeros_per_second(self) -> Optional[float]:
+        if "nonzeros" not in self.counts or self.seconds <= 0:
+            return None
+        return self.counts["nonzeros"] / self.seconds
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "path": self.path,
+            "seconds": self.seconds,
+            "counts": self.counts,
+            "nonzeros_per_second": self.nonzeros_per_second,
+            "peak_rss_mb": None if self.peak_rss is None else self.peak_rss / 2**20,
+        }
+
+
+class Listener:
+    """Base class of the objects notified of the phases. Override the methods of interest."""
+
+    # Whether the listener wants progress() to be called
+    wants_progress = False
+    # Whether the peak memory of each phase should be sampled (uses a thread per phase)
+    samples_memory = False
+
+    def phase_started(self, phase: Phase):
+        pass
+
+    def progress(self, phase: Phase, fraction: float):
+        pass
+
+    def phase_ended(self, phase: Phase):
+        pass
+
+
+class ConsoleListener(Listener):
+    """
+    Prints the progress and duration of the phases that have a message.
+    Progress is only printed when stdout is a terminal since it's overwritten with '\\r'.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream
+
+    @property
+    def _stream(self):
+        # Looked up on every print such that redirecting sys.stdout works
+        return sys.stdout if self.stream is None else self.stream
+
+    @property
+    def wants_progress(self) -> bool:
+        isatty = getattr(self._stream, "isatty", None)
+        return bool(isatty and isatty())
+
+    def phase_started(self, phase: Phase):
+        if phase.message is not None and self.wants_progress:
+            print(f"{phase.message}...", end="\r", file=self._stream)
+
+    def progress(self, phase: Phase, fraction: float):
+        if phase.message is not None:
+            print(f"{phase.message} {fraction:.1%}...", end="\r", file=self._stream)
+
+    def phase_ended(self, phase: Phase):
+        if phase.message is not None:
+            print(f"{phase.message}. Done in {phase.seconds:.1f} s", file=self._stream)
+
+
+class MetricsCollector(Listener):
+    """Collects the metrics of every phase that ends, e.g. to save them as JSON."""
+
+    samples_memory = True
+
+    def __init__(self):
+        self.phases: List[Phase] = []
+        self._start_time = time.perf_counter()
+
+    def phase_ended(self, phase: Phase):
+        self.phases.append(phase)
+
+    def to_dict(self) -> dict:
+        return {
+            "total_seconds": time.perf_counter() - self._start_time,
+            "peak_rss_mb": max(
+                (p.peak_rss for p in self.phases if p.peak_rss is not None), default=0
+            )
+            / 2**20,
+            "phases": [phase.to_dict() for phase in self.phases],
+        }
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+_listeners: List[Listener] = [ConsoleListener()]
+# The innermost phase of each thread (the server answers requests on several threads)
+_current = threading.local()
+
+
+def add_listener(listener: Listener):
+    _listeners.append(listener)
+
+
+def remove_listener(listener: Listener):
+    _listeners.remove(listener)
+
+
+@contextmanager
+def listening(listener: Listener) -> Iterator[Listener]:
+    """Context manager that adds the listener then removes it."""
+    add_listener(listener)
+    try:
+        yield listener
+    finally:
+        remove_listener(listener)
+
+
+def model_counts(model) -> Dict[str, int]:
+    """Returns the counts of rows, columns and non-zeroes of a model (LPModel or SparseLPModel)."""
+    return {
+        "rows": model.num_rows,
+        "columns": model.num_cols,
+        "nonzeros": model.num_nonzeros,
+    }
+
+
+def wants_progress() -> bool:
+    return any(listener.wants_progress for listener in _listeners)
+
+
+def report_progress(phase: Phase, fraction: float):
+    for listener in _listeners:
+        if listener.wants_progress:
+            listener.progress(phase, fraction)
+
+
+@contextmanager
+def phase(name: str, message: Optional[str] = None, **counts: int) -> Iterator[Phase]:
+    """
+    Context manager that times a phase and notifies the listeners.
+    Counts can be given as keyword arguments or later with Phase.count().
+    """
+    current = Phase(name, message, getattr(_current, "phase", None))
+    current.count(**counts)
+    _current.phase = current
+    memory = None
+    if any(listener.samples_memory for listener in _listeners):
+        memory = PeakMemory()
+        memory.__enter__()
+    for listener in _listeners:
+        listener.phase_started(current)
+    try:
+        yield current
+    finally:
+        if memory is not None:
+            memory.__exit__()
+            # Nested phases may have sampled a higher peak
+            current.peak_rss = max(memory.peak, current.peak_rss or 0)
+            if current.parent is not None:
+                current.parent.peak_rss = max(
+                    current.peak_rss, current.parent.peak_rss or 0
+                )
+        current.end_time = time.perf_counter()
+        _current.phase = current.parent
+        for listener in _listeners:
+            listener.phase_ended(current)
@@ -0,0 +1,271 @@
+"""
+Provides find_parallel() which finds the duplicate and parallel rows (and columns) of a model,
+i.e. those whose coefficients are proportional, a source of degeneracy and numerical trouble.
+
+Instead of comparing every pair of rows, each row is normalized (divided by its largest
+coefficient in absolute value, with the sign of its first coefficient) and its coefficients
+are rounded to a tolerance. Rows with the same columns and rounded coefficients are parallel,
+so they are grouped by a hash of both computed with grouped reductions over the non-zeroes,
+and only the rows sharing a hash are compared. This takes near-linear time in the number of
+non-zeroes. The objective is ignored, like in the other statistics.
+"""
+import json
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .analyze import TableRow, make_table
+from .core import LPModel, NameTable, SparseLPModel
+from .util import timed
+from .vectorized import as_numpy, nonzero_col_ids, segments
+
+# Normalized coefficients are rounded to multiples of the tolerance
+DEFAULT_ROUNDING_TOLERANCE = 1e-9
+# Number of largest groups of parallel rows (or columns) listed
+DEFAULT_TOP_GROUPS = 10
+# Number of names listed per group
+NAMES_PER_GROUP = 3
+
+_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _mix(keys: np.ndarray) -> np.ndarray:
+    """Returns a 64-bit hash of each key (the finalizer of SplitMix64)."""
+    keys = keys * _MULTIPLIER
+    keys ^= keys >> np.uint64(30)
+    keys *= np.uint64(0xBF58476D1CE4E5B9)
+    keys ^= keys >> np.uint64(27)
+    keys *= np.uint64(0x94D049BB133111EB)
+    keys ^= keys >> np.uint64(31)
+    return keys
+
+
+def parallel_groups(
+    owner_ids: np.ndarray, other_ids: np.ndarray, values: np.ndarray, tolerance: float
+) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Returns the groups of parallel vectors (rows or columns) as the ids of their owners
+    (increasing) and their scale, i.e. the factor of each owner relative to its normalized
+    coefficients.
+
+    :param owner_ids: the owner (e.g. row) of every non-zero, sorted
+    :param other_ids: the position (e.g. column) of every non-zero, increasing for each owner
+    """
+    starts, owners = segments(owner_ids)
+    if len(owners) < 2:
+        return []
+    counts = np.diff(np.r_[starts, len(owner_ids)])
+    scales = np.maximum.reduceat(np.abs(values), starts) * np.sign(values[starts])
+    rounded = np.rint(values / np.repeat(scales, counts) / tolerance).astype(np.int64)
+    with np.errstate(over="ignore"):
+        entry_hashes = _mix(
+            other_ids.astype(np.uint64) * _MULTIPLIER + rounded.astype(np.uint64)
+        )
+        # The sum of the hashes of the entries doesn't depend on their order
+        hashes = np.add.reduceat(entry_hashes, starts)
+
+    # Owners with the same number of entries and hash are candidates
+    order = np.lexsort((owners, hashes, counts))
+    is_new = np.r_[True, (np.diff(counts[order]) != 0) | (np.diff(hashes[order]) != 0)]
+    group_starts = np.flatnonzero(is_new)
+    sizes = np.diff(np.r_[group_starts, len(order)])
+    candidates = order[~np.repeat(sizes == 1, sizes)]
+
+    # The candidates are compared on their entries, in case of hash collisions
+    groups: Dict[bytes, List[int]] = {}
+    for i in candidates.tolist():
+        entries = slice(starts[i], starts[i] + counts[i])
+        key = other_ids[entries].tobytes() + rounded[entries].tobytes()
+        groups.setdefault(key, []).append(i)
+    return [
+        (owners[members], scales[members])
+        for members in groups.values()
+        if len(members) > 1
+    ]
+
+
+class ParallelFamily(TableRow):
+    """A row of the table of the rows (or columns) of each family parallel to another."""
+
+    def __init__(self, kind, name, parallel, duplicates, example):
+        self.kind, self.name = kind, name
+        # Rows parallel to a previous row, duplicates have the same coefficients
+        self.parallel, self.duplicates = parallel, duplicates
+        self.example = example
+
+    def get_table_row(self):
+        return [self.kind, self.name, self.parallel, self.duplicates, self.example]
+
+    def get_sort_key(self):
+        return self.parallel
+
+    @staticmethod
+    def get_table_header():
+        return ["Kind", "Family", "Parallel", "Duplicates", "Example"]
+
+    def to_dict(self):
+        return {
+            "kind": self.kind,
+            "family": self.name,
+            "parallel": self.parallel,
+            "duplicates": self.duplicates,
+            "example": self.example,
+        }
+
+
+class ParallelGroup(TableRow):
+    """A row of the table of the largest groups of parallel rows (or columns)."""
+
+    def __init__(self, kind, names: List[str], factors: List[float]):
+        self.kind = kind
+        # The factor of each row relative to the first
+        self.names, self.factors = names, factors
+
+    def get_table_row(self):
+        listed = ", ".join(self.names[:NAMES_PER_GROUP])
+        if len(self.names) > NAMES_PER_GROUP:
+            listed += ", ..."
+        duplicates = sum(factor == 1 for factor in self.factors[1:])
+        return [self.kind, len(self.names), duplicates, listed]
+
+    def get_sort_key(self):
+        return len(self.names)
+
+    @staticmethod
+    def get_table_header():
+        return ["Kind", "Size", "Duplicates", "Names"]
+
+    def to_dict(self):
+        return {"kind": self.kind, "names": self.names, "factors": self.factors}
+
+
+class ParallelResult:
+    """The duplicate and parallel rows and columns of a model."""
+
+    def __init__(
+        self,
+        tolerance: float,
+        families: List[ParallelFamily],
+        groups: List[ParallelGroup],
+        num_groups: int,
+    ):
+        self.tolerance = tolerance
+        self.families = families
+        # The largest groups, out of num_groups
+        self.groups = groups
+        self.num_groups = num_groups
+
+    def report(self) -> str:
+        report = (
+            "Parallel rows and columns\n\n"
+            + "Rows (or columns) are parallel when their coefficients are proportional "
+            + f"(up to {self.tolerance:g} once divided by the largest one) and duplicates "
+            + "when they are equal.\n"
+            + "Parallel counts the rows of each family parallel to a previous row "
+            + "(in any family).\n\n"
+            + f"Groups of parallel rows or columns: {self.num_groups}"
+        )
+        if self.families:
+            report += "\n\n" + make_table(self.families)
+        if self.groups:
+            report += "\n\n" + make_table(self.groups)
+        return report
+
+    def to_dict(self):
+        return {
+            "tolerance": self.tolerance,
+            "groups": self.num_groups,
+            "families": [family.to_dict() for family in self.families],
+            "largest_groups": [group.to_dict() for group in self.groups],
+        }
+
+    def save(self, output_file: str, json_file: Optional[str] = None):
+        """Saves the report and, optionally, the groups as JSON."""
+        with open(output_file, "w") as f:
+            f.write(self.report())
+        print(f"Saved parallel rows and columns to: {output_file}")
+        if json_file is not None:
+            with open(json_file, "w") as f:
+                json.dump(self.to_dict(), f, indent=2)
+            print(f"Saved parallel rows and columns as JSON to: {json_file}")
+
+
+def family_parallels(
+    kind: str,
+    table: NameTable,
+    names: List[str],
+    groups: List[Tuple[np.ndarray, np.ndarray]],
+    tolerance: float,
+) -> Tuple[List[ParallelFamily], List[ParallelGroup]]:
+    """Counts the parallel and duplicate rows (or columns) of each family."""
+    families: Dict[int, ParallelFamily] = {}
+    parallel_groups = []
+    for members, scales in groups:
+        factors = scales / scales[0]
+        # Equal up to the tolerance
+        factors[np.abs(factors - 1) <= tolerance] = 1
+        factors = factors.tolist()
+        member_names = [names[i] for i in members.tolist()]
+        parallel_groups.append(ParallelGroup(kind, member_names, factors))
+        for i, name, factor in zip(members[1:].tolist(), member_names[1:], factors[1:]):
+            family_id = table.name_families[i]
+            family = families.get(family_id)
+            if family is None:
+                example = f"{name} = {factor:g} * {member_names[0]}"
+                family = families[family_id] = ParallelFamily(
+                    kind, table.families[family_id], 0, 0, example
+                )
+            family.parallel += 1
+            family.duplicates += factor == 1
+    return [families[i] for i in sorted(families)], parallel_groups
+
+
+def find_parallel(
+    model, tolerance=DEFAULT_ROUNDING_TOLERANCE, top_groups=DEFAULT_TOP_GROUPS
+) -> ParallelResult:
+    """
+    Finds the groups of parallel rows and of parallel columns of the matrix (without the
+    objective). An LPModel is first converted to a SparseLPModel.
+
+    :param tolerance: normalized coefficients (at most 1 in absolute value) are rounded to
+        multiples of the tolerance before being compared
+    :param top_groups: number of largest groups listed
+    """
+    if isinstance(model, LPModel):
+        model = SparseLPModel.from_lp_model(model)
+
+    with timed("Finding parallel rows and columns"):
+        row_ids = as_numpy(model.row_indices)
+        col_ids = nonzero_col_ids(model)
+        values = as_numpy(model.values)
+        keep = values != 0
+        if model.objective is not None:
+            keep &= row_ids != model.objective
+        row_ids, col_ids, values = row_ids[keep], col_ids[keep], values[keep]
+
+        # The non-zeroes are in column order, and in row order once sorted stably
+        row_order = np.argsort(row_ids, kind="stable")
+        row_groups = parallel_groups(
+            row_ids[row_order], col_ids[row_order], values[row_order], tolerance
+        )
+        # The rows of a column are in the order of the file, which can be any
+        col_order = np.lexsort((row_ids, col_ids))
+        col_groups = parallel_groups(
+            col_ids[col_order], row_ids[col_order], values[col_order], tolerance
+        )
+
+        col_families, col_parallel = family_parallels(
+            "Variable", model.col_table, model.col_names, col_groups, tolerance
+        )
+        row_families, row_parallel = family_parallels(
+            "Constraint", model.row_table, model.row_names, row_groups, tolerance
+        )
+        groups = sorted(
+            row_parallel + col_parallel, key=lambda group: -len(group.names)
+        )
+        return ParallelResult(
+            tolerance,
+            row_families + col_families,
+            groups[:top_groups],
+            len(groups),
+        )
@@ -1,12 +1,26 @@
 """
-Provides the class MPSReader which allows reading an .mps linear programming model.
+Provides the class MPSReader which allows reading an .mps linear programming model,
+SparseMPSReader which reads it into the more compact SparseLPModel,
+ParallelMPSReader which does the same using multiple processes
+and MmapMPSReader which does the same by tokenizing the memory-mapped bytes of the file.
 https://en.wikipedia.org/wiki/MPS_(format)
 https://lpsolve.sourceforge.net/5.5/mps-format.htm
+
+Also provides LPReader which reads a model in the CPLEX .lp format into a LPModel.
 """
-from typing import List
+import math
+import mmap
+import multiprocessing
+import os
+import re
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
 
-from .core import Bound, LPModel
-from .util import print_progress
+from .core import Bound, ColumnNotContiguousError, LPModel, SparseLPModel
+from .files import is_compressed, open_model_file
+from .util import iter_lines, print_progress
 
 
 class MPSReader:
@@ -17,8 +31,10 @@ class MPSReader:
     therefore only be made once performance has been considered / tested.
     """
 
-    def __init__(self, filename):
+    def __init__(self, filename, threaded_decompression=True):
         self.filename = filename
+        # If the file is compressed, whether to decompress it in a separate thread
+        self.threaded_decompression = threaded_decompression
         # Function to run to read the next line
         # Start by doing nothing as we'll wait for a Keyword.
         self.function_to_run = self._do_nothing
@@ -35,14 +51,33 @@ class MPSReader:
         }
 
     def read(self):
-        # Open the file and save the rows to 'lines'
-        # This is faster than "for line in file:".
-        with open(self.filename, "r") as file:
-            lines = file.readlines()
+        # Stream the file rather than loading it with readlines() such that
+        # memory is bounded by the size of the model rather than that of the file.
+        # iter_lines() reads chunks of lines which is faster than "for line in file:".
+        # Compressed files are decompressed while streaming.
+        with open_model_file(self.filename, self.threaded_decompression) as (
+            file,
+            get_position,
+        ):
+            lines = print_progress(
+                iter_lines(file),
+                message="Loading model from file",
+                total=os.path.getsize(self.filename),
+                get_position=get_position,
+            )
+            self._parse_lines(lines)
+
+        # The _do_nothing function returns, true
+        # This ensures we really reached the end of parsing
+        assert self.function_to_run(None)
+        return self.model
 
+    def _parse_lines(self, lines: Iterable[str]):
+        """Parses the lines of the file section by section, dispatching each line to the function of its section."""
+        split_line = None
         try:
             # For each line in the file
-            for line in print_progress(lines, message="Loading model from file"):
+            for line in lines:
                 # Split the line based on its whitespace
                 # This will also trim the \n from the end.
                 split_line = line.split()
@@ -55,14 +90,12 @@ class MPSReader:
 
                 # If it's not a keyword, evaluate that function
                 self.function_to_run(split_line)
+        except ColumnNotContiguousError:
+            # Not a syntax error, see read_model()
+            raise
         except:
             raise Exception(f"Failed to parse MPS file. (line: {split_line})")
 
-        # The _do_nothing function returns, true
-        # This ensures we really reached the end of parsing
-        assert self.function_to_run(None)
-        return self.model
-
     def _do_nothing(self, _):
         """Placeholder used when reading the first few lines or last few lines of the file."""
         return True
@@ -83,6 +116,10 @@ class MPSReader:
         if var_name == "MARKER" and line[1] == "'MARKER'":
             return
 
+        # Intern the family and index of new variables
+        if var_name not in self.model.col_ids:
+            self.model.add_column(var_name)
+
         for i in range(1, len(line), 2):
             self.model.rows[line[i]].coefficients[var_name] = float(line[i + 1])
 
@@ -111,15 +148,16 @@ class MPSReader:
         if name not in self.model.bounds:
             bound = Bound(name)
             self.model.bounds[name] = bound
+            self.model.add_column(name)
         # If it does exist, retrieve it
         else:
             bound = self.model.bounds[name]
 
         # Set either the upper or the lower bound depending on the bound type
         if bound_type == "MI":
-            bound.rhs_bound = 0
+            bound.rhs_bound = 0.0
         elif bound_type == "PL":
-            bound.lhs_bound = 0
+            bound.lhs_bound = 0.0
         elif bound_type == "UP":
             bound.rhs_bound = float(line[3])
         elif bound_type == "LO":
@@ -127,7 +165,921 @@ class MPSReader:
         elif bound_type == "FX":
             bound.lhs_bound = bound.rhs_bound = float(line[3])
         elif bound_type == "BV":
-            bound.lhs_bound = 0
-            bound.rhs_bound = 1
+            bound.lhs_bound = 0.0
+            bound.rhs_bound = 1.0
         else:
             raise Exception(f"Unknown bound type {bound_type}")
+
+
+class SparseMPSReader(MPSReader):
+    """
+    SparseMPSReader reads an .mps file directly into the compact SparseLPModel.
+    The entries of each column must be contiguous (else ColumnNotContiguousError is raised).
+
+    Like MPSReader, changes should only be made once their performance has been tested.
+    """
+
+    def __init__(self, filename, threaded_decompression=True):
+        super().__init__(filename, threaded_decompression)
+        self.model: SparseLPModel = SparseLPModel()
+        # Name of the column currently being read in the COLUMNS section
+        self._current_column = None
+
+    def _read_row(self, row: List):
+        """Read a line from the ROWS section"""
+        self.model.add_row(row[1], row[0])
+
+    def _read_column(self, line: List):
+        """Read a line from the COLUMNS section"""
+        var_name = line[0]
+
+        # Skip the MARKER variables since that defines the start and end of an integer variables.
+        if var_name == "MARKER" and line[1] == "'MARKER'":
+            return
+
+        model = self.model
+        # The entries of a column are contiguous so we only need to
+        # create a new column when the name changes
+        if var_name != self._current_column:
+            model.add_column(var_name)
+            self._current_column = var_name
+
+        row_ids, row_indices, values = model.row_ids, model.row_indices, model.values
+        for i in range(1, len(line), 2):
+            row_indices.append(row_ids[line[i]])
+            values.append(float(line[i + 1]))
+        model.col_starts[-1] = len(values)
+
+    def _read_rhs(self, line: List):
+        """Read a line from the RHS section"""
+        row_ids, rhs = self.model.row_ids, self.model.rhs
+        for i in range(1, len(line), 2):
+            rhs[row_ids[line[i]]] = float(line[i + 1])
+
+    def _read_bound(self, line: List):
+        """Read a line from the BOUNDS section"""
+        # The first element is the bound type, the third is the variable
+        # and the fourth (if any) is the value of the bound
+        self._set_bound(line[0], line[2], line[3] if len(line) > 3 else None)
+
+    def _set_bound(self, bound_type: str, name: str, value):
+        """Sets a bound on a variable. value can be a string or a float (or None if not needed)."""
+        # FR indicates a free variable so no bounds
+        if bound_type == "FR":
+            return
+
+        model = self.model
+        try:
+            col_id = model.col_ids[name]
+        except KeyError:
+            # Bound on a variable that doesn't appear in the matrix
+            col_id = model.add_column(name)
+
+        lower, upper = model.lower, model.upper
+        # If neither bound is set, this is the first time we see the variable in the BOUNDS section
+        if math.isnan(lower[col_id]) and math.isnan(upper[col_id]):
+            model.bound_order.append(col_id)
+
+        # Set either the upper or the lower bound depending on the bound type
+        if bound_type == "MI":
+            upper[col_id] = 0.0
+        elif bound_type == "PL":
+            lower[col_id] = 0.0
+        elif bound_type == "UP":
+            upper[col_id] = float(value)
+        elif bound_type == "LO":
+            lower[col_id] = float(value)
+        elif bound_type == "FX":
+            lower[col_id] = upper[col_id] = float(value)
+        elif bound_type == "BV":
+            lower[col_id] = 0.0
+            upper[col_id] = 1.0
+        else:
+            raise Exception(f"Unknown bound type {bound_type}")
+
+    def _merge_columns(self, col_names, col_lengths, row_indices, values):
+        """
+        Appends columns parsed separately (e.g. from a chunk of the file) to the model.
+        Accepts arrays as well as NumPy arrays of the same type.
+        """
+        model = self.model
+        col_ends = np.cumsum(col_lengths, dtype=np.int64) + len(model.values)
+        # A column can be split across two chunks, in which case we extend it
+        if len(col_names) and col_names[0] == self._current_column:
+            model.col_starts[-1] = int(col_ends[0])
+            col_names, col_ends = col_names[1:], col_ends[1:]
+        if len(col_names):
+            model.add_columns(col_names, col_ends)
+            self._current_column = col_names[-1]
+        model.row_indices.frombytes(memoryview(row_indices).cast("B"))
+        model.values.frombytes(memoryview(values).cast("B"))
+
+    def _merge_bounds(self, bound_types, names, values):
+        """Sets bounds parsed separately (e.g. from a chunk of the file) on the model."""
+        for bound_type, name, value in zip(bound_types, names, values):
+            self._set_bound(bound_type, name, value)
+
+
+# Section headers that ParallelMPSReader looks for. Data lines are indented so a header
+# can be found by searching for a new line directly followed by its keyword.
+SECTION_HEADERS = ("ROWS", "COLUMNS", "RHS", "RANGES", "BOUNDS", "ENDATA")
+
+# Row ids of the model, set in each process of the ParallelMPSReader pool
+_worker_row_ids: Dict[str, int] = {}
+
+
+def find_header(data, keyword: str, search_from=0) -> Optional[Tuple[int, int]]:
+    """
+    Returns the offsets of the start and end of the header line of a section
+    in an .mps file (as bytes or mmap) or None if the section doesn't exist.
+    """
+    keyword = keyword.encode()
+    target = b"\n" + keyword
+    # The header could also be the very first line
+    header_start = 0 if search_from == 0 and data[: len(keyword)] == keyword else None
+    while True:
+        if header_start is None:
+            pos = data.find(target, search_from)
+            if pos == -1:
+                return None
+            header_start = pos + 1
+        header_end = data.find(b"\n", header_start)
+        header_end = len(data) if header_end == -1 else header_end + 1
+        # Make sure the keyword is alone on its line (e.g. not "RHSX")
+        if data[header_start:header_end].split() == [keyword]:
+            return header_start, header_end
+        search_from = header_end - 1
+        header_start = None
+
+
+def find_sections(data) -> List[Tuple[str, int, int]]:
+    """
+    Returns the sections of an .mps file (as bytes or mmap) in order as tuples of
+    (keyword, offset of the header line, offset of the first line after the header).
+    """
+    sections = []
+    # Sections appear in the order of SECTION_HEADERS so each search
+    # can start from the previous section found
+    search_from = 0
+    for keyword in SECTION_HEADERS:
+        header = find_header(data, keyword, search_from)
+        if header is not None:
+            sections.append((keyword,) + header)
+            search_from = max(header[0] - 1, 0)
+    return sections
+
+
+def line_aligned_chunks(data, start, end, chunk_size) -> List[Tuple[int, int]]:
+    """Splits the byte range [start, end) of data into ranges of about chunk_size bytes that start at a line."""
+    chunks = []
+    while start < end:
+        chunk_end = data.find(b"\n", min(start + chunk_size, end) - 1)
+        chunk_end = end if chunk_end == -1 or chunk_end >= end else chunk_end + 1
+        chunks.append((start, chunk_end))
+        start = chunk_end
+    return chunks
+
+
+def _init_worker(row_ids: Dict[str, int]):
+    global _worker_row_ids
+    _worker_row_ids = row_ids
+
+
+def _read_chunk_lines(filename, start, end) -> List[str]:
+    with open(filename, "rb") as file:
+        file.seek(start)
+        return file.read(end - start).decode().splitlines()
+
+
+def _parse_columns_chunk(args):
+    """
+    Parses a chunk of the COLUMNS section. Returns the names of the columns in the chunk,
+    their number of non-zeroes, and the row ids and values of their non-zeroes.
+    """
+    filename, start, end = args
+    row_ids = _worker_row_ids
+    col_names, col_lengths = [], array("q")
+    row_indices, values = array("i"), array("d")
+    current_column = None
+    split_line = None
+    try:
+        for line in _read_chunk_lines(filename, start, end):
+            split_line = line.split()
+            var_name = split_line[0]
+            # Skip the MARKER variables since that defines the start and end of an integer variables.
+            if var_name == "MARKER" and split_line[1] == "'MARKER'":
+                continue
+            if var_name != current_column:
+                col_names.append(var_name)
+                col_lengths.append(0)
+                current_column = var_name
+            for i in range(1, len(split_line), 2):
+                row_indices.append(row_ids[split_line[i]])
+                values.append(float(split_line[i + 1]))
+            col_lengths[-1] += len(split_line) // 2
+    except:
+        raise Exception(f"Failed to parse MPS file. (line: {split_line})")
+    return col_names, col_lengths, row_indices, values
+
+
+def _parse_bounds_chunk(args):
+    """Parses a chunk of the BOUNDS section. Returns the bound types, variable names and values."""
+    filename, start, end = args
+    bound_types, names, values = [], [], []
+    split_line = None
+    try:
+        for line in _read_chunk_lines(filename, start, end):
+            split_line = line.split()
+            bound_types.append(split_line[0])
+            names.append(split_line[2])
+            values.append(float(split_line[3]) if len(split_line) > 3 else None)
+    except:
+        raise Exception(f"Failed to parse MPS file. (line: {split_line})")
+    return bound_types, names, values
+
+
+class ParallelMPSReader(SparseMPSReader):
+    """
+    ParallelMPSReader reads an .mps file into a SparseLPModel using a pool of processes.
+
+    The file is first scanned for the offsets of its sections. The ROWS and RHS sections are
+    read serially while the COLUMNS and BOUNDS sections are split into line-aligned byte ranges
+    that are parsed in parallel and merged in order. The resulting model is identical
+    to the one returned by SparseMPSReader.
+    """
+
+    def __init__(self, filename, jobs=None, chunk_size=32 << 20):
+        super().__init__(filename)
+        if is_compressed(filename):
+            raise ValueError(
+                f"{type(self).__name__} can't read compressed files, use SparseMPSReader instead."
+            )
+        self.jobs = jobs or os.cpu_count()
+        self.chunk_size = chunk_size
+
+    def read(self):
+        with open(self.filename, "rb") as file, mmap.mmap(
+            file.fileno(), 0, access=mmap.ACCESS_READ
+        ) as data:
+            sections = find_sections(data)
+            # Everything before the first section (e.g. the NAME line)
+            self._parse_serially(data, 0, sections[0][1] if sections else len(data))
+
+            pool = None
+            try:
+                for i, (keyword, header_start, start) in enumerate(sections):
+                    end = sections[i + 1][1] if i + 1 < len(sections) else len(data)
+                    if keyword not in ("COLUMNS", "BOUNDS"):
+                        self._parse_serially(data, header_start, end)
+                        continue
+
+                    self.function_to_run = self.KEY_MAPPING[keyword]
+                    chunks = [
+                        (self.filename, chunk_start, chunk_end)
+                        for chunk_start, chunk_end in line_aligned_chunks(
+                            data, start, end, self.chunk_size
+                        )
+                    ]
+                    if pool is None:
+                        pool = multiprocessing.Pool(
+                            self.jobs,
+                            initializer=_init_worker,
+                            initargs=(self.model.row_ids,),
+                        )
+                    if keyword == "COLUMNS":
+                        results = pool.imap(_parse_columns_chunk, chunks)
+                        merge = self._merge_columns
+                    else:
+                        results = pool.imap(_parse_bounds_chunk, chunks)
+                        merge = self._merge_bounds
+                    for result in print_progress(
+                        results,
+                        message=f"Loading {keyword} section in parallel",
+                        check_progress_every=1,
+                        total=len(chunks),
+                    ):
+                        merge(*result)
+            finally:
+                if pool is not None:
+                    pool.terminate()
+
+        # The _do_nothing function returns, true
+        # This ensures we really reached the end of parsing
+        assert self.function_to_run(None)
+        return self.model
+
+    def _parse_serially(self, data, start, end):
+        for chunk_start, chunk_end in line_aligned_chunks(
+            data, start, end, self.chunk_size
+        ):
+            self._parse_lines(data[chunk_start:chunk_end].decode().splitlines())
+
+
+# Bytes that bytes.split() considers whitespace
+_WHITESPACE = np.zeros(256, dtype=bool)
+_WHITESPACE[list(b" \t\n\r\x0b\x0c")] = True
+
+
+def _decode_all(tokens) -> List[str]:
+    """Decodes a sequence of tokens with a single call to decode()."""
+    if len(tokens) == 0:
+        return []
+    return b"\n".join(tokens).decode().split("\n")
+
+
+class _Tokens:
+    """
+    The tokens (as bytes) of a chunk of an .mps file along with the line each token is on.
+
+    The chunk is split into tokens with a single call to bytes.split() and the
+    line of each token is found by NumPy from the positions of the whitespace and new lines.
+    This avoids decoding and splitting each line.
+    """
+
+    def __init__(self, data, start, end):
+        chunk = data[start:end]
+        self.tokens = np.array(chunk.split(), dtype=object)
+        raw = np.frombuffer(chunk, dtype=np.uint8)
+        is_whitespace = _WHITESPACE[raw]
+        token_starts = np.flatnonzero(~is_whitespace & np.r_[True, is_whitespace[:-1]])
+        token_lines = np.searchsorted(np.flatnonzero(raw == ord("\n")), token_starts)
+        # Index of the first token of each (non-empty) line and number of tokens on each line
+        self.line_starts = np.flatnonzero(
+            np.r_[True, token_lines[1:] != token_lines[:-1]]
+        )
+        self.line_lengths = np.diff(np.r_[self.line_starts, len(self.tokens)])
+        if len(self.tokens) == 0:
+            self.line_starts = self.line_lengths = np.empty(0, dtype=np.int64)
+        # Position of each token within its line
+        self.positions = np.arange(len(self.tokens)) - np.repeat(
+            self.line_starts, self.line_lengths
+        )
+
+    def __len__(self):
+        return len(self.line_starts)
+
+    def check_line_lengths(self, *allowed_lengths):
+        """Raises an exception if a line doesn't have one of the allowed number of tokens."""
+        is_valid = np.isin(self.line_lengths, allowed_lengths)
+        if not is_valid.all():
+            line = np.flatnonzero(~is_valid)[0]
+            start = self.line_starts[line]
+            bad_line = self.tokens[start : start + self.line_lengths[line]]
+            raise Exception(f"Failed to parse MPS file. (line: {bad_line.tolist()})")
+
+    def field(self, position) -> np.ndarray:
+        """Returns the token at the given position of each line (lines must have enough tokens)."""
+        return self.tokens[self.line_starts + position]
+
+    def entries(self):
+        """
+        For lines made of a name followed by (row, value) pairs (COLUMNS and RHS sections),
+        returns the index of each pair's row token, in order. The value is the token that follows.
+        """
+        return np.flatnonzero(self.positions % 2 == 1)
+
+    def without_lines(self, is_excluded: np.ndarray) -> "_Tokens":
+        """Removes the lines for which is_excluded is True."""
+        kept = ~np.repeat(is_excluded, self.line_lengths)
+        self.tokens = self.tokens[kept]
+        self.positions = self.positions[kept]
+        self.line_lengths = self.line_lengths[~is_excluded]
+        self.line_starts = np.cumsum(self.line_lengths) - self.line_lengths
+        return self
+
+
+class MmapMPSReader(SparseMPSReader):
+    """
+    MmapMPSReader reads an .mps file into a SparseLPModel by memory-mapping the file
+    and tokenizing its bytes directly.
+
+    Unlike the other readers, lines are never decoded or split into lists. Instead, each
+    chunk of the file is split into tokens at once (see _Tokens), row names are looked up as
+    bytes (decoded once when the row is created), column names are decoded once per column
+    and values are converted to floats in bulk. The resulting model is identical to the one
+    returned by SparseMPSReader.
+    """
+
+    def __init__(self, filename, chunk_size=32 << 20):
+        super().__init__(filename)
+        if is_compressed(filename):
+            raise ValueError(
+                f"{type(self).__name__} can't read compressed files, use SparseMPSReader instead."
+            )
+        self.chunk_size = chunk_size
+        # Same as model.row_ids but keyed by the row name as bytes
+        self._row_ids_bytes: Dict[bytes, int] = {}
+        self.SECTION_READERS = {
+            "ROWS": self._read_rows_chunk,
+            "COLUMNS": self._read_columns_chunk,
+            "RHS": self._read_rhs_chunk,
+            "BOUNDS": self._read_bounds_chunk,
+        }
+
+    def read(self):
+        with open(self.filename, "rb") as file, mmap.mmap(
+            file.fileno(), 0, access=mmap.ACCESS_READ
+        ) as data:
+            sections = find_sections(data)
+            chunks = []
+            for i, (keyword, header_start, start) in enumerate(sections):
+                end = sections[i + 1][1] if i + 1 < len(sections) else len(data)
+                if keyword == "ENDATA":
+                    continue
+                if keyword not in self.SECTION_READERS:
+                    raise Exception(f"Failed to parse MPS file. (line: ['{keyword}'])")
+                chunks += [
+                    (keyword, chunk_start, chunk_end)
+                    for chunk_start, chunk_end in line_aligned_chunks(
+                        data, start, end, self.chunk_size
+                    )
+                ]
+
+            for keyword, start, end in print_progress(
+                chunks, message="Loading model from file", check_progress_every=1
+            ):
+                tokens = _Tokens(data, start, end)
+                if len(tokens):
+                    self.SECTION_READERS[keyword](tokens)
+
+        # This ensures we really reached the end of parsing
+        if not sections or sections[-1][0] != "ENDATA":
+            raise Exception("Failed to parse MPS file. (missing ENDATA)")
+        return self.model
+
+    def _row_ids_of(self, row_names) -> np.ndarray:
+        try:
+            return np.fromiter(
+                map(self._row_ids_bytes.__getitem__, row_names),
+                dtype=np.int32,
+                count=len(row_names),
+            )
+        except KeyError as e:
+            raise Exception(f"Failed to parse MPS file. (unknown row: {e})")
+
+    def _read_rows_chunk(self, tokens: _Tokens):
+        tokens.check_line_lengths(2)
+        row_names = tokens.field(1)
+        first_id = self.model.num_rows
+        self.model.add_rows(_decode_all(row_names), _decode_all(tokens.field(0)))
+        self._row_ids_bytes.update(
+            zip(row_names, range(first_id, first_id + len(row_names)))
+        )
+
+    def _read_columns_chunk(self, tokens: _Tokens):
+        # Skip the MARKER lines that define the start and end of integer variables.
+        if tokens.line_lengths.min() == 3 and b"'MARKER'" in tokens.field(1):
+            tokens.without_lines(
+                (tokens.field(0) == b"MARKER") & (tokens.field(1) == b"'MARKER'")
+            )
+            if not len(tokens):
+                return
+        tokens.check_line_lengths(3, 5)
+
+        entries = tokens.entries()
+        row_indices = self._row_ids_of(tokens.tokens[entries])
+        values = tokens.tokens[entries + 1].astype(np.float64)
+
+        # Consecutive lines with the same variable name make up a column
+        line_cols = tokens.field(0)
+        col_first_lines = np.flatnonzero(np.r_[True, line_cols[1:] != line_cols[:-1]])
+        col_lengths = np.add.reduceat(tokens.line_lengths // 2, col_first_lines)
+        col_names = _decode_all(line_cols[col_first_lines])
+        self._merge_columns(col_names, col_lengths.tolist(), row_indices, values)
+
+    def _read_rhs_chunk(self, tokens: _Tokens):
+        tokens.check_line_lengths(3, 5)
+        entries = tokens.entries()
+        rows = self._row_ids_of(tokens.tokens[entries]).tolist()
+        values = tokens.tokens[entries + 1].astype(np.float64).tolist()
+        rhs = self.model.rhs
+        # Entries are set in order since a later value overrides an earlier one
+        for row, value in zip(rows, values):
+            rhs[row] = value
+
+    def _read_bounds_chunk(self, tokens: _Tokens):
+        tokens.check_line_lengths(3, 4)
+        # Only some bound types have a value
+        values = [None] * len(tokens)
+        has_value = np.flatnonzero(tokens.line_lengths == 4)
+        for line, value in zip(
+            has_value.tolist(), tokens.tokens[tokens.line_starts[has_value] + 3]
+        ):
+            values[line] = value
+        self._merge_bounds(
+            _decode_all(tokens.field(0)), _decode_all(tokens.field(2)), values
+        )
+
+
+# Tokens of a line of an .lp file. Names may contain any character other than
+# whitespace, the operators and ':' but can't start with a digit or a period.
+_LP_TOKEN = re.compile(
+    r"(?P<cmp><=|=<|>=|=>|<|>|=)"
+    r"|(?P<sign>[+-])"
+    r"|(?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)"
+    r"|(?P<label>[^\s:+\-<>=]+)\s*:"
+    r"|(?P<name>[^\s:+\-<>=]+)"
+)
+
+# A variable name (without quadratic terms) that makes up a whole word
+_LP_VARIABLE = re.compile(r"[^\s:+\-<>=\d.\[\^][^\s:+\-<>=\[\^]*\Z")
+
+# Mapping of the comparison operators to the row type in the MPS format.
+_LP_ROW_TYPES = {
+    "<=": "L",
+    "=<": "L",
+    "<": "L",
+    ">=": "G",
+    "=>": "G",
+    ">": "G",
+    "=": "E",
+}
+
+# 'value <= x' is the same as 'x >= value'
+_LP_FLIPPED = {"L": ">=", "G": "<=", "E": "="}
+
+
+def _tokenize_lp_line(line: str) -> List[Tuple[str, str]]:
+    """Returns the (kind, text) tokens of a line where kind is one of the groups of _LP_TOKEN."""
+    return [
+        (match.lastgroup, match.group(match.lastgroup))
+        for match in _LP_TOKEN.finditer(line)
+    ]
+
+
+def _lp_values(tokens) -> list:
+    """
+    Merges the signs of the tokens into the numbers that follow them.
+    Returns the numbers as floats (None for an infinite number) and the other tokens as is.
+    """
+    values = []
+    sign = 1.0
+    for kind, text in tokens:
+        if kind == "sign":
+            sign = -1.0 if text == "-" else 1.0
+        elif kind == "number":
+            values.append(sign * float(text))
+            sign = 1.0
+        elif kind == "name" and text.lower() in ("inf", "infinity"):
+            values.append(None)
+            sign = 1.0
+        else:
+            values.append((kind, text))
+    return values
+
+
+def _lp_name(value) -> str:
+    if not isinstance(value, tuple) or value[0] != "name":
+        raise Exception(f"Expected a variable name, got: {value}")
+    return value[1]
+
+
+def _lp_operator(value) -> str:
+    if not isinstance(value, tuple) or value[0] != "cmp":
+        raise Exception(f"Expected a comparison operator, got: {value}")
+    return value[1]
+
+
+def _lp_number(value) -> Optional[float]:
+    if isinstance(value, tuple):
+        raise Exception(f"Expected a number, got: {value}")
+    return value
+
+
+class LPReader:
+    """
+    LPReader reads a CPLEX .lp file (e.g. as written by Pyomo) and returns a LPModel object.
+    https://www.ibm.com/docs/en/icos/22.1.0?topic=cplex-lp-file-format-algebraic-representation
+
+    Rows are stored like those of the equivalent .mps file (a '<=' constraint is an 'L' row,
+    the objective function is an 'N' row, etc.) such that the analysis is the same.
+    Infinite and free bounds are not stored and binary variables are bounded by 0 and 1
+    (like 'BV' bounds). Quadratic terms and the SOS, semi-continuous, lazy constraints
+    and user cuts sections are not supported.
+    """
+
+    # Mapping of the section keywords (in lowercase) to the name of the function that reads the section
+    SECTIONS = {
+        "minimize": "_read_objective",
+        "minimum": "_read_objective",
+        "min": "_read_objective",
+        "maximize": "_read_objective",
+        "maximum": "_read_objective",
+        "max": "_read_objective",
+        "subject to": "_read_constraint",
+        "such that": "_read_constraint",
+        "st": "_read_constraint",
+        "s.t.": "_read_constraint",
+        "bounds": "_read_bound",
+        "bound": "_read_bound",
+        "general": "_read_general",
+        "generals": "_read_general",
+        "gen": "_read_general",
+        "binary": "_read_binary",
+        "binaries": "_read_binary",
+        "bin": "_read_binary",
+        "end": "_read_end",
+    }
+    UNSUPPORTED_SECTIONS = (
+        "sos",
+        "semi",
+        "semis",
+        "semi-continuous",
+        "lazy constraints",
+        "user cuts",
+    )
+
+    def __init__(self, filename, threaded_decompression=True):
+        self.filename = filename
+        # If the file is compressed, whether to decompress it in a separate thread
+        self.threaded_decompression = threaded_decompression
+        # Function to run to read the next line
+        self.function_to_run = self._read_end
+        # The model that will be created
+        self.model: LPModel = LPModel()
+
+        # The objective function and constraints can span several lines
+        # so the row being read is kept until it's complete.
+        self._row_name: Optional[str] = None
+        self._row_type: Optional[str] = None
+        self._coefficients: Dict[str, float] = {}
+        self._sign = 1.0
+        self._coef: Optional[float] = None
+        # Name of the function that reads the current section
+        self._section = "_read_end"
+
+    def read(self):
+        with open_model_file(self.filename, self.threaded_decompression) as (
+            file,
+            get_position,
+        ):
+            lines = print_progress(
+                iter_lines(file),
+                message="Loading model from file",
+                total=os.path.getsize(self.filename),
+                get_position=get_position,
+            )
+            self._parse_lines(lines)
+
+        # Complete the row being read if the file doesn't end with the 'end' keyword
+        self._end_section()
+        return self.model
+
+    def _parse_lines(self, lines: Iterable[str]):
+        """Parses the lines of the file section by section, dispatching each line to the function of its section."""
+        line = None
+        try:
+            for line in lines:
+                # Everything after a backslash is a comment
+                if "\\" in line:
+                    line = line.split("\\", 1)[0]
+
+                # Tokenizing with the regular expression is several times slower
+                # than reading the lines Pyomo writes most from their words.
+                words = line.split()
+                if not words:
+                    continue
+                if (
+                    self._section in ("_read_objective", "_read_constraint")
+                    and self._row_type is None
+                    and self._coef is None
+                    and self._sign == 1.0
+                    and self._read_words(words)
+                ):
+                    continue
+
+                tokens = _tokenize_lp_line(line)
+                if not tokens:
+                    continue
+
+                # Lines may start with the keyword of a new section
+                section_length = self._section_length(tokens)
+                if section_length:
+                    self._end_section()
+                    keyword = " ".join(
+                        text.lower() for _, text in tokens[:section_length]
+                    )
+                    self._section = self.SECTIONS[keyword]
+                    self.function_to_run = getattr(self, self._section)
+                    tokens = tokens[section_length:]
+                    if not tokens:
+                        continue
+
+                self.function_to_run(tokens)
+        except Exception as e:
+            raise Exception(f"Failed to parse LP file. (line: {line!r})") from e
+
+    def _section_length(self, tokens) -> int:
+        """Returns the number of tokens of the section keyword that starts the line (0 if there is none)."""
+        for length in (2, 1):
+            if len(tokens) < length or any(
+                kind != "name" for kind, _ in tokens[:length]
+            ):
+                continue
+            keyword = " ".join(text.lower() for _, text in tokens[:length])
+            if keyword in self.UNSUPPORTED_SECTIONS:
+                raise Exception(f"Unsupported section: {keyword}")
+            if keyword in self.SECTIONS:
+                return length
+        return 0
+
+    def _end_section(self):
+        """Completes the row of the section that ends."""
+        if self.function_to_run == self._read_objective:
+            # Unnamed objective functions are named like CPLEX does
+            row_name = "obj" if self._row_name is None else self._row_name
+            self.model.add_row(row_name, "N")
+            self.model.rows[row_name].coefficients = self._coefficients
+            self._add_columns()
+            self._reset_row()
+        elif self._row_name is not None or self._coefficients or self._row_type:
+            raise Exception("Constraint without a right-hand side.")
+
+    def _reset_row(self):
+        self._row_name = None
+        self._row_type = None
+        self._coefficients = {}
+        self._sign = 1.0
+        self._coef = None
+
+    def _read_end(self, _):
+        """Used before the first section and after the 'end' keyword, where there should be nothing."""
+        raise Exception("Unexpected line outside of a section.")
+
+    def _read_expression(self, tokens, allow_constants: bool) -> list:
+        """
+        Adds the terms of a linear expression to the row being read.
+        Returns the tokens starting at the comparison operator (empty if there is none).
+        """
+        for i, (kind, text) in enumerate(tokens):
+            if kind == "name":
+                if "[" in text or "^" in text:
+                    raise Exception("Quadratic terms are not supported.")
+                coef = self._sign * (1.0 if self._coef is None else self._coef)
+                self._coefficients[text] = self._coefficients.get(text, 0.0) + coef
+                self._sign, self._coef = 1.0, None
+                continue
+
+            if self._coef is not None:
+                # A number that isn't followed by a variable is a constant
+                if not allow_constants:
+                    raise Exception("Constants are only supported in the objective.")
+                # Constants don't affect the analysis
+                self._sign, self._coef = 1.0, None
+
+            if kind == "number":
+                self._coef = float(text)
+            elif kind == "sign":
+                if text == "-":
+                    self._sign = -self._sign
+            elif kind == "label":
+                if self._coefficients:
+                    raise Exception(f"Unexpected label: {text}")
+                self._row_name = text
+            else:  # Comparison operator
+                return tokens[i:]
+        return []
+
+    def _read_words(self, words: List[str]) -> bool:
+        """
+        Reads the lines Pyomo writes most without tokenizing them: a term (e.g. '-2 x'),
+        a label (e.g. 'c1:') or a comparison with the right-hand side (e.g. '<= 5').
+        Returns False without doing anything if the line is anything else.
+        """
+        if len(words) == 1:
+            label = words[0]
+            if (
+                label[-1] != ":"
+                or self._coefficients
+                or not _LP_VARIABLE.match(label[:-1])
+            ):
+                return False
+            self._row_name = label[:-1]
+            return True
+        if len(words) != 2:
+            return False
+
+        first, second = words
+        if first in _LP_ROW_TYPES:
+            if self._section != "_read_constraint":
+                return False
+            try:
+                rhs = float(second)
+            except ValueError:
+                return False
+            if math.isinf(rhs):
+                return False
+            self._row_type = _LP_ROW_TYPES[first]
+            self._add_constraint(rhs)
+            return True
+
+        if first[-1] not in "0123456789." or not _LP_VARIABLE.match(second):
+            return False
+        try:
+            coef = float(first)
+        except ValueError:
+            return False
+        self._coefficients[second] = self._coefficients.get(second, 0.0) + coef
+        return True
+
+    def _read_objective(self, tokens):
+        """Read a line of the objective function"""
+        if self._read_expression(tokens, allow_constants=True):
+            raise Exception("Unexpected comparison operator in the objective function.")
+
+    def _read_constraint(self, tokens):
+        """Read a line of a constraint. The constraint is complete once its right-hand side is read."""
+        if self._row_type is None:
+            tokens = self._read_expression(tokens, allow_constants=False)
+            if not tokens:
+                return
+            self._row_type = _LP_ROW_TYPES[tokens[0][1]]
+            tokens = tokens[1:]
+            if not tokens:
+                return  # The right-hand side is on the next line
+
+        values = _lp_values(tokens)
+        if len(values) != 1 or _lp_number(values[0]) is None:
+            raise Exception("Expected a finite number as the right-hand side.")
+        self._add_constraint(values[0])
+
+    def _add_constraint(self, rhs: float):
+        """Adds the constraint that was read to the model."""
+        # Unnamed constraints are named by their position like CPLEX does
+        row_name = self._row_name
+        if row_name is None:
+            num_constraints = len(self.model.rows) - (self.model.objective is not None)
+            row_name = f"R{num_constraints + 1}"
+        self.model.add_row(row_name, self._row_type)
+        row = self.model.rows[row_name]
+        row.coefficients = self._coefficients
+        row.rhs_value = rhs
+        self._add_columns()
+        self._reset_row()
+
+    def _add_columns(self):
+        """Interns the family and index of the new variables of the row that was read."""
+        col_ids = self.model.col_ids
+        for var_name in self._coefficients:
+            if var_name not in col_ids:
+                self.model.add_column(var_name)
+
+    def _get_bound(self, var_name: str) -> Bound:
+        try:
+            return self.model.bounds[var_name]
+        except KeyError:
+            bound = Bound(var_name)
+            self.model.bounds[var_name] = bound
+            self.model.add_column(var_name)
+            return bound
+
+    def _set_bound(self, var_name: str, operator: str, value: Optional[float]):
+        """Sets the bound(s) given by 'var_name operator value'."""
+        # Infinite bounds are the same as no bound
+        if value is None and var_name not in self.model.bounds:
+            return
+        bound = self._get_bound(var_name)
+        row_type = _LP_ROW_TYPES[operator]
+        if row_type != "G":
+            bound.rhs_bound = value
+        if row_type != "L":
+            bound.lhs_bound = value
+
+    def _read_bound(self, tokens):
+        """Read a line from the bounds section, e.g. 'x <= 5', '0 <= x <= 1', 'x = 2' or 'x free'"""
+        values = _lp_values(tokens)
+        if (
+            len(values) == 2
+            and isinstance(values[1], tuple)
+            and values[1][1].lower() == "free"
+        ):
+            # Free variables have no bounds, like the FR bound type of .mps files
+            _lp_name(values[0])
+            return
+        if len(values) not in (3, 5):
+            raise Exception("Invalid bound.")
+        if isinstance(values[0], tuple):
+            # x <= value
+            self._set_bound(
+                _lp_name(values[0]), _lp_operator(values[1]), _lp_number(values[2])
+            )
+            return
+
+        # value <= x (<= value)
+        var_name = _lp_name(values[2])
+        operator = _LP_FLIPPED[_LP_ROW_TYPES[_lp_operator(values[1])]]
+        self._set_bound(var_name, operator, values[0])
+        if len(values) == 5:
+            self._set_bound(var_name, _lp_operator(values[3]), _lp_number(values[4]))
+
+    def _read_general(self, tokens):
+        """Read a line of the general (integer) section. Integrality doesn't affect the analysis."""
+        for value in tokens:
+            _lp_name(value)
+
+    def _read_binary(self, tokens):
+        """Read a line of the binary section. Binary variables are bounded by 0 and 1."""
+        for value in tokens:
+            bound = self._get_bound(_lp_name(value))
+            bound.lhs_bound = 0.0
+            bound.rhs_bound = 1.0
@@ -0,0 +1,654 @@
+"""
+Provides approximate_analysis() which estimates the statistics of each family of an .mps file
+from a random sample of its lines, reading a bounded number of bytes whatever the file size.
+
+The sections of the file are located by bisection on the byte offsets (the section of a line
+can be told from its shape, see _line_rank) such that only a few pages are read to find them.
+The ROWS, COLUMNS, RHS and BOUNDS sections are then split into slots of chunk_size bytes and a
+random sample of slots is read (in proportion to the size of each section), each slot
+being made of the lines that start in it. Sections whose share of the budget holds fewer than
+MIN_SAMPLED_SLOTS slots are split into smaller slots: the families of a model are written in
+contiguous blocks, so a few large slots would vary too much (and too unpredictably) from one
+to the next. The lines are tokenized like MmapMPSReader does.
+
+Since every slot of a section is as likely to be sampled, the number of rows, columns and
+non-zeroes of each family are estimated (without bias) by scaling up the sampled counts, with
+a 95% confidence interval from the variance between the sampled slots (with the quantile of
+Student's t distribution). Like any interval from a sample, it assumes that the sample
+represents the family: a family whose items are mostly in a few slots that weren't sampled
+(e.g. the non-zeroes of a constraint in a few dense columns) is underestimated. The ranges of
+the coefficients, RHS values and bounds are those of the sampled values, which can only be
+narrower than the true ranges. Sections that fit in the budget are read entirely and are exact.
+"""
+import json
+import math
+import mmap
+import os
+import random
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .analyze import TableRow, make_table
+from .files import is_compressed, is_lp_file
+from .reader import SECTION_HEADERS, _Tokens, find_header
+from .util import print_progress, timed
+from .vectorized import segments
+
+DEFAULT_BUDGET = 16 << 20
+DEFAULT_CHUNK_SIZE = 64 << 10
+SAMPLED_SECTIONS = ("ROWS", "COLUMNS", "RHS", "BOUNDS")
+# Ranks of the sections in the order of the file
+RANKS = {keyword.encode(): rank for rank, keyword in enumerate(SECTION_HEADERS)}
+BOUND_TYPES = {b"UP", b"LO", b"FX", b"FR", b"MI", b"PL", b"BV", b"LI", b"UI", b"SC"}
+# Smaller slots (of at least MIN_CHUNK_SIZE bytes) are used when a section would have fewer
+# sampled slots than this
+MIN_SAMPLED_SLOTS = 128
+MIN_CHUNK_SIZE = 1 << 10
+# Two-sided 95% confidence interval of a normal distribution
+Z_95 = 1.96
+# The same for Student's t distribution with 1 to 30 degrees of freedom
+T_95 = (
+    12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+    2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+    2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042,
+)  # fmt: skip
+# The values of a family are read by slots, so they aren't independent draws. With 95%
+# confidence, fewer than UNSEEN_FACTOR / n of the slots holding values of a family hold one
+# smaller than the smallest of n such slots sampled at random (and as many hold one larger
+# than the largest).
+UNSEEN_FACTOR = -math.log(0.025)
+
+# An estimated count and the half-width of its 95% confidence interval
+Estimate = Tuple[float, float]
+
+
+def _tokens_at(data, offset: int, end: int) -> Tuple[int, List[bytes]]:
+    """Returns the start and tokens of the first non-empty line starting at or after offset."""
+    while True:
+        if offset > 0 and data[offset - 1] != ord("\n"):
+            offset = data.find(b"\n", offset, end) + 1 or end
+        if offset >= end:
+            return end, []
+        line_end = data.find(b"\n", offset, end) + 1 or end
+        tokens = data[offset:line_end].split()
+        if tokens:
+            return offset, tokens
+        offset = line_end
+
+
+def _tokens_before(data, start: int, offset: int) -> Tuple[int, List[bytes]]:
+    """
+    Returns the start and tokens of the last line in [start, offset) that is neither empty
+    nor a marker, offset being the start of a line (or start and [] if there's none).
+    """
+    while offset > start:
+        line_start = max(data.rfind(b"\n", start, offset - 1) + 1, start)
+        tokens = data[line_start:offset].split()
+        if tokens and not (len(tokens) == 3 and tokens[1] == b"'MARKER'"):
+            return line_start, tokens
+        offset = line_start
+    return start, []
+
+
+def _line_rank(tokens: List[bytes], rhs_name: Optional[bytes] = None) -> int:
+    """
+    Returns the rank in SECTION_HEADERS of the section a line is in, from its shape:
+    headers are alone on their line, lines of the ROWS section have 2 tokens and those of
+    the BOUNDS section start with a bound type. Lines of the RHS section can only be told
+    from those of the COLUMNS section by their first token, the name of the RHS.
+    """
+    if len(tokens) == 1:
+        try:
+            return RANKS[tokens[0]]
+        except KeyError:
+            raise Exception(f"Failed to parse MPS file. (line: {tokens})")
+    if len(tokens) == 2:
+        return RANKS[b"ROWS"]
+    if len(tokens) in (3, 4) and tokens[0] in BOUND_TYPES:
+        return RANKS[b"BOUNDS"]
+    if tokens[0] == rhs_name:
+        return RANKS[b"RHS"]
+    return RANKS[b"COLUMNS"]
+
+
+def _first_line(
+    data, start: int, end: int, predicate: Callable[[List[bytes]], bool]
+) -> int:
+    """
+    Returns the start of the first line in [start, end) for which predicate(tokens) is True
+    (or end), assuming it's False for all the lines before and True for all the lines after.
+    """
+    low, high = start, end
+    while low < high:
+        middle = (low + high) // 2
+        line_start, tokens = _tokens_at(data, middle, end)
+        if line_start >= end or predicate(tokens):
+            high = middle
+        else:
+            low = line_start + 1
+    return _tokens_at(data, low, end)[0]
+
+
+def _after_header(data, header_start: int, end: int) -> int:
+    """Returns the offset of the line after the header line starting at header_start."""
+    return data.find(b"\n", header_start, end) + 1 or end
+
+
+def locate_sections(data) -> Dict[str, Tuple[int, int]]:
+    """
+    Returns the byte range of the lines of the ROWS, COLUMNS, RHS and BOUNDS sections
+    (without their header) of an .mps file as bytes or mmap, reading only a few pages.
+    """
+    end = len(data)
+
+    def header_of(rank: int, start: int, rhs_name: Optional[bytes] = None) -> int:
+        return _first_line(
+            data, start, end, lambda tokens: _line_rank(tokens, rhs_name) >= rank
+        )
+
+    # The NAME line has 2 tokens like the lines of the ROWS section but both are at
+    # the start of the file
+    rows_header = (find_header(data, "ROWS") or (end, end))[0]
+    rows_start = _after_header(data, rows_header, end)
+    columns_header = header_of(RANKS[b"COLUMNS"], rows_start)
+    columns_start = _after_header(data, columns_header, end)
+    bounds_header = header_of(RANKS[b"BOUNDS"], columns_start)
+    for header, keyword in (
+        (rows_header, b"ROWS"),
+        (columns_header, b"COLUMNS"),
+        (bounds_header, b"BOUNDS"),
+    ):
+        tokens = _tokens_at(data, header, end)[1]
+        # The BOUNDS section is optional
+        if tokens != [keyword] and not (keyword == b"BOUNDS" and tokens == [b"ENDATA"]):
+            raise Exception(f"Failed to parse MPS file. (line: {tokens})")
+    has_bounds = _tokens_at(data, bounds_header, end)[1] == [b"BOUNDS"]
+
+    # The line before the BOUNDS (or ENDATA) header is the last line of the RHS section
+    # (if any) which gives the name of the RHS
+    last_line, last_tokens = _tokens_before(data, columns_start, bounds_header)
+    rhs_header = bounds_header
+    if last_tokens == [b"RHS"]:
+        rhs_header = last_line
+    elif last_tokens and _line_rank(last_tokens) == RANKS[b"COLUMNS"]:
+        candidate = header_of(RANKS[b"RHS"], columns_start, last_tokens[0])
+        if _tokens_at(data, candidate, end)[1] == [b"RHS"]:
+            rhs_header = candidate
+    if has_bounds:
+        bounds_start = _after_header(data, bounds_header, end)
+        bounds_end = header_of(RANKS[b"ENDATA"], bounds_start)
+    else:
+        bounds_start = bounds_end = bounds_header
+    return {
+        "ROWS": (rows_start, columns_header),
+        "COLUMNS": (columns_start, rhs_header),
+        "RHS": (_after_header(data, rhs_header, bounds_header), bounds_header),
+        "BOUNDS": (bounds_start, bounds_end),
+    }
+
+
+def find_objective(data, rows_start: int, rows_end: int) -> Optional[bytes]:
+    """Returns the name of the first row of type N (usually the first row), if any."""
+    offset = rows_start
+    while offset < rows_end:
+        offset, tokens = _tokens_at(data, offset, rows_end)
+        if tokens and tokens[0] == b"N":
+            return tokens[1]
+        offset += 1
+    return None
+
+
+def sample_slots(
+    sections: Dict[str, Tuple[int, int]], budget: int, chunk_size: int, seed=0
+) -> Dict[str, Tuple[int, int, List[int]]]:
+    """
+    Returns, for each section, the size and number of its slots and the sorted offsets of
+    the sampled slots. The budget is shared in proportion to the size of the sections, each
+    non-empty section getting at least one slot. Slots are of chunk_size bytes, or smaller
+    if the share of a section would hold fewer than MIN_SAMPLED_SLOTS of them.
+    """
+    total_size = sum(end - start for start, end in sections.values())
+    rng = random.Random(seed)
+    samples = {}
+    for keyword, (start, end) in sections.items():
+        size = end - start
+        if total_size <= budget:
+            slot_size = chunk_size
+            slots = sampled = -(-size // slot_size)
+        else:
+            share = budget * size / total_size
+            slot_size = int(
+                min(chunk_size, max(share // MIN_SAMPLED_SLOTS, MIN_CHUNK_SIZE))
+            )
+            slots = -(-size // slot_size)
+            sampled = min(slots, max(round(share / slot_size), 1))
+        offsets = sorted(rng.sample(range(slots), sampled))
+        samples[keyword] = (slot_size, slots, [start + i * slot_size for i in offsets])
+    return samples
+
+
+def t_quantile(degrees: int) -> float:
+    """Returns the 97.5% quantile of Student's t distribution."""
+    if degrees <= len(T_95):
+        return T_95[degrees - 1]
+    # Cornish-Fisher expansion, within 1e-4 from 30 degrees of freedom
+    z = Z_95
+    return (
+        z
+        + (z**3 + z) / (4 * degrees)
+        + (5 * z**5 + 16 * z**3 + 3 * z) / (96 * degrees**2)
+    )
+
+
+class _SampledFamilies:
+    """The statistics of the families of variables (or constraints) in the sampled lines."""
+
+    def __init__(self):
+        self.ids: Dict[bytes, int] = {}
+        self.names: List[str] = []
+        self.sampled_coefs: List[int] = []
+        # Number of sampled slots with coefficients of the family
+        self.sampled_chunks: List[int] = []
+        self.min_coef: List[float] = []
+        self.max_coef: List[float] = []
+        # Of the RHS values (or bounds)
+        self.min_value: List[float] = []
+        self.max_value: List[float] = []
+        # Per section, the number of slots and the counts of each family in each sampled slot
+        # (e.g. "rows", "nonzeros")
+        self.slot_counts: Dict[str, Tuple[int, List[np.ndarray]]] = {}
+
+    def family_ids(self, names: np.ndarray) -> np.ndarray:
+        ids = self.ids
+
+        def family_id(name: bytes) -> int:
+            family = name.partition(b"(")[0]
+            family_id = ids.get(family)
+            if family_id is None:
+                family_id = ids[family] = len(self.names)
+                self.names.append(family.decode())
+                self.sampled_coefs.append(0)
+                self.sampled_chunks.append(0)
+                for stats in (self.min_coef, self.min_value):
+                    stats.append(math.inf)
+                for stats in (self.max_coef, self.max_value):
+                    stats.append(0.0)
+            return family_id
+
+        return np.fromiter(map(family_id, names), dtype=np.int64, count=len(names))
+
+    def add_slot(self, count: str, num_slots: int, family_ids: np.ndarray):
+        """Adds the number of items (e.g. rows) of each family in a sampled slot."""
+        self.slot_counts.setdefault(count, (num_slots, []))[1].append(
+            np.bincount(family_ids, minlength=len(self.names))
+        )
+
+    def add_values(
+        self, family_ids: np.ndarray, values: np.ndarray, coefficients: bool
+    ):
+        """
+        Updates the range of the absolute non-zero (and finite) values of each family with
+        those of a sampled slot.
+        """
+        values = np.abs(values)
+        kept = (values != 0) & np.isfinite(values)
+        family_ids, values = family_ids[kept], values[kept]
+        order = np.argsort(family_ids, kind="stable")
+        starts, families = segments(family_ids[order])
+        if not len(starts):
+            return
+        values = values[order]
+        lows = np.minimum.reduceat(values, starts).tolist()
+        highs = np.maximum.reduceat(values, starts).tolist()
+        counts = np.diff(np.r_[starts, len(values)]).tolist()
+        if coefficients:
+            mins, maxs = self.min_coef, self.max_coef
+        else:
+            mins, maxs = self.min_value, self.max_value
+        for family, low, high, count in zip(families.tolist(), lows, highs, counts):
+            mins[family] = min(mins[family], low)
+            maxs[family] = max(maxs[family], high)
+            if coefficients:
+                self.sampled_coefs[family] += count
+                self.sampled_chunks[family] += 1
+
+    def estimate(self, count: str) -> List[Estimate]:
+        """
+        Returns the estimated total of a count of each family and the half-width of its 95%
+        confidence interval (0 when the whole section was read).
+        """
+        if count not in self.slot_counts:
+            return [(0.0, 0.0)] * len(self.names)
+        num_slots, slots = self.slot_counts[count]
+        counts = np.zeros((len(slots), len(self.names)))
+        for i, slot in enumerate(slots):
+            counts[i, : len(slot)] = slot
+        n = len(slots)
+        totals = counts.sum(axis=0) * (num_slots / n)
+        if n >= num_slots:
+            return list(zip(totals.tolist(), [0.0] * len(self.names)))
+        if n < 2:
+            # The variance can't be estimated from a single slot
+            half_widths = np.full(len(self.names), math.inf)
+        else:
+            # Variance of the total of a simple random sample of n of the slots, which is
+            # only estimated from n slots
+            variances = counts.var(axis=0, ddof=1) * (1 - n / num_slots) / n
+            half_widths = t_quantile(n - 1) * num_slots * np.sqrt(variances)
+        # Families seen elsewhere (e.g. in another section) but in none of the slots
+        half_widths[totals == 0] = math.inf
+        return list(zip(totals.tolist(), half_widths.tolist()))
+
+
+def _format_estimate(estimate: Estimate) -> str:
+    total, half_width = estimate
+    if half_width == 0:
+        return f"{total:.0f}"
+    if math.isinf(half_width):
+        return f"{total:.0f} ± ?"
+    return f"{total:.0f} ± {half_width:.0f}"
+
+
+class ApproximateStat(TableRow):
+    """A row in a table of the estimated statistics of the families of variables."""
+
+    def __init__(
+        self,
+        name: str,
+        count: Estimate,
+        nonzeros: Estimate,
+        sampled_coefs: int,
+        sampled_chunks: int,
+        min_coef: float,
+        max_coef: float,
+        min_value: float,
+        max_value: float,
+    ):
+        self.name, self.count, self.nonzeros = name, count, nonzeros
+        self.sampled_coefs, self.sampled_chunks = sampled_coefs, sampled_chunks
+        self.min_coef, self.max_coef = min_coef, max_coef
+        self.min_value, self.max_value = min_value, max_value
+
+    def coef_range(self) -> Optional[float]:
+        if 0 < self.min_coef <= self.max_coef < math.inf:
+            return math.log10(self.max_coef) - math.log10(self.min_coef)
+        return None
+
+    def unseen_share(self) -> Optional[float]:
+        """
+        With 95% confidence, fewer than this share of the slots with coefficients of the
+        family hold one smaller than the sampled minimum (and as many hold one larger than
+        the sampled maximum).
+        """
+        # None if there are no coefficients or all of them were read
+        if self.sampled_chunks == 0 or self.nonzeros[1] == 0:
+            return None
+        return min(UNSEEN_FACTOR / self.sampled_chunks, 1.0)
+
+    def get_table_row(self):
+        coef_range, unseen_share = self.coef_range(), self.unseen_share()
+        return [
+            self.name,
+            _format_estimate(self.count),
+            _format_estimate(self.nonzeros),
+            self.sampled_coefs,
+            self.min_coef,
+            self.max_coef,
+            None if coef_range is None else int(coef_range),
+            self.min_value,
+            self.max_value,
+            None if unseen_share is None else f"{100 * unseen_share:.2g}%",
+        ]
+
+    def get_sort_key(self):
+        return self.coef_range() or 0
+
+    @staticmethod
+    def get_table_header():
+        return [
+            "Var Name",
+            "Col Count (est.)",
+            "Non-zeroes (est.)",
+            "Sampled coefs",
+            "Min coef",
+            "Max coef",
+            "Coef range",
+            "Min Bound",
+            "Max bound",
+            "Unseen (95%)",
+        ]
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "count": self.count[0],
+            "count_error": self.count[1],
+            "nonzeros": self.nonzeros[0],
+            "nonzeros_error": self.nonzeros[1],
+            "sampled_coefs": self.sampled_coefs,
+            "sampled_chunks": self.sampled_chunks,
+            "min_coef": None if math.isinf(self.min_coef) else self.min_coef,
+            "max_coef": self.max_coef or None,
+            "min_value": None if math.isinf(self.min_value) else self.min_value,
+            "max_value": self.max_value or None,
+        }
+
+
+class ApproximateConstraintStat(ApproximateStat):
+    """A row in a table of the estimated statistics of the families of constraints."""
+
+    @staticmethod
+    def get_table_header():
+        return [
+            "Constraint Name",
+            "Row count (est.)",
+            "Non-zeroes (est.)",
+            "Sampled coefs",
+            "Min coef",
+            "Max coef",
+            "Coef range",
+            "Min RHS",
+            "Max RHS",
+            "Unseen (95%)",
+        ]
+
+
+class ApproximateResult:
+    """The estimated statistics of each family and how much of the file they're based on."""
+
+    def __init__(
+        self,
+        file_size: int,
+        bytes_read: int,
+        num_chunks: int,
+        variable_stats: List[ApproximateStat],
+        constraint_stats: List[ApproximateConstraintStat],
+    ):
+        self.file_size, self.bytes_read = file_size, bytes_read
+        self.num_chunks = num_chunks
+        self.variable_stats = variable_stats
+        self.constraint_stats = constraint_stats
+
+    def report(self) -> str:
+        share = self.bytes_read / max(self.file_size, 1)
+        report = (
+            f"Approximate analysis from {self.bytes_read} of {self.file_size} bytes "
+            + f"({share:.2%}) in {self.num_chunks} random chunks.\n"
+            + "Counts are estimates with their 95% confidence interval, which assumes that "
+            + "the sampled chunks represent each family: counts of families concentrated "
+            + "in a few chunks can be off. Ranges are those of the sampled values: the "
+            + "true ranges can be wider. With 95% confidence, fewer than the 'Unseen' "
+            + "share of the chunks with coefficients of a family hold one smaller than its "
+            + "sampled minimum (and as many one larger than its maximum). "
+            + "Families without sampled lines are missing."
+        )
+        for stats in (self.variable_stats, self.constraint_stats):
+            if stats:
+                report += "\n\n" + make_table(stats)
+        return report
+
+    def save(self, output_file: str, json_file: Optional[str] = None):
+        """Saves the report and, optionally, the statistics as JSON."""
+        with open(output_file, "w") as f:
+            f.write(self.report())
+        print(f"Saved results to: {output_file}")
+        if json_file is not None:
+            with open(json_file, "w") as f:
+                json.dump(self.to_dict(), f, indent=2)
+            print(f"Saved statistics to: {json_file}")
+
+    def to_dict(self):
+        return {
+            "file_size": self.file_size,
+            "bytes_read": self.bytes_read,
+            "variables": [stat.to_dict() for stat in self.variable_stats],
+            "constraints": [stat.to_dict() for stat in self.constraint_stats],
+        }
+
+
+def _slot_lines(data, section_end, slot_start, chunk_size) -> Tuple[int, int]:
+    """Returns the byte range of the lines that start in the slot."""
+    slot_end = min(slot_start + chunk_size, section_end)
+    return (
+        _tokens_at(data, slot_start, section_end)[0],
+        _tokens_at(data, slot_end, section_end)[0],
+    )
+
+
+def approximate_analysis(
+    filename: str, budget=DEFAULT_BUDGET, chunk_size=DEFAULT_CHUNK_SIZE, seed=0
+) -> ApproximateResult:
+    """
+    Estimates the statistics of each family of an .mps file by reading random chunks of
+    about budget bytes in total (see the module docstring).
+
+    :param budget: number of bytes sampled from the file
+    :param chunk_size: number of bytes read at once (at most, see sample_slots)
+    :param seed: seed of the random choice of chunks
+    """
+    if is_compressed(filename) or is_lp_file(filename):
+        raise ValueError(
+            "The approximate analysis needs an uncompressed .mps file to read random chunks."
+        )
+    variables, constraints = _SampledFamilies(), _SampledFamilies()
+    bytes_read = num_chunks = 0
+    with open(filename, "rb") as file, mmap.mmap(
+        file.fileno(), 0, access=mmap.ACCESS_READ
+    ) as data:
+        with timed("Locating sections"):
+            sections = locate_sections(data)
+            objective = find_objective(data, *sections["ROWS"])
+        samples = sample_slots(sections, budget, chunk_size, seed)
+        chunks = []
+        for keyword in SAMPLED_SECTIONS:
+            slot_size, num_slots, slots = samples[keyword]
+            section_end = sections[keyword][1]
+            chunks += [
+                (keyword, num_slots) + _slot_lines(data, section_end, slot, slot_size)
+                for slot in slots
+            ]
+        for keyword, num_slots, start, end in print_progress(
+            chunks, message="Sampling model", check_progress_every=1
+        ):
+            tokens = _Tokens(data, start, end)
+            bytes_read += end - start
+            num_chunks += 1
+            if keyword == "ROWS":
+                tokens.check_line_lengths(2)
+                constraints.add_slot(
+                    "count", num_slots, constraints.family_ids(tokens.field(1))
+                )
+            elif keyword == "COLUMNS":
+                _sample_columns(
+                    data,
+                    sections[keyword][0],
+                    start,
+                    tokens,
+                    num_slots,
+                    objective,
+                    variables,
+                    constraints,
+                )
+            elif keyword == "RHS" and len(tokens):
+                tokens.check_line_lengths(3, 5)
+                entries = tokens.entries()
+                constraints.add_values(
+                    constraints.family_ids(tokens.tokens[entries]),
+                    tokens.tokens[entries + 1].astype(np.float64),
+                    coefficients=False,
+                )
+            elif keyword == "BOUNDS" and len(tokens):
+                tokens.check_line_lengths(3, 4)
+                has_value = tokens.line_starts[tokens.line_lengths == 4]
+                variables.add_values(
+                    variables.family_ids(tokens.tokens[has_value + 2]),
+                    tokens.tokens[has_value + 3].astype(np.float64),
+                    coefficients=False,
+                )
+
+    def make_stats(families: _SampledFamilies, stat_class):
+        return [
+            stat_class(*stats)
+            for stats in zip(
+                families.names,
+                families.estimate("count"),
+                families.estimate("nonzeros"),
+                families.sampled_coefs,
+                families.sampled_chunks,
+                families.min_coef,
+                families.max_coef,
+                families.min_value,
+                families.max_value,
+            )
+        ]
+
+    return ApproximateResult(
+        os.path.getsize(filename),
+        bytes_read,
+        num_chunks,
+        make_stats(variables, ApproximateStat),
+        make_stats(constraints, ApproximateConstraintStat),
+    )
+
+
+def _sample_columns(
+    data,
+    section_start: int,
+    chunk_start: int,
+    tokens: _Tokens,
+    num_slots: int,
+    objective: Optional[bytes],
+    variables: _SampledFamilies,
+    constraints: _SampledFamilies,
+):
+    """Adds the non-zeroes of a sampled chunk of the COLUMNS section."""
+    if len(tokens) and tokens.line_lengths.min() == 3:
+        tokens.without_lines(
+            (tokens.field(0) == b"MARKER") & (tokens.field(1) == b"'MARKER'")
+        )
+    if len(tokens):
+        tokens.check_line_lengths(3, 5)
+    entries = tokens.entries()
+    line_cols = tokens.field(0)
+    # A column starts on the lines whose variable isn't that of the line before, which
+    # for the first line of the chunk is the last line before the chunk
+    previous_cols = np.empty(len(line_cols), dtype=object)
+    previous_cols[1:] = line_cols[:-1]
+    if len(line_cols):
+        previous_tokens = _tokens_before(data, section_start, chunk_start)[1]
+        if previous_tokens:
+            previous_cols[0] = previous_tokens[0]
+    line_families = variables.family_ids(line_cols)
+    variables.add_slot("count", num_slots, line_families[line_cols != previous_cols])
+
+    col_ids = np.repeat(line_families, tokens.line_lengths // 2)
+    row_names = tokens.tokens[entries]
+    row_ids = constraints.family_ids(row_names)
+    values = tokens.tokens[entries + 1].astype(np.float64)
+    constraints.add_slot("nonzeros", num_slots, row_ids)
+    constraints.add_values(row_ids, values, coefficients=True)
+    # Like the statistics of the variables, without the objective
+    in_matrix = row_names != objective
+    variables.add_slot("nonzeros", num_slots, col_ids[in_matrix])
+    variables.add_values(col_ids[in_matrix], values[in_matrix], coefficients=True)
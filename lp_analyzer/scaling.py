@@ -0,0 +1,370 @@
+"""
+Provides suggest_scaling() which suggests a factor (a power of 10) for each family of variables
+and of constraints such that the coefficients of the matrix span fewer orders of magnitude.
+
+Factors are first computed for every row and column like solvers do: passes of geometric mean
+scaling (each row, then each column, is scaled such that the product of its smallest and largest
+coefficients is 1) until the range of the matrix stops improving, followed by one pass of
+equilibration (the largest coefficient of each row, then column, becomes 1).
+Since families are scaled in the code of the model rather than row by row, the factors of
+the rows (or columns) of each family are then averaged (geometrically) and rounded.
+
+Everything is computed on the log10 of the coefficients (as float32) with grouped reductions
+over the non-zeroes in row order and in column order, i.e. a few passes over arrays of
+the size of the matrix rather than a loop over its non-zeroes.
+"""
+import math
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .analyze import TableRow, make_table
+from .core import LPModel, SparseLPModel
+from .util import timed
+from .vectorized import as_numpy, nonzero_col_ids, segments
+
+DEFAULT_MAX_PASSES = 20
+# Geometric mean passes stop once the range of the matrix (in orders of magnitude)
+# improves by less than this
+DEFAULT_TOLERANCE = 0.01
+
+# The minimum and maximum log10 of the absolute coefficients, or None without coefficients
+LogRange = Optional[Tuple[float, float]]
+
+
+class LogMatrix:
+    """
+    The log10 of the absolute non-zero coefficients of the matrix (without the objective),
+    both in column order (like the SparseLPModel) and in row order, such that the coefficients
+    of each row and of each column are contiguous.
+    """
+
+    def __init__(self, model: SparseLPModel):
+        row_ids = as_numpy(model.row_indices)
+        col_ids = nonzero_col_ids(model)
+        values = as_numpy(model.values)
+        keep = values != 0
+        if model.objective is not None:
+            keep &= row_ids != model.objective
+        # Column order
+        self.row_ids = row_ids[keep]
+        self.log_values = np.log10(np.abs(values[keep])).astype(np.float32)
+        col_ids = col_ids[keep]
+        self.col_starts, self.cols = segments(col_ids)
+        # Row order
+        by_row = np.argsort(self.row_ids, kind="stable")
+        self.row_log_values = self.log_values[by_row]
+        self.col_ids = col_ids[by_row]
+        self.row_starts, self.rows = segments(self.row_ids[by_row])
+        self.num_rows, self.num_cols = model.num_rows, model.num_cols
+
+    def __len__(self):
+        return len(self.log_values)
+
+    def row_extremes(self, col_offsets: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the minimum and maximum of each row (of self.rows) once the columns are scaled,
+        i.e. col_offsets (log10 of the factors) are added to their coefficients.
+        """
+        scaled = self.row_log_values + col_offsets[self.col_ids]
+        return (
+            np.minimum.reduceat(scaled, self.row_starts),
+            np.maximum.reduceat(scaled, self.row_starts),
+        )
+
+    def col_extremes(self, row_offsets: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the minimum and maximum of each column (of self.cols) once the rows are scaled."""
+        scaled = self.log_values + row_offsets[self.row_ids]
+        return (
+            np.minimum.reduceat(scaled, self.col_starts),
+            np.maximum.reduceat(scaled, self.col_starts),
+        )
+
+    def log_range(self, row_offsets: np.ndarray, col_offsets: np.ndarray) -> LogRange:
+        if len(self) == 0:
+            return None
+        low, high = self.col_extremes(row_offsets)
+        low, high = low + col_offsets[self.cols], high + col_offsets[self.cols]
+        return float(low.min()), float(high.max())
+
+
+def scale_rows_and_columns(
+    matrix: LogMatrix,
+    max_passes=DEFAULT_MAX_PASSES,
+    tolerance=DEFAULT_TOLERANCE,
+    equilibrate=True,
+) -> Tuple[np.ndarray, np.ndarray, int]:
+    """
+    Returns the log10 of the scaling factor of each row and of each column
+    and the number of geometric mean passes.
+    """
+    row_offsets = np.zeros(matrix.num_rows, dtype=np.float32)
+    col_offsets = np.zeros(matrix.num_cols, dtype=np.float32)
+    if len(matrix) == 0:
+        return row_offsets, col_offsets, 0
+
+    spread = math.inf
+    passes = 0
+    while passes < max_passes:
+        passes += 1
+        low, high = matrix.row_extremes(col_offsets)
+        row_offsets[matrix.rows] = -(low + high) / 2
+        low, high = matrix.col_extremes(row_offsets)
+        col_offsets[matrix.cols] = -(low + high) / 2
+        # Once scaled, each column spans [-(high - low) / 2, (high - low) / 2]
+        # hence the range of the matrix is that of its widest column
+        new_spread = float(np.max(high - low))
+        if spread - new_spread < tolerance:
+            break
+        spread = new_spread
+
+    if equilibrate:
+        _, high = matrix.row_extremes(col_offsets)
+        row_offsets[matrix.rows] = -high
+        _, high = matrix.col_extremes(row_offsets)
+        col_offsets[matrix.cols] = -high
+    return row_offsets, col_offsets, passes
+
+
+def family_exponents(
+    name_families: np.ndarray, ids: np.ndarray, offsets: np.ndarray, num_families
+) -> np.ndarray:
+    """
+    Returns the power of 10 closest to the geometric mean of the factors of the rows
+    (or columns) ids of each family. Families without any are not scaled (0).
+    """
+    families = name_families[ids]
+    counts = np.bincount(families, minlength=num_families)
+    sums = np.bincount(families, weights=offsets[ids], minlength=num_families)
+    means = np.divide(sums, counts, out=np.zeros(num_families), where=counts > 0)
+    # + 0 such that -0 becomes 0
+    return np.rint(means).astype(np.int64) + 0
+
+
+def family_log_ranges(
+    name_families: np.ndarray,
+    ids: np.ndarray,
+    low: np.ndarray,
+    high: np.ndarray,
+    num_families,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the minimum and maximum of the rows (or columns) of each family
+    given those of the rows ids. Families without any are inf and -inf.
+    """
+    families = name_families[ids]
+    order = np.argsort(families, kind="stable")
+    starts, present = segments(families[order])
+    family_low = np.full(num_families, np.inf)
+    family_high = np.full(num_families, -np.inf)
+    if len(order):
+        family_low[present] = np.minimum.reduceat(low[order], starts)
+        family_high[present] = np.maximum.reduceat(high[order], starts)
+    return family_low, family_high
+
+
+class FamilyScaling(TableRow):
+    """A row of the table of suggested factors: a family and its coefficients once scaled."""
+
+    def __init__(
+        self,
+        kind: str,
+        name: str,
+        exponent: int,
+        before: Tuple[float, float],
+        after: Tuple[float, float],
+    ):
+        self.kind, self.name, self.exponent = kind, name, exponent
+        self.before, self.after = before, after
+
+    @property
+    def factor(self) -> float:
+        return 10.0**self.exponent
+
+    def get_table_row(self):
+        return [
+            self.name,
+            f"1e{self.exponent:+03d}" if self.exponent else "1",
+            f"{self.before[1] - self.before[0]:.1f}",
+            f"{self.after[1] - self.after[0]:.1f}",
+            10.0 ** self.after[0],
+            10.0 ** self.after[1],
+        ]
+
+    def get_sort_key(self):
+        return self.before[1] - self.before[0]
+
+    def get_table_header(self):
+        return [
+            "Var Name" if self.kind == "Variable" else "Constraint Name",
+            "Suggested factor",
+            "Coef range",
+            "Coef range after",
+            "Min coef after",
+            "Max coef after",
+        ]
+
+
+def _format_range(log_range: LogRange) -> str:
+    if log_range is None:
+        return "no coefficients"
+    low, high = log_range
+    return f"{high - low:.1f} orders of magnitude ({10 ** low:.1e} to {10 ** high:.1e})"
+
+
+class ScalingResult:
+    """The suggested factor of each family of variables and constraints."""
+
+    def __init__(
+        self,
+        variable_scaling: List[FamilyScaling],
+        constraint_scaling: List[FamilyScaling],
+        passes: int,
+        matrix_range: LogRange,
+        scaled_range: LogRange,
+        best_range: LogRange,
+        objective_range: LogRange,
+        scaled_objective_range: LogRange,
+    ):
+        self.variable_scaling = variable_scaling
+        self.constraint_scaling = constraint_scaling
+        self.passes = passes
+        # Range of the matrix before, after scaling the families and after scaling each
+        # row and column
+        self.matrix_range = matrix_range
+        self.scaled_range = scaled_range
+        self.best_range = best_range
+        self.objective_range = objective_range
+        self.scaled_objective_range = scaled_objective_range
+
+    def report(self) -> str:
+        report = (
+            "Suggested scaling of each family\n\n"
+            + "Multiply each constraint of a family by its factor (and its RHS by the same factor).\n"
+            + "Replace each variable x of a family by factor * x', i.e. multiply its coefficients "
+            + "(including in the objective) by the factor and divide its bounds by it.\n\n"
+            + f"Coefficients of the matrix: {_format_range(self.matrix_range)}\n"
+            + f"After scaling the families: {_format_range(self.scaled_range)}\n"
+            + f"After scaling each row and column ({self.passes} geometric mean passes): "
+            + f"{_format_range(self.best_range)}\n"
+            + f"Objective: {_format_range(self.objective_range)}, "
+            + f"after scaling the variables: {_format_range(self.scaled_objective_range)}"
+        )
+        for scaling in (self.variable_scaling, self.constraint_scaling):
+            if scaling:
+                report += "\n\n" + make_table(scaling)
+        return report
+
+    def save(self, outfile):
+        with open(outfile, "w") as f:
+            f.write(self.report())
+
+
+def suggest_scaling(
+    model,
+    max_passes=DEFAULT_MAX_PASSES,
+    tolerance=DEFAULT_TOLERANCE,
+    equilibrate=True,
+) -> ScalingResult:
+    """
+    Suggests a power of 10 to scale each family of variables and of constraints by.
+    An LPModel is first converted to a SparseLPModel.
+
+    :param max_passes: maximum number of geometric mean passes
+    :param tolerance: the passes stop once the range of the matrix (in orders of magnitude)
+        improves by less than this
+    :param equilibrate: whether to equilibrate the rows and columns after the passes
+    """
+    if isinstance(model, LPModel):
+        model = SparseLPModel.from_lp_model(model)
+
+    with timed("Computing scaling factors"):
+        matrix = LogMatrix(model)
+        row_offsets, col_offsets, passes = scale_rows_and_columns(
+            matrix, max_passes, tolerance, equilibrate
+        )
+
+        row_families = as_numpy(model.row_table.name_families)
+        col_families = as_numpy(model.col_table.name_families)
+        num_row_families = len(model.row_table.families)
+        num_col_families = len(model.col_table.families)
+        row_exponents = family_exponents(
+            row_families, matrix.rows, row_offsets, num_row_families
+        )
+        col_exponents = family_exponents(
+            col_families, matrix.cols, col_offsets, num_col_families
+        )
+        family_row_offsets = row_exponents[row_families].astype(np.float32)
+        family_col_offsets = col_exponents[col_families].astype(np.float32)
+        unscaled_rows = np.zeros(matrix.num_rows, dtype=np.float32)
+        unscaled_cols = np.zeros(matrix.num_cols, dtype=np.float32)
+
+        def ranges(row_offsets, col_offsets):
+            """Returns the ranges of each family of rows and of columns once scaled."""
+            low, high = matrix.row_extremes(col_offsets)
+            offsets = row_offsets[matrix.rows]
+            row_ranges = family_log_ranges(
+                row_families,
+                matrix.rows,
+                low + offsets,
+                high + offsets,
+                num_row_families,
+            )
+            low, high = matrix.col_extremes(row_offsets)
+            offsets = col_offsets[matrix.cols]
+            col_ranges = family_log_ranges(
+                col_families,
+                matrix.cols,
+                low + offsets,
+                high + offsets,
+                num_col_families,
+            )
+            return row_ranges, col_ranges
+
+        row_before, col_before = ranges(unscaled_rows, unscaled_cols)
+        row_after, col_after = ranges(family_row_offsets, family_col_offsets)
+
+        variable_scaling = [
+            FamilyScaling(
+                "Variable",
+                model.col_table.families[family],
+                int(col_exponents[family]),
+                (float(col_before[0][family]), float(col_before[1][family])),
+                (float(col_after[0][family]), float(col_after[1][family])),
+            )
+            for family in np.flatnonzero(np.isfinite(col_before[0])).tolist()
+        ]
+        constraint_scaling = [
+            FamilyScaling(
+                "Constraint",
+                model.row_table.families[family],
+                int(row_exponents[family]),
+                (float(row_before[0][family]), float(row_before[1][family])),
+                (float(row_after[0][family]), float(row_after[1][family])),
+            )
+            for family in np.flatnonzero(np.isfinite(row_before[0])).tolist()
+        ]
+
+        # The objective is only scaled by the factors of the variables
+        objective_range = scaled_objective_range = None
+        if model.objective is not None:
+            row_ids = as_numpy(model.row_indices)
+            values = as_numpy(model.values)
+            in_objective = (row_ids == model.objective) & (values != 0)
+            if in_objective.any():
+                log_values = np.log10(np.abs(values[in_objective]))
+                col_ids = nonzero_col_ids(model)[in_objective]
+                scaled = log_values + family_col_offsets[col_ids]
+                objective_range = float(log_values.min()), float(log_values.max())
+                scaled_objective_range = float(scaled.min()), float(scaled.max())
+
+        return ScalingResult(
+            variable_scaling,
+            constraint_scaling,
+            passes,
+            matrix.log_range(unscaled_rows, unscaled_cols),
+            matrix.log_range(family_row_offsets, family_col_offsets),
+            matrix.log_range(row_offsets, col_offsets),
+            objective_range,
+            scaled_objective_range,
+        )
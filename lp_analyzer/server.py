@@ -0,0 +1,303 @@
+"""
+Provides make_server() which answers analysis requests on a local Unix socket or on a localhost
+HTTP port, keeping the models it read in memory such that the next questions about the same
+model don't pay for starting Python, importing the analysis modules and parsing the file again.
+
+Models are read with the numpy engine (SparseLPModel) and kept in a ModelStore, a least
+recently used cache whose estimated memory (see batch.estimate_memory) is capped. A model is
+read again once its file changes (size or modification time).
+
+Requests are JSON objects POSTed to /analyze, /drilldown or /check with the path of the model
+("input_file") and the options of the matching command, and /status (GET) lists the models
+in memory. Answers are JSON objects with the text of the report ("report") and the results.
+See client.py for a thin client.
+"""
+import collections
+import concurrent.futures
+import http.server
+import json
+import os
+import socketserver
+import threading
+import time
+import urllib.parse
+from typing import Callable, Dict, Optional, Tuple
+
+from .analyze import get_density, get_stats, make_json, make_report
+from .batch import estimate_memory
+from .check import Thresholds, check_model
+from .client import DEFAULT_PORT
+from .drilldown import DEFAULT_TOP_VALUES, get_drilldown
+
+DEFAULT_MEMORY_CAP = 4 << 30
+
+# The path, size and modification time of a model file
+ModelKey = Tuple[str, int, int]
+
+
+class ModelStore:
+    """
+    The models read most recently, up to an estimated memory_cap bytes
+    (the model read last is always kept, even if it's larger).
+    """
+
+    def __init__(self, memory_cap=DEFAULT_MEMORY_CAP, read: Optional[Callable] = None):
+        """:param read: reads the model of a path (default: with the numpy engine)"""
+        self.memory_cap = memory_cap
+        self._read = read or _read_model
+        # From least to most recently used, with their estimated memory
+        self._models: "collections.OrderedDict[ModelKey, Tuple[object, int]]" = (
+            collections.OrderedDict()
+        )
+        # The models being read, such that concurrent requests don't read a model twice
+        self._reading: Dict[ModelKey, concurrent.futures.Future] = {}
+        # Only held to look up and update the models, not while reading one
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    @property
+    def memory(self) -> int:
+        return sum(size for _, size in self._models.values())
+
+    def get(self, path: str):
+        """
+        Returns the model of the file, reading it if it isn't in memory (or waiting for
+        the request already reading it).
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        key = (path, stat.st_size, stat.st_mtime_ns)
+        is_reader = False
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                self.hits += 1
+                return self._models[key][0]
+            reading = self._reading.get(key)
+            if reading is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+                reading = self._reading[key] = concurrent.futures.Future()
+                is_reader = True
+        if not is_reader:
+            # Another request is reading the model
+            return reading.result()
+
+        try:
+            model = self._read(path)
+        except BaseException as e:
+            with self._lock:
+                del self._reading[key]
+            reading.set_exception(e)
+            raise
+        memory = estimate_memory(path, "numpy")
+        with self._lock:
+            del self._reading[key]
+            # Older versions of the file won't be asked for anymore
+            for old_key in [old_key for old_key in self._models if old_key[0] == path]:
+                del self._models[old_key]
+            self._models[key] = (model, memory)
+            while self.memory > self.memory_cap and len(self._models) > 1:
+                self._models.popitem(last=False)
+        reading.set_result(model)
+        return model
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "models": [
+                    {"input_file": path, "memory": size}
+                    for (path, _, _), (_, size) in reversed(self._models.items())
+                ],
+                "reading": [path for path, _, _ in self._reading],
+                "memory": self.memory,
+                "memory_cap": self.memory_cap,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+def _read_model(path: str):
+    # Imported here since __main__ imports this module
+    from .__main__ import read_model
+
+    return read_model(path, "numpy")
+
+
+def analyze(model, options: dict) -> dict:
+    var_stats, constraint_stats = get_stats(model, options.get("top_k", 0))
+    density = get_density(
+        model,
+        options.get("top_dense"),
+        options.get("dense_row_threshold"),
+        options.get("dense_col_threshold"),
+    )
+    return {
+        "report": make_report(var_stats, constraint_stats, density),
+        "statistics": make_json(var_stats, constraint_stats, density),
+    }
+
+
+def drilldown(model, options: dict) -> dict:
+    result = get_drilldown(
+        model, options.get("top", DEFAULT_TOP_VALUES), options.get("family")
+    )
+    return {"report": result.report(), "drilldown": result.to_dict()}
+
+
+def check(model, options: dict) -> dict:
+    """Like 'lp-analyzer check': min and max apply to the values without their own limit."""
+
+    def limit(kind):
+        value = options.get(kind)
+        return options.get(kind.split("_")[0]) if value is None else value
+
+    thresholds = Thresholds(
+        *map(
+            limit,
+            ("min_coef", "max_coef", "min_rhs", "max_rhs", "min_bound", "max_bound"),
+        )
+    )
+    if thresholds.is_empty():
+        raise ValueError("No thresholds given (e.g. max 1e9 and min 1e-9).")
+    violations = check_model(model, thresholds, options.get("max_violations", 1))
+    lines = [str(violation) for violation in violations]
+    lines.append(
+        f"FAILED, {len(violations)} value(s) outside of the thresholds"
+        if violations
+        else "OK"
+    )
+    return {
+        "report": "\n".join(lines),
+        "violations": [violation.to_dict() for violation in violations],
+        "failed": bool(violations),
+    }
+
+
+ENDPOINTS: Dict[str, Callable[[object, dict], dict]] = {
+    "/analyze": analyze,
+    "/drilldown": drilldown,
+    "/check": check,
+}
+
+
+# A web page can resolve its own host name to 127.0.0.1 (DNS rebinding) and then send
+# requests to the server, which would read any file. Browsers keep the page's host name
+# in the Host header, so requests must name the local host.
+ALLOWED_HOSTS = {"localhost", "127.0.0.1", "::1"}
+
+
+class RequestHandler(http.server.BaseHTTPRequestHandler):
+    server: "AnalysisServer"
+
+    def address_string(self):
+        # Clients of Unix sockets have no address
+        return self.client_address[0] if self.client_address else "local"
+
+    def _answer(self, status: int, answer: dict):
+        body = json.dumps(answer).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self) -> bytes:
+        # Also read the body of the requests that are rejected: closing the connection
+        # before would fail the client with a broken pipe instead of giving it the answer.
+        try:
+            length = max(int(self.headers.get("Content-Length", 0)), 0)
+        except ValueError:
+            length = 0
+        return self.rfile.read(length)
+
+    def _check_host(self) -> bool:
+        host = self.headers.get("Host")
+        if host is None or urllib.parse.urlsplit("//" + host).hostname in ALLOWED_HOSTS:
+            return True
+        self._answer(403, {"error": f"Host {host} isn't the local host"})
+        return False
+
+    def do_GET(self):
+        self._read_body()
+        if not self._check_host():
+            return
+        if self.path != "/status":
+            self._answer(404, {"error": f"Unknown endpoint {self.path}"})
+            return
+        status = self.server.store.status()
+        memory, memory_cap = status["memory"] / 2**20, status["memory_cap"] / 2**20
+        lines = (
+            [
+                f"{len(status['models'])} model(s) in memory "
+                + f"({memory:.0f} of {memory_cap:.0f} MB), "
+                + f"{status['hits']} hit(s), {status['misses']} miss(es)"
+            ]
+            + [f"{path}: being read" for path in status["reading"]]
+            + [
+                f"{model['input_file']}: {model['memory'] / 2 ** 20:.0f} MB"
+                for model in status["models"]
+            ]
+        )
+        self._answer(200, {"report": "\n".join(lines), **status})
+
+    def do_POST(self):
+        body = self._read_body()
+        if not self._check_host():
+            return
+        endpoint = ENDPOINTS.get(self.path)
+        if endpoint is None:
+            self._answer(404, {"error": f"Unknown endpoint {self.path}"})
+            return
+        try:
+            options = json.loads(body)
+            start = time.perf_counter()
+            model = self.server.store.get(options["input_file"])
+            answer = endpoint(model, options)
+        except (KeyError, ValueError, TypeError, OSError) as e:
+            self._answer(400, {"error": f"{type(e).__name__}: {e}"})
+            return
+        except Exception as e:
+            # E.g. a file that isn't a model, which the readers report with an Exception.
+            # The client gets the error instead of a closed connection.
+            self._answer(500, {"error": f"{type(e).__name__}: {e}"})
+            return
+        answer["seconds"] = time.perf_counter() - start
+        self._answer(200, answer)
+
+
+class AnalysisServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, store: ModelStore):
+        super().__init__(address, RequestHandler)
+        self.store = store
+
+
+class UnixAnalysisServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, store: ModelStore):
+        super().__init__(socket_path, RequestHandler)
+        self.store = store
+
+    def server_close(self):
+        super().server_close()
+        os.remove(self.server_address)
+
+
+def make_server(
+    socket_path: Optional[str] = None,
+    port=DEFAULT_PORT,
+    memory_cap=DEFAULT_MEMORY_CAP,
+):
+    """
+    Returns a server listening on the Unix socket if given, else on localhost:port.
+    Call serve_forever() to answer requests and server_close() to stop.
+    """
+    store = ModelStore(memory_cap)
+    if socket_path is not None:
+        return UnixAnalysisServer(socket_path, store)
+    # Only on localhost since the server reads any file it's asked for
+    return AnalysisServer(("localhost", port), store)
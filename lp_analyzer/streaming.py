@@ -0,0 +1,432 @@
+"""
+Provides stream_analysis() which computes the same statistics as get_stats() and get_density()
+while reading an .mps file, without building a model.
+
+StreamingAnalyzer is an MPSReader whose COLUMNS, RHS and BOUNDS lines update the statistics
+of each family directly. Only the rows are kept (their family, number of non-zeroes, smallest
+and largest coefficient and RHS value) along with a few values per family of variables, so the
+memory is proportional to the number of rows rather than to the number of non-zeroes.
+
+The statistics are identical to those of the Python engine, which goes through the non-zeroes
+in row-major order while the file is in column-major order: ties between equal coefficients
+are broken by their position in row-major order and the families are listed in the order the
+Python engine would find them. This assumes, like every writer of .mps files, that the lines
+of each column (and the bounds of each variable) are consecutive.
+"""
+import heapq
+import os
+from bisect import bisect_right
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .analyze import ConstraintStat, VariableStat, set_extreme_coefs
+from .core import DECADE_EDGES, ExtremeValues, IndexSet, NameTable, split_type_and_index
+from .density import (
+    DEFAULT_TOP_N,
+    DENSE_RATIO,
+    MIN_DENSE,
+    DenseEntry,
+    DensityStats,
+    FamilyDensity,
+    default_threshold,
+    densest,
+    family_density,
+)
+from .files import open_model_file
+from .reader import MPSReader
+from .util import iter_lines, print_progress
+
+
+class _VariableFamily:
+    """The statistics of a family of variables accumulated while reading."""
+
+    __slots__ = (
+        "name",
+        "stat",
+        "order",
+        "min_key",
+        "max_key",
+        "extremes",
+        "column_lengths",
+        "max_length",
+        "densest_name",
+    )
+
+    def __init__(self, name: str):
+        self.name = name
+        # Created at the first non-zero (outside of the objective) or bound of the family
+        self.stat: Optional[VariableStat] = None
+        # Where the Python engine would create the statistics of the family
+        self.order: Tuple[int, int] = (1, 0)
+        # Row-major keys (row id << 32 | column id) of the minimum and maximum coefficients
+        self.min_key = self.max_key = -1
+        self.extremes: Optional[ExtremeValues] = None
+        # Number of columns of each number of non-zeroes (without the objective)
+        self.column_lengths: Counter = Counter()
+        self.max_length = 0
+        self.densest_name: Optional[str] = None
+
+
+class StreamingAnalyzer(MPSReader):
+    """
+    StreamingAnalyzer reads an .mps file and returns the statistics of each family
+    (see stream_analysis) instead of a LPModel.
+
+    Like MPSReader, changes should only be made once their performance has been tested.
+    """
+
+    def __init__(self, filename, top_k=0, threaded_decompression=True):
+        super().__init__(filename, threaded_decompression)
+        self.model = None
+        self.top_k = top_k
+
+        # Rows, in the order of the ROWS section
+        self.row_ids: Dict[str, int] = {}
+        self.row_names: List[str] = []
+        self.row_table = NameTable()
+        self.objective: Optional[int] = None
+        self.row_stats: List[ConstraintStat] = []
+        self.row_counts: List[int] = []
+        self.row_min: List[float] = []
+        self.row_max: List[float] = []
+        self.row_min_col: List[Optional[str]] = []
+        self.row_max_col: List[Optional[str]] = []
+        self.rhs: List[Optional[float]] = []
+        self.constraint_stats: Dict[str, ConstraintStat] = {}
+        self.constraint_extremes: Dict[str, ExtremeValues] = {}
+
+        # Families of variables, in the order of their first column
+        self.variable_families: Dict[str, _VariableFamily] = {}
+        self._num_stats = 0
+        self._current_column: Optional[str] = None
+        self._family: Optional[_VariableFamily] = None
+        self._col_id = -1
+        self._col_length = 0
+        # The densest columns as (number of non-zeroes, -column id, name)
+        self._densest_cols: List[Tuple[int, int, str]] = []
+        self._top_dense = DEFAULT_TOP_N
+        # The bounds of the variable being read
+        self._bound_name: Optional[str] = None
+        self._lower: Optional[float] = None
+        self._upper: Optional[float] = None
+
+    def analyze(
+        self,
+        top_dense=DEFAULT_TOP_N,
+        dense_row_threshold: Optional[int] = None,
+        dense_col_threshold: Optional[int] = None,
+    ) -> Tuple[List[VariableStat], List[ConstraintStat], DensityStats]:
+        self._top_dense = top_dense
+        with open_model_file(self.filename, self.threaded_decompression) as (
+            file,
+            get_position,
+        ):
+            lines = print_progress(
+                iter_lines(file),
+                message="Reading and analyzing model",
+                total=os.path.getsize(self.filename),
+                get_position=get_position,
+            )
+            self._parse_lines(lines)
+        # This ensures we really reached the end of parsing
+        assert self.function_to_run(None)
+        self._end_column()
+        self._end_bounds()
+        return (
+            self._variable_stats(),
+            self._constraint_stats(),
+            self._density(top_dense, dense_row_threshold, dense_col_threshold),
+        )
+
+    def _read_row(self, row: List):
+        """Read a line from the ROWS section"""
+        row_type, row_name = row[0], row[1]
+        assert row_name not in self.row_ids
+        row_id = self.row_ids[row_name] = len(self.row_names)
+        self.row_names.append(row_name)
+        self.row_table.add(row_name)
+        family = self.row_table.family_of(row_id)
+        stat = self.constraint_stats.get(family)
+        if stat is None:
+            stat = self.constraint_stats[family] = ConstraintStat(family)
+        self.row_stats.append(stat)
+        self.row_counts.append(0)
+        self.row_min.append(float("inf"))
+        self.row_max.append(0)
+        self.row_min_col.append(None)
+        self.row_max_col.append(None)
+        self.rhs.append(0.0)
+        if row_type == "N":
+            if self.objective is not None:
+                raise Exception("Can't set objective, it already exists")
+            self.objective = row_id
+            self.rhs[row_id] = None
+
+    def _read_column(self, line: List):
+        """Read a line from the COLUMNS section"""
+        var_name = line[0]
+
+        # Skip the MARKER variables since that defines the start and end of an integer variables.
+        if var_name == "MARKER" and line[1] == "'MARKER'":
+            return
+
+        # The lines of a column are consecutive
+        if var_name != self._current_column:
+            self._start_column(var_name)
+
+        family = self._family
+        col_id = self._col_id
+        objective = self.objective
+        row_ids, row_counts = self.row_ids, self.row_counts
+        row_min, row_max = self.row_min, self.row_max
+        for i in range(1, len(line), 2):
+            row_name = line[i]
+            row_id = row_ids[row_name]
+            val = abs(float(line[i + 1]))
+            row_counts[row_id] += 1
+            if val:
+                bucket = bisect_right(DECADE_EDGES, val)
+                self.row_stats[row_id].coef_histogram.counts[bucket] += 1
+                # The first smallest and largest coefficients of the row
+                if val < row_min[row_id]:
+                    row_min[row_id] = val
+                    self.row_min_col[row_id] = var_name
+                if val > row_max[row_id]:
+                    row_max[row_id] = val
+                    self.row_max_col[row_id] = var_name
+                if self.top_k:
+                    self._add_constraint_extreme(val, row_id, row_name, var_name)
+
+            # Skip the objective, we want values only in the matrix
+            if row_id == objective:
+                continue
+            self._col_length += 1
+            stat = family.stat
+            if stat is None:
+                stat = self._new_stat(family)
+            if val:
+                stat.coef_histogram.counts[bucket] += 1
+                if self.top_k:
+                    key = row_id << 32 | col_id
+                    family.extremes.add(val, key, (row_name, var_name))
+            # Like VariableStat.update_coef() in row-major order: the coefficient
+            # replaces an equal one if it's earlier in row-major order
+            if val <= stat.min_coef:
+                key = row_id << 32 | col_id
+                if val < stat.min_coef or key < family.min_key:
+                    stat.min_coef, stat.min_coef_index = val, row_name
+                    family.min_key = key
+            if val >= stat.max_coef:
+                key = row_id << 32 | col_id
+                if val > stat.max_coef or 0 <= key < family.max_key:
+                    stat.max_coef, stat.max_coef_index = val, row_name
+                    family.max_key = key
+            key = (0, row_id << 32 | col_id)
+            if key < family.order:
+                family.order = key
+
+    def _add_constraint_extreme(self, val, row_id, row_name, var_name):
+        family = self.row_stats[row_id].name
+        extremes = self.constraint_extremes.get(family)
+        if extremes is None:
+            extremes = self.constraint_extremes[family] = ExtremeValues(self.top_k)
+        extremes.add(val, row_id << 32 | self._col_id, (row_name, var_name))
+
+    def _variable_family(self, var_name: str) -> _VariableFamily:
+        name = split_type_and_index(var_name)[0]
+        family = self.variable_families.get(name)
+        if family is None:
+            family = self.variable_families[name] = _VariableFamily(name)
+        return family
+
+    def _new_stat(self, family: _VariableFamily) -> VariableStat:
+        family.stat = VariableStat(family.name)
+        # Families created by a bound come after those of the matrix, in order
+        family.order = (1, self._num_stats)
+        self._num_stats += 1
+        if self.top_k:
+            family.extremes = ExtremeValues(self.top_k)
+        return family.stat
+
+    def _start_column(self, var_name: str):
+        self._end_column()
+        self._current_column = var_name
+        self._family = self._variable_family(var_name)
+        self._col_id += 1
+        self._col_length = 0
+
+    def _end_column(self):
+        length = self._col_length
+        if not length:
+            return
+        family = self._family
+        family.stat.count += length
+        family.column_lengths[length] += 1
+        if length > family.max_length:
+            family.max_length = length
+            family.densest_name = self._current_column
+        entry = (length, -self._col_id, self._current_column)
+        if len(self._densest_cols) < self._top_dense:
+            heapq.heappush(self._densest_cols, entry)
+        elif entry > self._densest_cols[0]:
+            heapq.heapreplace(self._densest_cols, entry)
+        self._col_length = 0
+
+    def _read_rhs(self, line: List):
+        """Read a line from the RHS section"""
+        for i in range(1, len(line), 2):
+            self.rhs[self.row_ids[line[i]]] = float(line[i + 1])
+
+    def _read_bound(self, line: List):
+        """Read a line from the BOUNDS section"""
+        bound_type = line[0]
+        # FR indicates a free variable so no bounds
+        if bound_type == "FR":
+            return
+
+        # The bounds of a variable are consecutive
+        name = line[2]
+        if name != self._bound_name:
+            self._end_bounds()
+            self._bound_name = name
+
+        # Like MPSReader._read_bound()
+        if bound_type == "MI":
+            self._upper = 0.0
+        elif bound_type == "PL":
+            self._lower = 0.0
+        elif bound_type == "UP":
+            self._upper = float(line[3])
+        elif bound_type == "LO":
+            self._lower = float(line[3])
+        elif bound_type == "FX":
+            self._lower = self._upper = float(line[3])
+        elif bound_type == "BV":
+            self._lower = 0.0
+            self._upper = 1.0
+        else:
+            raise Exception(f"Unknown bound type {bound_type}")
+
+    def _end_bounds(self):
+        if self._bound_name is None:
+            return
+        family = self._variable_family(self._bound_name)
+        stat = family.stat or self._new_stat(family)
+        index = split_type_and_index(self._bound_name)[1]
+        stat.update_lower_bound(self._lower, index)
+        stat.update_upper_bound(self._upper, index)
+        self._bound_name = self._lower = self._upper = None
+
+    def _variable_stats(self) -> List[VariableStat]:
+        families = sorted(
+            (family for family in self.variable_families.values() if family.stat),
+            key=lambda family: family.order,
+        )
+        for family in families:
+            family.stat.indexes = IndexSet(count=sum(family.column_lengths.values()))
+            if family.extremes is not None:
+                set_extreme_coefs(family.stat, family.extremes)
+        return [family.stat for family in families]
+
+    def _constraint_stats(self) -> List[ConstraintStat]:
+        row_table = self.row_table
+        for row_id, stat in enumerate(self.row_stats):
+            stat.update_min_coef(self.row_min[row_id], self.row_min_col[row_id])
+            stat.update_max_coef(self.row_max[row_id], self.row_max_col[row_id])
+            if self.rhs[row_id] is not None:
+                stat.update_rhs(self.rhs[row_id], row_table.index_of(row_id))
+            stat.num_rows += 1
+            stat.count += self.row_counts[row_id]
+        for family, extremes in self.constraint_extremes.items():
+            set_extreme_coefs(self.constraint_stats[family], extremes)
+        return list(self.constraint_stats.values())
+
+    def _density(
+        self,
+        top_n: int,
+        row_threshold: Optional[int],
+        col_threshold: Optional[int],
+    ) -> DensityStats:
+        """Like density.get_density_stats() on the model."""
+        row_counts = np.array(self.row_counts, dtype=np.int64)
+        rows = np.arange(len(row_counts))
+        if self.objective is not None:
+            row_counts[self.objective] = 0
+            rows = np.delete(rows, self.objective)
+        if row_threshold is None:
+            row_threshold = default_threshold(row_counts)
+
+        # The column counts by family, in the order of the families' first column
+        col_families = [
+            family
+            for family in self.variable_families.values()
+            if family.column_lengths
+        ]
+        if col_threshold is None:
+            num_cols = sum(sum(f.column_lengths.values()) for f in col_families)
+            total = sum(f.stat.count for f in col_families)
+            average = total / num_cols if num_cols else 0
+            col_threshold = max(MIN_DENSE, int(DENSE_RATIO * average))
+        num_dense = [
+            sum(n for length, n in f.column_lengths.items() if length > col_threshold)
+            for f in col_families
+        ]
+        families = [
+            FamilyDensity(
+                "Variable",
+                family.name,
+                sum(family.column_lengths.values()),
+                family.stat.count,
+                family.max_length,
+                family.densest_name,
+                family_num_dense,
+            )
+            for family, family_num_dense in zip(col_families, num_dense)
+        ] + family_density(
+            "Constraint",
+            self.row_table,
+            row_counts,
+            rows,
+            row_threshold,
+            self.row_names,
+        )
+        densest_entries = [
+            DenseEntry("Variable", name, length, length > col_threshold)
+            for length, _, name in sorted(self._densest_cols, reverse=True)
+        ] + [
+            DenseEntry(
+                "Constraint",
+                self.row_names[i],
+                int(row_counts[i]),
+                bool(row_counts[i] > row_threshold),
+            )
+            for i in rows[densest(row_counts[rows], top_n)].tolist()
+        ]
+        return DensityStats(
+            row_threshold,
+            col_threshold,
+            int(np.count_nonzero(row_counts > row_threshold)),
+            sum(num_dense),
+            families,
+            densest_entries,
+        )
+
+
+def stream_analysis(
+    filename: str,
+    top_k=0,
+    top_dense: Optional[int] = None,
+    dense_row_threshold: Optional[int] = None,
+    dense_col_threshold: Optional[int] = None,
+) -> Tuple[List[VariableStat], List[ConstraintStat], DensityStats]:
+    """
+    Reads an .mps file once and returns the same statistics as get_stats() and
+    get_density() would on the LPModel read by MPSReader, without building it.
+    """
+    if top_dense is None:
+        top_dense = DEFAULT_TOP_N
+    return StreamingAnalyzer(filename, top_k).analyze(
+        top_dense, dense_row_threshold, dense_col_threshold
+    )
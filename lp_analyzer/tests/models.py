@@ -0,0 +1,92 @@
+"""Models and assertions shared by the tests."""
+import os
+import random
+from array import array
+
+EXAMPLE_MODEL = os.path.join(
+    os.path.dirname(__file__), "..", "..", "examples", "small_model.mps"
+)
+# The same model in the .lp format
+EXAMPLE_LP_MODEL = os.path.join(
+    os.path.dirname(__file__), "..", "..", "examples", "small_model.lp"
+)
+
+
+class CSCMatrix:
+    """The parts of a scipy.sparse.csc_matrix used by model_from_matrix()."""
+
+    def __init__(self, shape, indptr, indices, data):
+        self.shape, self.indptr, self.indices, self.data = shape, indptr, indices, data
+
+    def tocsc(self):
+        return self
+
+
+def write_random_model(path, seed=0, num_rows=60, num_cols=80):
+    """Writes a small random model with many ties between coefficients, RHS values and bounds."""
+    rng = random.Random(seed)
+    row_names = [
+        f"Con{rng.randint(0, 4)}({i},{rng.randint(0, 3)})" for i in range(num_rows)
+    ]
+    col_names = [f"Var{rng.randint(0, 5)}({i})" for i in range(num_cols)]
+    values = [0.5, 1.0, 2.0, -2.0, 1e-3, 1e4, 3.5]
+    with open(path, "w") as f:
+        f.write("NAME RANDOM\nROWS\n N  OBJ\n")
+        for name in row_names:
+            f.write(f" {rng.choice('LGE')}  {name}\n")
+        f.write("COLUMNS\n")
+        for i, name in enumerate(col_names):
+            if i % 10 == 0:
+                f.write("    MARKER  'MARKER'  'INTORG'\n")
+            rows = ["OBJ"] * rng.randint(0, 1) + rng.sample(
+                row_names, rng.randint(1, 5)
+            )
+            while rows:
+                # Lines hold either one or two entries
+                entries = [rows.pop() for _ in range(min(len(rows), rng.randint(1, 2)))]
+                f.write(f"    {name}")
+                for row in entries:
+                    f.write(f"  {row}  {rng.choice(values)}")
+                f.write("\n")
+            if i % 10 == 4:
+                f.write("    MARKER  'MARKER'  'INTEND'\n")
+        f.write("RHS\n")
+        for name, other in zip(
+            rng.sample(row_names, num_rows // 2), rng.sample(row_names, num_rows // 2)
+        ):
+            f.write(f"    RHS1  {name}  {rng.choice(values + [0.0])}")
+            if rng.random() < 0.5:
+                f.write(f"  {other}  {rng.choice(values)}")
+            f.write("\n")
+        f.write("BOUNDS\n")
+        for name in rng.sample(col_names, num_cols // 2):
+            bound_type = rng.choice(["UP", "LO", "FX", "MI", "BV", "FR"])
+            f.write(f" {bound_type} BND1  {name}  {rng.choice(values + [0.0])}\n")
+        f.write("ENDATA\n")
+
+
+def assert_same_sparse_models(model, expected):
+    for attribute in (
+        "row_names",
+        "row_types",
+        "rhs",
+        "col_names",
+        "col_starts",
+        "row_indices",
+        "values",
+        "lower",
+        "upper",
+        "bound_order",
+    ):
+        # Compare the arrays as bytes since NaN != NaN
+        actual, wanted = getattr(model, attribute), getattr(expected, attribute)
+        if isinstance(actual, array):
+            actual, wanted = actual.tobytes(), wanted.tobytes()
+        assert actual == wanted, attribute
+    assert model.objective == expected.objective
+    for table in ("row_table", "col_table"):
+        actual, wanted = getattr(model, table), getattr(expected, table)
+        assert actual.families == wanted.families, table
+        assert actual.indexes == wanted.indexes, table
+        assert actual.name_families == wanted.name_families, table
+        assert actual.name_indexes == wanted.name_indexes, table
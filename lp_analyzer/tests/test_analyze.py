@@ -1,7 +1,60 @@
-from lp_analyzer.analyze import split_type_and_index
+from lp_analyzer.analyze import full_analysis, split_type_and_index
+from lp_analyzer.core import MIN_DECADE, Bound, IndexSet, LogHistogram, NameTable
+from lp_analyzer.reader import MPSReader
+from lp_analyzer.tests.models import EXAMPLE_MODEL
 
 
 def test_split_type_and_index():
     assert ("var", "") == split_type_and_index("var")
     assert ("var", "1,2,3") == split_type_and_index("var(1,2,3)")
     assert ("var", "1,2, 3") == split_type_and_index("var(1,2, 3)")
+
+
+def test_name_table():
+    table = NameTable()
+    table.extend(["x(1,2)", "y(1,2)", "x(3)"])
+    table.add("x")
+    assert table.families == ["x", "y"]
+    assert table.indexes == ["1,2", "3", ""]
+    assert list(table.name_families) == [0, 1, 0, 0]
+    assert list(table.name_indexes) == [0, 0, 1, 2]
+    assert table.family_of(2) == "x" and table.index_of(2) == "3"
+
+
+def test_index_set():
+    index_set = IndexSet()
+    for index_id in (3, 17, 3, 0):
+        index_set.add(index_id)
+    assert len(index_set) == 3
+    assert 17 in index_set and 3 in index_set and 4 not in index_set
+    assert len(IndexSet(index_set.bits)) == 3
+
+
+def test_log_histogram():
+    histogram = LogHistogram()
+    histogram.add_all([0.01, -0.02, 0.099, 0, 5])
+    histogram.add(1e-30)  # Counted in the first bucket
+    assert len(histogram) == 5
+    assert histogram.to_dict() == {
+        "min_decade": MIN_DECADE,
+        "counts": [1] + [0] * 12 + [3, 0, 1],
+    }
+    histogram = LogHistogram()
+    histogram.add_all([0.01] * 100 + [0.5, 2e3])
+    assert str(histogram) == "-2 █▁···▁ +3"
+    assert str(LogHistogram()) == ""
+
+
+def test_full_analysis_does_not_modify_the_model(tmp_path):
+    model = MPSReader(EXAMPLE_MODEL).read()
+    # A column added to a row and to the bounds without add_column()
+    model.rows["LIM1"].coefficients["Extra(1)"] = 2.0
+    model.bounds["Extra(1)"] = Bound("Extra(1)")
+    model.bounds["Extra(1)"].rhs_bound = 3.0
+    col_ids = dict(model.col_ids)
+    families = list(model.col_table.families)
+    results = tmp_path / "results.txt"
+    full_analysis(model, str(results), top_k=1)
+    assert model.col_ids == col_ids and len(model.col_table) == len(col_ids)
+    assert model.col_table.families == families
+    assert "| Extra " in results.read_text()
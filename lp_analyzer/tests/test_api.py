@@ -0,0 +1,100 @@
+import math
+
+import numpy as np
+import pytest
+
+from lp_analyzer.analyze import full_analysis
+from lp_analyzer.api import analyze, model_from_matrix, model_from_pyomo
+from lp_analyzer.reader import SparseMPSReader
+from lp_analyzer.tests.models import (
+    EXAMPLE_MODEL,
+    CSCMatrix,
+    assert_same_sparse_models,
+)
+
+
+# The constraints of examples/small_model.mps, the objective is passed separately
+EXAMPLE_ARGS = dict(
+    row_names=["LIM1", "LIM2", "MYEQN"],
+    col_names=["XONE", "YTWO", "ZTHREE"],
+    row_types=["L", "G", "E"],
+    rhs=[5, 10, 7],
+    lower=[-math.inf, -1, math.nan],
+    upper=[4, 1, math.inf],
+    objective=[1, 4, 15],
+    objective_name="COST",
+)
+
+
+def test_model_from_matrix():
+    # With an explicit zero, which is dropped
+    indices = [0, 1, 0, 2, 0, 1, 2]
+    matrix = CSCMatrix((3, 3), [0, 2, 4, 7], indices, [1, 1, 1, -1, 0, 1, 1e-3])
+    model = model_from_matrix(matrix, **EXAMPLE_ARGS)
+    assert_same_sparse_models(model, SparseMPSReader(EXAMPLE_MODEL).read())
+
+
+def test_model_from_scipy_matrix():
+    sparse = pytest.importorskip("scipy.sparse")
+    # Duplicates are summed and explicit zeroes dropped
+    rows = [0, 0, 1, 1, 2, 2, 2, 0]
+    cols = [0, 1, 0, 2, 1, 2, 2, 2]
+    values = [1, 1, 1, -1, 1, 5e-4, 5e-4, 0]
+    matrix = sparse.coo_matrix((values, (rows, cols)), shape=(3, 3))
+    model = model_from_matrix(matrix, **dict(EXAMPLE_ARGS, objective=None))
+    assert model.num_nonzeros == 6
+    assert list(model.row_indices) == [0, 1, 0, 2, 1, 2]
+
+
+def test_analyze_returns_stats(tmp_path):
+    model = SparseMPSReader(EXAMPLE_MODEL).read()
+    result = analyze(model)
+    stats = {stat.name: stat for stat in result.variable_stats}
+    assert stats["XONE"].min_coef == stats["XONE"].max_coef == 1
+    # Making the tables doesn't modify the statistics
+    report = result.report()
+    assert result.report() == report
+    assert stats["XONE"].min_coef == 1
+    constraints = {stat["name"]: stat for stat in result.to_dict()["constraints"]}
+    assert constraints["MYEQN"]["coef_histogram"] == {
+        "min_decade": -3,
+        "counts": [1, 0, 0, 1],
+    }
+    assert constraints["COST"]["min_rhs"] is None
+
+    outfile = str(tmp_path / "results.txt")
+    full_analysis(model, outfile)
+    with open(outfile) as f:
+        assert f.read() == report
+
+
+def test_model_from_pyomo():
+    pyo = pytest.importorskip("pyomo.environ")
+    model = pyo.ConcreteModel()
+    model.I = pyo.Set(initialize=[1, 2])
+    model.x = pyo.Var(model.I, bounds=(0, 4))
+    model.y = pyo.Var(within=pyo.Reals)
+    model.cost = pyo.Objective(expr=model.x[1] + 4 * model.x[2] + 15 * model.y + 3)
+    model.limit = pyo.Constraint(model.I, rule=lambda m, i: m.x[i] + m.y <= 5 + i)
+    model.ranged = pyo.Constraint(expr=(1, model.x[1] - 2 * model.y + 1, 10))
+
+    sparse_model = model_from_pyomo(model)
+    assert sparse_model.row_names == [
+        "cost",
+        "limit(1)",
+        "limit(2)",
+        "r_l_ranged",
+        "r_u_ranged",
+    ]
+    assert sparse_model.row_types == ["N", "L", "L", "G", "L"]
+    assert list(sparse_model.rhs)[1:] == [6, 7, 0, 9]
+    assert sparse_model.col_names == ["x(1)", "x(2)", "y"]
+    assert list(sparse_model.upper)[:2] == [4, 4] and math.isnan(sparse_model.upper[2])
+    assert list(sparse_model.bound_order) == [0, 1]
+    assert np.array_equal(sparse_model.col_starts, [0, 4, 6, 11])
+    assert [stat.name for stat in analyze(sparse_model).constraint_stats] == [
+        "cost",
+        "limit",
+        "r_l_ranged",
+        "r_u_ranged",
+    ]
@@ -0,0 +1,61 @@
+import shutil
+
+import pytest
+
+from lp_analyzer.batch import analyze_batch, find_model_files, parse_size
+from lp_analyzer.tests.models import EXAMPLE_LP_MODEL, EXAMPLE_MODEL, write_random_model
+
+
+def test_parse_size():
+    assert parse_size("1024") == 1024
+    assert parse_size("500M") == 500 << 20
+    assert parse_size("1.5GiB") == 3 << 29
+    with pytest.raises(ValueError):
+        parse_size("lots")
+
+
+def test_find_model_files(tmp_path):
+    for name in ("a.mps", "b.lp", "c.mps.gz", "notes.txt"):
+        (tmp_path / name).write_text("")
+    directory = str(tmp_path)
+    assert find_model_files([directory]) == [
+        f"{directory}/a.mps",
+        f"{directory}/b.lp",
+        f"{directory}/c.mps.gz",
+    ]
+    assert find_model_files([f"{directory}/*.mps*", f"{directory}/a.mps"]) == [
+        f"{directory}/a.mps",
+        f"{directory}/c.mps.gz",
+    ]
+
+
+def test_analyze_batch(tmp_path):
+    paths = []
+    for seed in range(3):
+        paths.append(str(tmp_path / f"random_{seed}.mps"))
+        write_random_model(paths[-1], seed)
+    paths.append(shutil.copy(EXAMPLE_MODEL, tmp_path))
+    paths.append(shutil.copy(EXAMPLE_LP_MODEL, tmp_path))
+    (tmp_path / "broken.mps").write_text("garbage\n")
+    paths.append(str(tmp_path / "broken.mps"))
+
+    summary_file = str(tmp_path / "summary.txt")
+    results, failures = analyze_batch(
+        paths, summary_file, workers=2, memory_budget=1 << 20
+    )
+    assert list(results) == paths[:-1]
+    assert list(failures) == paths[-1:]
+    # The example in both formats has the same coefficients
+    assert results[paths[3]] == results[paths[4]]
+    assert results[paths[3]][("Constraint", "MYEQN")] == (1e-3, 1)
+    assert sorted(path.name for path in tmp_path.glob("*_results.txt")) == [
+        "random_0_results.txt",
+        "random_1_results.txt",
+        "random_2_results.txt",
+        # Both examples would be saved to small_model_results.txt
+        "small_model.lp_results.txt",
+        "small_model.mps_results.txt",
+    ]
+    with open(summary_file) as f:
+        summary = f.read()
+    assert "| Constraint | MYEQN" in summary and "broken.mps" in summary
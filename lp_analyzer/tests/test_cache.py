@@ -0,0 +1,54 @@
+import os
+
+from lp_analyzer.cache import ModelCache
+from lp_analyzer.reader import SparseMPSReader
+from lp_analyzer.tests.models import assert_same_sparse_models, write_random_model
+
+
+def test_cache_round_trip(tmp_path):
+    path = str(tmp_path / "model.mps")
+    write_random_model(path)
+    cache = ModelCache(str(tmp_path / "cache"))
+    assert cache.load(path) is None
+
+    model = cache.read(path, SparseMPSReader(path).read)
+    assert_same_sparse_models(cache.load(path), model)
+    assert cache.load(path).row_ids == model.row_ids
+
+    # Modifying the file invalidates the entry
+    with open(path, "a") as f:
+        f.write("\n")
+    assert cache.load(path) is None
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = ModelCache(str(tmp_path / "cache"), max_size=1)
+    paths = []
+    for i in range(3):
+        paths.append(str(tmp_path / f"model_{i}.mps"))
+        write_random_model(paths[-1], seed=i)
+        cache.read(paths[-1], SparseMPSReader(paths[-1]).read)
+    # Only the most recent entry is kept since each is larger than max_size
+    assert os.listdir(cache.cache_dir) == [
+        os.path.basename(cache.entry_path(paths[-1]))
+    ]
+
+
+def test_cache_evicts_entries_removed_by_another_process(tmp_path, monkeypatch):
+    cache = ModelCache(str(tmp_path / "cache"), max_size=1)
+    paths = [str(tmp_path / f"model_{i}.mps") for i in range(2)]
+    for seed, path in enumerate(paths):
+        write_random_model(path, seed=seed)
+    cache.read(paths[0], SparseMPSReader(paths[0]).read)
+    # Another process removes an entry before this one stats it and the entry this
+    # one evicts before it removes it
+    listdir, remove = os.listdir, os.remove
+    monkeypatch.setattr(os, "listdir", lambda path: listdir(path) + ["gone.npz"])
+
+    def remove_twice(path):
+        remove(path)
+        remove(path)
+
+    monkeypatch.setattr(os, "remove", remove_twice)
+    cache.read(paths[1], SparseMPSReader(paths[1]).read)
+    assert listdir(cache.cache_dir) == [os.path.basename(cache.entry_path(paths[1]))]
@@ -0,0 +1,84 @@
+import gzip
+import shutil
+
+import pytest
+
+from lp_analyzer.__main__ import check_main
+from lp_analyzer.check import Thresholds, check_thresholds
+from lp_analyzer.tests.models import EXAMPLE_LP_MODEL, EXAMPLE_MODEL
+
+
+def test_check_stops_at_the_first_violation():
+    thresholds = Thresholds(min_coef=1e-2, max_coef=10)
+    (violation,) = check_thresholds(EXAMPLE_MODEL, thresholds)
+    assert (
+        str(violation) == "line 12: coefficient 1.5e+01 of ZTHREE in COST is above 10"
+    )
+    violations = check_thresholds(EXAMPLE_MODEL, thresholds, max_violations=0)
+    assert [(v.row, v.column, v.limit) for v in violations] == [
+        ("COST", "ZTHREE", 10),
+        ("MYEQN", "ZTHREE", 1e-2),
+    ]
+    # Both coefficients of the first line are above the limit
+    (violation,) = check_thresholds(EXAMPLE_MODEL, Thresholds(max_coef=0.5))
+    assert (violation.row, violation.column) == ("COST", "XONE")
+    assert len(check_thresholds(EXAMPLE_MODEL, Thresholds(max_rhs=4), 1)) == 1
+
+
+def test_check_rhs_and_bounds(tmp_path):
+    thresholds = Thresholds(max_rhs=6, min_bound=2)
+    expected = [
+        ("RHS", "LIM2", None, 10.0),
+        ("RHS", "MYEQN", None, 7.0),
+        ("lower bound", None, "YTWO", -1.0),
+        ("upper bound", None, "YTWO", 1.0),
+    ]
+    violations = check_thresholds(EXAMPLE_MODEL, thresholds, max_violations=0)
+    assert [(v.kind, v.row, v.column, v.value) for v in violations] == expected
+    assert [v.line_number for v in violations] == [15, 16, 19, 20]
+
+    # Compressed files are streamed too
+    compressed = str(tmp_path / "model.mps.gz")
+    with open(EXAMPLE_MODEL, "rb") as f, gzip.open(compressed, "wb") as out:
+        shutil.copyfileobj(f, out)
+    assert len(check_thresholds(compressed, thresholds, max_violations=3)) == 3
+    assert check_thresholds(compressed, Thresholds(max_bound=4)) == []
+
+
+def test_check_lp_file():
+    violations = check_thresholds(
+        EXAMPLE_LP_MODEL, Thresholds(min_coef=1e-2, max_rhs=6), max_violations=0
+    )
+    assert sorted(str(v) for v in violations) == [
+        "RHS 1.0e+01 of LIM2 is above 6",
+        "RHS 7.0e+00 of MYEQN is above 6",
+        "coefficient 1.0e-03 of ZTHREE in MYEQN is below 0.01",
+    ]
+
+
+def test_check_command(capsys):
+    def output_lines():
+        # Without the timing of the phases
+        lines = capsys.readouterr().out.splitlines()
+        return [line for line in lines if line.startswith(EXAMPLE_MODEL)]
+
+    check_main([EXAMPLE_MODEL, "--max", "1e3"])
+    assert output_lines() == [f"{EXAMPLE_MODEL}: OK"]
+
+    with pytest.raises(SystemExit) as exit_info:
+        check_main([EXAMPLE_MODEL, "--max", "6", "--max-violations", "0"])
+    assert exit_info.value.code == 1
+    lines = output_lines()
+    assert lines[0] == (
+        f"{EXAMPLE_MODEL}: line 12: coefficient 1.5e+01 of ZTHREE in COST is above 6"
+    )
+    assert lines[-1] == (
+        f"{EXAMPLE_MODEL}: FAILED, {len(lines) - 1} value(s) outside of the thresholds"
+    )
+
+    with pytest.raises(SystemExit):
+        check_main([EXAMPLE_MODEL, "--max", "0.5"])
+    assert output_lines()[-1] == (
+        f"{EXAMPLE_MODEL}: FAILED, 1 value(s) outside of the thresholds "
+        + "(stopped reading)"
+    )
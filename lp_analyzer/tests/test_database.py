@@ -0,0 +1,60 @@
+import contextlib
+import os
+
+import pytest
+
+from lp_analyzer.database import (
+    CoefficientQuery,
+    build_index,
+    is_stale,
+    open_index,
+    query_coefficients,
+    run_sql,
+)
+from lp_analyzer.reader import MPSReader, SparseMPSReader
+from lp_analyzer.tests.models import EXAMPLE_MODEL
+
+
+def test_index_and_query(tmp_path):
+    db_path = str(tmp_path / "model.sqlite")
+    build_index(SparseMPSReader(EXAMPLE_MODEL).read(), db_path, source=EXAMPLE_MODEL)
+    with contextlib.closing(open_index(db_path)) as connection:
+        assert not is_stale(connection)
+        count, coefficients = query_coefficients(
+            connection, CoefficientQuery(con_families=["MYEQN"], below=1)
+        )
+        assert (count, coefficients) == (1, [("MYEQN", "ZTHREE", 0.001)])
+        count, coefficients = query_coefficients(
+            connection, CoefficientQuery(var_families=["ZTHREE"]), 1, largest=True
+        )
+        assert (count, coefficients) == (3, [("COST", "ZTHREE", 15.0)])
+        count, _ = query_coefficients(connection, CoefficientQuery(row="LIM1", above=1))
+        assert count == 0
+        assert query_coefficients(connection, CoefficientQuery(column="XONE"))[0] == 3
+        assert "| XONE   | 4.0     |" in run_sql(
+            connection, "SELECT name, upper FROM columns WHERE upper IS NOT NULL"
+        )
+        assert run_sql(connection, "SELECT name FROM rows", 2).endswith(
+            "Only the first 2 rows are shown"
+        )
+        assert "Only" not in run_sql(connection, "SELECT name FROM rows", 4)
+        # Misspelled names aren't silently ignored
+        with pytest.raises(ValueError, match="Unknown constraint families: MYEQ"):
+            query_coefficients(connection, CoefficientQuery(con_families=["MYEQ"]))
+        with pytest.raises(ValueError, match="Unknown column: XON"):
+            query_coefficients(connection, CoefficientQuery(column="XON"))
+
+
+def test_index_of_lp_model(tmp_path):
+    db_path = str(tmp_path / "model.sqlite")
+    build_index(MPSReader(EXAMPLE_MODEL).read(), db_path)
+    with contextlib.closing(open_index(db_path)) as connection:
+        assert not is_stale(connection)
+        assert query_coefficients(connection, CoefficientQuery())[0] == 9
+    with pytest.raises(FileNotFoundError):
+        open_index(str(tmp_path / "missing.sqlite"))
+    with open(str(tmp_path / "other.sqlite"), "w") as f:
+        f.write("not a database")
+    with pytest.raises(ValueError):
+        open_index(str(tmp_path / "other.sqlite"))
+    assert sorted(os.listdir(str(tmp_path))) == ["model.sqlite", "other.sqlite"]
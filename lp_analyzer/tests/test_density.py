@@ -0,0 +1,56 @@
+import numpy as np
+
+from lp_analyzer.density import densest, get_density_stats
+from lp_analyzer.reader import MPSReader, SparseMPSReader
+from lp_analyzer.tests.models import EXAMPLE_MODEL, write_random_model
+
+
+def test_densest():
+    counts = np.random.default_rng(0).integers(0, 5, 100)
+    expected = sorted(range(100), key=lambda i: (-counts[i], i))[:10]
+    assert densest(counts, 10).tolist() == expected
+    assert densest(counts, 1000).tolist() == sorted(
+        range(100), key=lambda i: (-counts[i], i)
+    )
+    assert len(densest(counts[:0], 10)) == 0
+    # Mostly ties, like the columns of most models
+    counts = np.full(1000, 3)
+    counts[[500, 900]] = 4
+    assert densest(counts, 4).tolist() == [500, 900, 0, 1]
+
+
+def test_both_engines_find_the_same_dense_rows_and_columns(tmp_path):
+    for seed in range(3):
+        path = str(tmp_path / f"random_{seed}.mps")
+        write_random_model(path, seed)
+        density = get_density_stats(MPSReader(path).read(), 5, 3, 4)
+        assert (
+            density.to_dict()
+            == get_density_stats(SparseMPSReader(path).read(), 5, 3, 4).to_dict()
+        )
+        assert density.num_dense_rows > 0 and density.num_dense_cols > 0
+
+
+def test_density_of_example():
+    density = get_density_stats(MPSReader(EXAMPLE_MODEL).read(), col_threshold=1)
+    # Every column has 2 non-zeroes without the objective
+    assert density.num_dense_cols == 3 and density.num_dense_rows == 0
+    assert [entry.name for entry in density.densest] == [
+        "XONE",
+        "YTWO",
+        "ZTHREE",
+        "LIM1",
+        "LIM2",
+        "MYEQN",
+    ]
+    assert "| Variable   | XONE   | 2            | yes     |" in density.report()
+
+
+def test_density_does_not_modify_the_model():
+    model = MPSReader(EXAMPLE_MODEL).read()
+    # A column added to a row without add_column()
+    model.rows["LIM1"].coefficients["Extra(1)"] = 2.0
+    density = get_density_stats(model)
+    assert model.num_cols == 3 and "Extra(1)" not in model.col_ids
+    assert ("Extra", 1) in [(family.name, family.count) for family in density.families]
+    assert "Extra(1)" in [entry.name for entry in density.densest]
@@ -0,0 +1,49 @@
+from lp_analyzer.diff import diff_models
+from lp_analyzer.reader import LPReader, MPSReader, SparseMPSReader
+from lp_analyzer.tests.models import EXAMPLE_LP_MODEL, EXAMPLE_MODEL
+
+
+def test_diff_same_model():
+    result = diff_models(
+        lambda: MPSReader(EXAMPLE_MODEL).read(),
+        lambda: LPReader(EXAMPLE_LP_MODEL).read(),
+        entries=True,
+    )
+    assert result.families == []
+    assert [len(diff) for diff in result.entries] == [0, 0, 0, 0]
+
+
+def test_diff_changed_model():
+    def read_changed_model():
+        model = SparseMPSReader(EXAMPLE_MODEL).read()
+        model.values[model.values.index(0.001)] = 1e-5  # MYEQN, ZTHREE
+        model.rhs[model.row_ids["LIM1"]] = 0  # Removed
+        model.upper[model.col_ids["XONE"]] = 8
+        return model
+
+    result = diff_models(
+        lambda: SparseMPSReader(EXAMPLE_MODEL).read(),
+        read_changed_model,
+        entries=True,
+    )
+    changed = {(diff.kind, diff.name): diff for diff in result.families}
+    assert set(changed) == {
+        ("Variable", "ZTHREE"),
+        ("Variable", "XONE"),
+        ("Constraint", "MYEQN"),
+        ("Constraint", "LIM1"),
+    }
+    assert changed[("Constraint", "MYEQN")].get_table_row()[3:6] == [
+        "1",
+        "1.0e-03 -> 1.0e-05",
+        "1.0e+00",
+    ]
+
+    coefficients, rhs, lower, upper = result.entries
+    assert coefficients.changed_before.tolist() == [0.001]
+    assert coefficients.changed_after.tolist() == [1e-5]
+    assert rhs.removed_values.tolist() == [5] and len(rhs) == 1
+    assert len(lower) == 0
+    assert upper.changed_after.tolist() == [8]
+    report = result.report()
+    assert "| Coefficient | MYEQN" in report and "ZTHREE" in report
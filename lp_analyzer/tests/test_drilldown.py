@@ -0,0 +1,53 @@
+import numpy as np
+
+from lp_analyzer.api import model_from_matrix
+from lp_analyzer.drilldown import get_drilldown
+from lp_analyzer.reader import MPSReader, SparseMPSReader
+from lp_analyzer.tests.models import CSCMatrix, write_random_model
+
+
+def test_drilldown_finds_the_period_of_extreme_coefficients():
+    # GenCapacity(zone,period) has coefficients of 1 except in period 2050
+    col_names = [f"GenCapacity(z{z},{p})" for z in (1, 2) for p in (2030, 2050)]
+    row_names = [f"Balance(z{z},{p})" for z in (1, 2) for p in (2030, 2050)]
+    col_values = np.array([1e-6 if "2050" in name else 1.0 for name in col_names])
+    # Column i is in row i and in the first row
+    dense = np.diag(col_values)
+    dense[0] = col_values
+    indptr = np.r_[0, np.cumsum((dense != 0).sum(axis=0))]
+    indices = np.concatenate([np.flatnonzero(column) for column in dense.T])
+    matrix = CSCMatrix(dense.shape, indptr, indices, dense.T[dense.T != 0])
+    model = model_from_matrix(matrix, row_names, col_names)
+    drilldown = get_drilldown(model)
+    stats = {
+        (stat.kind, stat.family, stat.position, stat.component): stat
+        for stat in drilldown.stats
+    }
+    period_2050 = stats[("Variable", "GenCapacity", 2, "2050")]
+    assert (period_2050.min_coef, period_2050.max_coef) == (1e-6, 1e-6)
+    assert stats[("Variable", "GenCapacity", 2, "2030")].max_coef == 1.0
+    # Row Balance(z1,2030) has every column, hence the full range
+    first = stats[("Constraint", "Balance", 1, "z1")]
+    assert (first.count, first.min_coef, first.max_coef) == (5, 1e-6, 1.0)
+    assert get_drilldown(model, families=["Balance"]).stats[0].family == "Balance"
+    assert "| Constraint | Balance" in drilldown.report()
+
+
+def test_drilldown_is_the_same_for_both_models(tmp_path):
+    path = str(tmp_path / "random.mps")
+    write_random_model(path)
+    drilldown = get_drilldown(MPSReader(path).read(), top_n=2)
+    assert drilldown.stats
+    # Families are numbered differently in both models
+    assert sorted(drilldown.to_dict()["values"], key=str) == sorted(
+        get_drilldown(SparseMPSReader(path).read(), 2).to_dict()["values"], key=str
+    )
+    families = {(stat.family, stat.position) for stat in drilldown.stats}
+    for family, position in families:
+        assert (
+            sum(
+                (stat.family, stat.position) == (family, position)
+                for stat in drilldown.stats
+            )
+            <= 2
+        )
@@ -0,0 +1,45 @@
+import bz2
+import gzip
+import io
+import lzma
+
+import pytest
+
+from lp_analyzer.files import ThreadedReader, open_model_file, strip_extensions
+from lp_analyzer.reader import SparseMPSReader
+from lp_analyzer.tests.models import EXAMPLE_MODEL
+
+
+def test_strip_extensions():
+    assert strip_extensions("path/model.mps") == "path/model"
+    assert strip_extensions("path/model.mps.gz") == "path/model"
+    assert strip_extensions("model.mps.zst") == "model"
+
+
+def test_threaded_reader():
+    data = bytes(range(256)) * 100
+    reader = ThreadedReader(io.BytesIO(data), block_size=7, max_blocks=2)
+    assert io.BufferedReader(reader, 5).read() == data
+    reader.close()
+
+
+@pytest.mark.parametrize(
+    "extension, compress",
+    [(".gz", gzip.compress), (".bz2", bz2.compress), (".xz", lzma.compress)],
+)
+@pytest.mark.parametrize("threaded", [True, False])
+def test_read_compressed(tmp_path, extension, compress, threaded):
+    with open(EXAMPLE_MODEL, "rb") as f:
+        data = f.read()
+    path = str(tmp_path / ("model.mps" + extension))
+    with open(path, "wb") as f:
+        f.write(compress(data))
+
+    with open_model_file(path, threaded) as (file, get_position):
+        assert file.read() == data.decode()
+        assert get_position() > 0
+
+    model = SparseMPSReader(path, threaded_decompression=threaded).read()
+    expected = SparseMPSReader(EXAMPLE_MODEL).read()
+    assert model.values == expected.values
+    assert model.col_names == expected.col_names
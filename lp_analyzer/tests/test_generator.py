@@ -0,0 +1,27 @@
+from lp_analyzer.generator import ModelShape, write_switch_like_model
+from lp_analyzer.reader import MPSReader, SparseMPSReader
+
+
+def test_generated_model_is_deterministic(tmp_path):
+    paths = [str(tmp_path / f"model_{i}.mps") for i in range(3)]
+    write_switch_like_model(paths[0], 20000, seed=1)
+    write_switch_like_model(paths[1], 20000, seed=1)
+    write_switch_like_model(paths[2], 20000, seed=2)
+    contents = []
+    for path in paths:
+        with open(path) as f:
+            contents.append(f.read())
+    assert contents[0] == contents[1]
+    assert contents[0] != contents[2]
+
+
+def test_generated_model_size(tmp_path):
+    path = str(tmp_path / "model.mps")
+    num_nonzeros = write_switch_like_model(path, 50000)
+    model = SparseMPSReader(path).read()
+    assert model.num_nonzeros == num_nonzeros
+    assert abs(num_nonzeros - ModelShape.for_nonzeros(50000).num_nonzeros) < 100
+    assert abs(num_nonzeros - 50000) < 1000
+    assert MPSReader(path).read().objective.row_name == "Minimize_System_Cost"
+    assert "DispatchGen" in model.col_table.families
+    assert "Zone_Energy_Balance" in model.row_table.families
@@ -0,0 +1,90 @@
+import io
+import json
+import threading
+
+from lp_analyzer import instrumentation
+from lp_analyzer.__main__ import main_without_argument_parser
+from lp_analyzer.tests.models import EXAMPLE_MODEL
+from lp_analyzer.util import print_progress
+
+
+class ProgressRecorder(instrumentation.Listener):
+    wants_progress = True
+
+    def __init__(self):
+        self.events = []
+
+    def phase_started(self, phase):
+        self.events.append(("start", phase.path))
+
+    def progress(self, phase, fraction):
+        self.events.append(("progress", fraction))
+
+    def phase_ended(self, phase):
+        self.events.append(("end", phase.path))
+
+
+def test_phases_notify_listeners():
+    with instrumentation.listening(ProgressRecorder()) as recorder:
+        with instrumentation.phase("outer", nonzeros=10) as outer:
+            items = list(print_progress(range(4), "Looping", check_progress_every=2))
+    assert items == [0, 1, 2, 3]
+    assert recorder.events == [
+        ("start", "outer"),
+        ("start", "outer/Looping"),
+        ("progress", 0.0),
+        ("end", "outer/Looping"),
+        ("end", "outer"),
+    ]
+    assert outer.counts == {"nonzeros": 10}
+    assert outer.nonzeros_per_second > 0
+
+
+def test_phases_of_each_thread():
+    barrier = threading.Barrier(2)
+
+    def analyze(name):
+        with instrumentation.phase(name):
+            # Both threads are in their outer phase
+            barrier.wait()
+            with instrumentation.phase("inner"):
+                barrier.wait()
+
+    with instrumentation.listening(ProgressRecorder()) as recorder:
+        threads = [threading.Thread(target=analyze, args=(name,)) for name in "ab"]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert sorted(path for event, path in recorder.events if event == "end") == [
+        "a",
+        "a/inner",
+        "b",
+        "b/inner",
+    ]
+
+
+def test_console_progress_only_on_terminal():
+    class Terminal(io.StringIO):
+        def isatty(self):
+            return True
+
+    assert not instrumentation.ConsoleListener(io.StringIO()).wants_progress
+    assert instrumentation.ConsoleListener(Terminal()).wants_progress
+
+
+def test_metrics_json(tmp_path):
+    metrics_path = tmp_path / "metrics.json"
+    main_without_argument_parser(
+        EXAMPLE_MODEL,
+        str(tmp_path / "results.txt"),
+        engine="numpy",
+        metrics_json=str(metrics_path),
+    )
+    with open(metrics_path) as f:
+        metrics = json.load(f)
+    phases = {phase["path"]: phase for phase in metrics["phases"]}
+    for name in ("read", "variable_stats", "constraint_stats", "report"):
+        assert phases[name]["peak_rss_mb"] > 0
+    assert phases["read"]["counts"] == {"rows": 4, "columns": 3, "nonzeros": 9}
+    assert phases["variable_stats"]["nonzeros_per_second"] > 0
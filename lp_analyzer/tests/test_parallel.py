@@ -0,0 +1,68 @@
+import itertools
+
+import numpy as np
+
+from lp_analyzer.parallel import find_parallel, parallel_groups
+from lp_analyzer.reader import MPSReader, SparseMPSReader
+
+
+def test_parallel_groups_match_pairwise_comparison():
+    rng = np.random.default_rng(0)
+    dense = rng.integers(-2, 3, (60, 8)).astype(float)
+    # Copies of rows scaled by various factors, with a rounding error
+    for i, factor in zip(range(30, 60, 2), itertools.cycle([1, -1, 1e3, 2.5 + 1e-13])):
+        dense[i] = dense[rng.integers(0, 30)] * factor
+    row_ids, col_ids = np.nonzero(dense)
+    groups = parallel_groups(row_ids, col_ids, dense[row_ids, col_ids], 1e-9)
+
+    def parallel(a, b):
+        ratio = dense[b][np.flatnonzero(dense[a])[:1]] / dense[a][dense[a] != 0][:1]
+        return dense[a].any() and np.allclose(dense[b], ratio * dense[a])
+
+    expected = {
+        (a, b) for a, b in itertools.combinations(range(60), 2) if parallel(a, b)
+    }
+    found = {
+        (a, b)
+        for members, _ in groups
+        for a, b in itertools.combinations(members.tolist(), 2)
+    }
+    assert found == expected and len(expected) >= 15
+
+
+def test_parallel_rows_and_columns(tmp_path):
+    path = str(tmp_path / "model.mps")
+    with open(path, "w") as f:
+        f.write(
+            "NAME PARALLEL\nROWS\n N  COST\n L  LIM(1)\n L  LIM(2)\n G  LIM(3)\n"
+            + " E  EQ(1)\n E  EQ(2)\nCOLUMNS\n"
+            + "    X(1)  COST  1  LIM(1)  1\n    X(1)  LIM(2)  2  LIM(3)  -3\n"
+            + "    X(1)  EQ(1)  1  EQ(2)  1\n    X(2)  LIM(1)  2  LIM(2)  4\n"
+            + "    X(2)  LIM(3)  -6  EQ(1)  5\n    X(3)  COST  2  LIM(1)  1\n"
+            + "    X(3)  LIM(2)  2  LIM(3)  -3\n    X(3)  EQ(1)  1  EQ(2)  1\n"
+            + "    Y(1)  EQ(2)  7\nENDATA\n"
+        )
+    result = find_parallel(MPSReader(path).read())
+    assert result.to_dict() == find_parallel(SparseMPSReader(path).read()).to_dict()
+    assert result.num_groups == 2
+    rows, cols = sorted(result.groups, key=lambda group: group.kind)
+    assert rows.names == ["LIM(1)", "LIM(2)", "LIM(3)"] and rows.factors == [1, 2, -3]
+    # The objective is ignored
+    assert cols.names == ["X(1)", "X(3)"] and cols.factors == [1, 1]
+    assert "| LIM      | 2          |              | LIM(2) = 2 * LIM(1) |" in (
+        result.report()
+    )
+
+
+def test_parallel_columns_in_any_row_order(tmp_path):
+    path = str(tmp_path / "model.mps")
+    with open(path, "w") as f:
+        f.write(
+            "NAME PARALLEL\nROWS\n N  COST\n L  R1\n L  R2\nCOLUMNS\n"
+            + "    A  R1  1  R2  2\n    B  R2  2  R1  1\n    C  R2  -4\n"
+            + "    C  R1  -2\nENDATA\n"
+        )
+    for reader in (MPSReader, SparseMPSReader):
+        groups = find_parallel(reader(path).read()).groups
+        (cols,) = [group for group in groups if group.kind == "Variable"]
+        assert cols.names == ["A", "B", "C"] and cols.factors == [1, 1, -2]
@@ -0,0 +1,166 @@
+import pytest
+
+from lp_analyzer.__main__ import read_model
+from lp_analyzer.analyze import get_constraint_stats, get_variable_stats, make_table
+from lp_analyzer.core import ColumnNotContiguousError, SparseLPModel
+from lp_analyzer.reader import (
+    LPReader,
+    MmapMPSReader,
+    MPSReader,
+    ParallelMPSReader,
+    SparseMPSReader,
+)
+from lp_analyzer.tests.models import (
+    EXAMPLE_LP_MODEL,
+    EXAMPLE_MODEL,
+    assert_same_sparse_models,
+    write_random_model,
+)
+from lp_analyzer.util import iter_lines
+
+
+def test_iter_lines_small_chunks():
+    with open(EXAMPLE_MODEL, "r") as file:
+        expected = file.readlines()
+    with open(EXAMPLE_MODEL, "r") as file:
+        assert list(iter_lines(file, chunk_size=16)) == expected
+
+
+def test_read_small_model():
+    model = MPSReader(EXAMPLE_MODEL).read()
+    assert model.objective.row_name == "COST"
+    assert model.rows["MYEQN"].coefficients == {"YTWO": -1.0, "ZTHREE": 0.001}
+    assert model.rows["LIM2"].rhs_value == 10.0
+    assert model.objective.rhs_value is None
+    assert model.bounds["YTWO"].lhs_bound == -1.0
+    assert model.bounds["YTWO"].rhs_bound == 1.0
+    assert model.bounds["XONE"].lhs_bound is None
+
+
+def test_sparse_reader_matches_mps_reader():
+    expected = MPSReader(EXAMPLE_MODEL).read()
+    sparse_model = SparseMPSReader(EXAMPLE_MODEL).read()
+    assert sparse_model.num_rows == 4
+    assert sparse_model.num_cols == 3
+    assert sparse_model.num_nonzeros == 9
+    assert sparse_model.nbytes() < 16 * sparse_model.num_nonzeros + 200
+
+    model = sparse_model.to_lp_model()
+    assert model.objective.row_name == expected.objective.row_name
+    assert list(model.rows) == list(expected.rows)
+    for name, row in expected.rows.items():
+        assert model.rows[name].row_type == row.row_type
+        assert model.rows[name].rhs_value == row.rhs_value
+        assert list(model.rows[name].coefficients.items()) == list(
+            row.coefficients.items()
+        )
+    assert list(model.bounds) == list(expected.bounds)
+    for name, bound in expected.bounds.items():
+        assert model.bounds[name].lhs_bound == bound.lhs_bound
+        assert model.bounds[name].rhs_bound == bound.rhs_bound
+
+
+def test_parallel_reader_matches_sparse_reader(tmp_path):
+    path = str(tmp_path / "random.mps")
+    write_random_model(path, seed=3)
+    expected = SparseMPSReader(path).read()
+    # A tiny chunk size splits columns across chunks
+    model = ParallelMPSReader(path, jobs=2, chunk_size=100).read()
+    assert_same_sparse_models(model, expected)
+
+
+def test_mmap_reader_matches_sparse_reader(tmp_path):
+    path = str(tmp_path / "random.mps")
+    write_random_model(path, seed=4)
+    expected = SparseMPSReader(path).read()
+    model = MmapMPSReader(path, chunk_size=100).read()
+    assert_same_sparse_models(model, expected)
+
+
+def test_columns_that_are_not_contiguous(tmp_path):
+    path = str(tmp_path / "model.mps")
+    with open(EXAMPLE_MODEL) as f:
+        lines = f.readlines()
+    # The second line of XONE after those of YTWO
+    xone = lines.index("    XONE      LIM2                 1\n")
+    lines.insert(xone + 3, lines.pop(xone))
+    with open(path, "w") as f:
+        f.writelines(lines)
+    for reader in (
+        SparseMPSReader(path),
+        ParallelMPSReader(path, jobs=2),
+        MmapMPSReader(path),
+    ):
+        with pytest.raises(ColumnNotContiguousError, match="XONE"):
+            reader.read()
+    # read_model() reads them with MPSReader instead
+    expected = SparseLPModel.from_lp_model(MPSReader(path).read())
+    assert expected.to_lp_model().rows["LIM2"].coefficients == {
+        "ZTHREE": 1.0,
+        "XONE": 1.0,
+    }
+    assert_same_sparse_models(read_model(path, "numpy"), expected)
+    assert_same_sparse_models(read_model(path, jobs=2), expected)
+    assert_same_sparse_models(read_model(path, use_mmap=True), expected)
+
+
+def test_lp_reader_matches_mps_reader():
+    expected = MPSReader(EXAMPLE_MODEL).read()
+    model = LPReader(EXAMPLE_LP_MODEL).read()
+    assert list(model.rows) == list(expected.rows)
+    for name, row in expected.rows.items():
+        assert model.rows[name].row_type == row.row_type
+        assert model.rows[name].rhs_value == row.rhs_value
+        assert model.rows[name].coefficients == row.coefficients
+    assert make_table(get_variable_stats(model)) == make_table(
+        get_variable_stats(expected)
+    )
+    assert make_table(get_constraint_stats(model)) == make_table(
+        get_constraint_stats(expected)
+    )
+
+
+def test_lp_reader_syntax(tmp_path):
+    path = str(tmp_path / "model.lp")
+    with open(path, "w") as f:
+        f.write(
+            "\\ A comment\n"
+            "Maximize obj: 2 x(1) - 3.5e-1 y + x(1) + 4\n"
+            "Subject To\n"
+            " c1: x(1) + y\n"
+            "   - z >= -2 \\ Spans two lines\n"
+            " - y + 1e3 z =< \n"
+            "  8\n"
+            " c3 : 0 x(1) = 0\n"
+            "Bounds\n"
+            " -inf <= x(1) <= 10\n"
+            " y free\n"
+            " z >= -1\n"
+            " -5 <= w\n"
+            " v = 3\n"
+            "Generals\n"
+            " x(1)\n"
+            "Binary\n"
+            " b\n"
+            "End\n"
+        )
+    model = LPReader(path).read()
+    assert list(model.rows) == ["obj", "c1", "R2", "c3"]
+    assert model.objective.coefficients == {"x(1)": 3.0, "y": -0.35}
+    assert model.rows["c1"].row_type == "G"
+    assert model.rows["c1"].coefficients == {"x(1)": 1.0, "y": 1.0, "z": -1.0}
+    assert model.rows["c1"].rhs_value == -2.0
+    assert model.rows["R2"].row_type == "L"
+    assert model.rows["R2"].coefficients == {"y": -1.0, "z": 1000.0}
+    assert model.rows["R2"].rhs_value == 8.0
+    assert model.rows["c3"].row_type == "E"
+    bounds = {
+        name: (bound.lhs_bound, bound.rhs_bound) for name, bound in model.bounds.items()
+    }
+    assert bounds == {
+        "x(1)": (None, 10.0),
+        "z": (-1.0, None),
+        "w": (-5.0, None),
+        "v": (3.0, 3.0),
+        "b": (0.0, 1.0),
+    }
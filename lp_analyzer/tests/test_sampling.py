@@ -0,0 +1,111 @@
+import math
+
+from lp_analyzer.analyze import get_stats
+from lp_analyzer.generator import write_switch_like_model
+from lp_analyzer.reader import MPSReader, SparseMPSReader, find_sections
+from lp_analyzer.sampling import approximate_analysis, locate_sections
+from lp_analyzer.tests.models import EXAMPLE_MODEL
+
+
+def test_locate_sections(tmp_path):
+    with open(EXAMPLE_MODEL, "rb") as f:
+        data = f.read()
+    sections = locate_sections(data)
+    found = {keyword: start for keyword, _, start in find_sections(data)}
+    assert sections["ROWS"] == (found["ROWS"], found["COLUMNS"] - len(b"COLUMNS\n"))
+    assert sections["COLUMNS"][0] == found["COLUMNS"]
+    assert sections["RHS"][0] == found["RHS"]
+    assert sections["BOUNDS"][0] == found["BOUNDS"]
+    assert data[slice(*sections["BOUNDS"])].split()[-1] == b"1"
+
+    # Without the RHS and BOUNDS sections
+    data = data[: data.index(b"RHS\n")] + b"ENDATA\n"
+    sections = locate_sections(data)
+    assert data[slice(*sections["COLUMNS"])].split()[-1] == b"0.001"
+    assert sections["RHS"][0] == sections["RHS"][1] == sections["BOUNDS"][1]
+
+
+def test_whole_file_is_exact(tmp_path):
+    path = str(tmp_path / "model.mps")
+    write_switch_like_model(path, 20000)
+    result = approximate_analysis(path, budget=1 << 30, chunk_size=4096)
+    assert result.bytes_read > 0.99 * result.file_size
+    var_stats, constraint_stats = get_stats(MPSReader(path).read())
+    exact = {
+        stat.name: (len(stat.indexes), stat.count, stat.min_coef, stat.max_coef)
+        for stat in var_stats
+    }
+    assert {
+        stat.name: (stat.count[0], stat.nonzeros[0], stat.min_coef, stat.max_coef)
+        for stat in result.variable_stats
+    } == exact
+    exact = {stat.name: (stat.num_rows, stat.count) for stat in constraint_stats}
+    assert {
+        stat.name: (stat.count[0], stat.nonzeros[0]) for stat in result.constraint_stats
+    } == exact
+
+
+def test_blank_lines(tmp_path):
+    path = str(tmp_path / "model.mps")
+    write_switch_like_model(path, 20000)
+    var_stats, _ = get_stats(MPSReader(path).read())
+    with open(path, "rb") as f:
+        data = f.read()
+    # Blank lines in the COLUMNS section, also before the RHS header
+    columns_start, columns_end = data.index(b"COLUMNS\n"), data.index(b"RHS\n")
+    with open(path, "wb") as f:
+        f.write(
+            data[:columns_start]
+            + data[columns_start:columns_end].replace(b"\n", b"\n\n")
+            + data[columns_end:]
+        )
+    result = approximate_analysis(path, budget=1 << 30, chunk_size=4096)
+    assert {stat.name: stat.count[0] for stat in result.variable_stats} == {
+        stat.name: len(stat.indexes) for stat in var_stats
+    }
+
+
+def test_estimates(tmp_path):
+    path = str(tmp_path / "model.mps")
+    num_nonzeros = write_switch_like_model(path, 200000)
+    result = approximate_analysis(path, budget=1 << 20, chunk_size=8192)
+    assert result.bytes_read < 1.1 * (1 << 20)
+    estimate = sum(stat.nonzeros[0] for stat in result.constraint_stats)
+    assert abs(estimate - num_nonzeros) < 0.1 * num_nonzeros
+    # The large families are sampled, within their confidence interval
+    var_stats, _ = get_stats(MPSReader(path).read())
+    for stat in result.variable_stats:
+        if stat.name == "DispatchGen":
+            (exact,) = [exact for exact in var_stats if exact.name == stat.name]
+            assert abs(stat.nonzeros[0] - exact.count) <= stat.nonzeros[1]
+            assert stat.min_coef >= exact.min_coef and stat.max_coef <= exact.max_coef
+    assert "± " in result.report()
+
+
+def test_confidence_intervals(tmp_path):
+    path = str(tmp_path / "model.mps")
+    write_switch_like_model(path, 200000)
+    var_stats, constraint_stats = get_stats(SparseMPSReader(path).read())
+    exact = {stat.name: (len(stat.indexes), stat.count) for stat in var_stats}
+    exact.update({stat.name: (stat.num_rows, stat.count) for stat in constraint_stats})
+    # Families spread over many chunks, whose intervals should hold ~95% of the time
+    families = [
+        "DispatchGen",
+        "DispatchTx",
+        "Max_Dispatch",
+        "Max_Tx",
+        "Zone_Energy_Balance",
+    ]
+    covered = {(name, i): 0 for name in families for i in range(2)}
+    num_seeds = 20
+    for seed in range(num_seeds):
+        result = approximate_analysis(path, budget=256 << 10, seed=seed)
+        for stat in result.variable_stats + result.constraint_stats:
+            if stat.name in families:
+                for i, (total, half_width) in enumerate((stat.count, stat.nonzeros)):
+                    assert 0 < half_width < math.inf
+                    covered[stat.name, i] += (
+                        abs(total - exact[stat.name][i]) <= half_width
+                    )
+    assert min(covered.values()) >= 0.75 * num_seeds
+    assert sum(covered.values()) >= 0.9 * num_seeds * len(covered)
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from lp_analyzer.api import model_from_matrix
+from lp_analyzer.reader import MPSReader
+from lp_analyzer.scaling import suggest_scaling
+from lp_analyzer.tests.models import EXAMPLE_MODEL, CSCMatrix
+
+
+def test_family_scaling_removes_family_magnitudes():
+    # Each coefficient is 10 ** (exponent of its row family + exponent of its column family)
+    row_names = ["a(1)", "a(2)", "b(1)", "b(2)"]
+    col_names = ["x(1)", "x(2)", "y(1)"]
+    row_exponents = np.array([3, 3, -2, -2])
+    col_exponents = np.array([0, 0, 2])
+    dense = 10.0 ** (row_exponents[:, None] + col_exponents[None, :])
+    dense[0, 2] = dense[3, 0] = 0
+    indptr = np.r_[0, np.cumsum((dense != 0).sum(axis=0))]
+    indices = np.concatenate([np.flatnonzero(column) for column in dense.T])
+    matrix = CSCMatrix(dense.shape, indptr, indices, dense.T[dense.T != 0])
+    model = model_from_matrix(
+        matrix, row_names, col_names, objective=[1, 1, 1e3], objective_name="cost"
+    )
+
+    result = suggest_scaling(model)
+    low, high = result.matrix_range
+    assert high - low == pytest.approx(7)
+    low, high = result.scaled_range
+    assert high - low == pytest.approx(0, abs=1e-5)
+    exponents = {
+        scaling.name: scaling.exponent
+        for scaling in result.variable_scaling + result.constraint_scaling
+    }
+    # Scaling the rows of a by 1e-3 brings them to the magnitude of the rows of b
+    assert exponents["a"] - exponents["b"] == -5
+    assert exponents["x"] - exponents["y"] == 2
+    assert result.objective_range == pytest.approx((0, 3))
+    assert result.scaled_objective_range[1] - result.scaled_objective_range[0] == (
+        pytest.approx(1)
+    )
+
+
+def test_suggest_scaling_report():
+    # An LPModel is converted
+    result = suggest_scaling(MPSReader(EXAMPLE_MODEL).read())
+    assert [scaling.name for scaling in result.constraint_scaling] == [
+        "LIM1",
+        "LIM2",
+        "MYEQN",
+    ]
+    report = result.report()
+    assert "Coefficients of the matrix: 3.0 orders of magnitude" in report
+    assert "| MYEQN " in report and "| ZTHREE " in report
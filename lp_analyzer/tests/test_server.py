@@ -0,0 +1,147 @@
+import shutil
+import threading
+
+import pytest
+
+from lp_analyzer.analyze import get_density, get_stats, make_report
+from lp_analyzer.batch import estimate_memory
+from lp_analyzer.client import ServerError, UnixHTTPConnection, request
+from lp_analyzer.reader import SparseMPSReader
+from lp_analyzer.server import ModelStore, make_server
+from lp_analyzer.tests.models import EXAMPLE_MODEL
+
+
+def test_model_store_keeps_the_most_recent_models(tmp_path):
+    paths = [str(tmp_path / f"model_{i}.mps") for i in range(3)]
+    for path in paths:
+        shutil.copy(EXAMPLE_MODEL, path)
+    reads = []
+    store = ModelStore(2 * estimate_memory(EXAMPLE_MODEL, "numpy"), reads.append)
+    for path in paths[:2] + paths[:1] + paths[2:] + paths[:1]:
+        store.get(path)
+    # model_1 was the least recently used when model_2 was read
+    assert reads == paths
+    assert [model["input_file"] for model in store.status()["models"]] == [
+        paths[0],
+        paths[2],
+    ]
+    assert (store.hits, store.misses) == (2, 3)
+
+
+def test_model_store_reads_without_blocking_other_models(tmp_path):
+    slow, fast = str(tmp_path / "slow.mps"), str(tmp_path / "fast.mps")
+    for path in (slow, fast):
+        shutil.copy(EXAMPLE_MODEL, path)
+    started, release = threading.Event(), threading.Event()
+    reads = []
+
+    def read(path):
+        reads.append(path)
+        if path == slow:
+            started.set()
+            assert release.wait(10)
+        return path
+
+    store = ModelStore(read=read)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(store.get(slow)))
+        for _ in range(2)
+    ]
+    for thread in threads:
+        thread.start()
+    assert started.wait(10)
+    # Other models and the status are available while the slow model is read
+    assert store.get(fast) == fast
+    assert store.status()["reading"] == [slow]
+    release.set()
+    for thread in threads:
+        thread.join()
+    # The slow model was read once for both requests
+    assert results == [slow, slow] and sorted(reads) == [fast, slow]
+    assert store.status()["reading"] == []
+
+
+def test_server_answers_requests(tmp_path):
+    socket_path = str(tmp_path / "server.sock")
+    server = make_server(socket_path)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    try:
+        model = SparseMPSReader(EXAMPLE_MODEL).read()
+        answer = request("/analyze", {"input_file": EXAMPLE_MODEL}, socket_path)
+        assert answer["report"] == make_report(*get_stats(model), get_density(model))
+        answer = request(
+            "/analyze", {"input_file": EXAMPLE_MODEL, "top_k": 1}, socket_path
+        )
+        assert answer["statistics"]["variables"][0]["largest_coefs"]
+
+        answer = request(
+            "/check",
+            {"input_file": EXAMPLE_MODEL, "max": 10, "max_bound": 2},
+            socket_path,
+        )
+        assert answer["failed"] and answer["report"].startswith(
+            "coefficient 1.5e+01 of ZTHREE in COST is above 10"
+        )
+        answer = request(
+            "/check",
+            {"input_file": EXAMPLE_MODEL, "max": 100, "max_violations": 0},
+            socket_path,
+        )
+        assert not answer["failed"] and answer["report"] == "OK"
+        assert (
+            "Coefficient range"
+            in request("/drilldown", {"input_file": EXAMPLE_MODEL}, socket_path)[
+                "report"
+            ]
+        )
+
+        status = request("/status", socket_path=socket_path)
+        assert (status["hits"], status["misses"], len(status["models"])) == (4, 1, 1)
+        with pytest.raises(ServerError, match="No thresholds"):
+            request("/check", {"input_file": EXAMPLE_MODEL}, socket_path)
+        with pytest.raises(ServerError, match="FileNotFoundError"):
+            request("/analyze", {"input_file": str(tmp_path / "no.mps")}, socket_path)
+        not_a_model = tmp_path / "notes.mps"
+        not_a_model.write_text("Not a model\n")
+        with pytest.raises(ServerError):
+            request("/analyze", {"input_file": str(not_a_model)}, socket_path)
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+def test_server_rejects_other_hosts(tmp_path):
+    socket_path = str(tmp_path / "server.sock")
+    server = make_server(socket_path)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+
+    def status(method, path, host):
+        connection = UnixHTTPConnection(socket_path)
+        try:
+            # Larger than the socket buffer, such that the client is still writing
+            # the body when the server answers
+            body = "{}" + " " * (1 << 20)
+            connection.request(method, path, body=body, headers={"Host": host})
+            response = connection.getresponse()
+            response.read()
+            return response.status
+        finally:
+            connection.close()
+
+    try:
+        for host in ["localhost:8765", "127.0.0.1", "[::1]:8765"]:
+            assert status("GET", "/status", host) == 200
+            # Missing input_file
+            assert status("POST", "/analyze", host) == 400
+            assert status("POST", "/unknown", host) == 404
+        for host in ["attacker.example:8765", "localhost.attacker.example"]:
+            assert status("GET", "/status", host) == 403
+            assert status("POST", "/analyze", host) == 403
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
@@ -0,0 +1,47 @@
+from lp_analyzer.analyze import get_density, get_stats, make_json, make_report
+from lp_analyzer.generator import write_switch_like_model
+from lp_analyzer.reader import MPSReader
+from lp_analyzer.streaming import stream_analysis
+from lp_analyzer.tests.models import EXAMPLE_MODEL, write_random_model
+
+
+def assert_same_as_python_engine(path, top_k=0, **density_options):
+    model = MPSReader(path).read()
+    var_stats, constraint_stats = get_stats(model, top_k)
+    density = get_density(model, **density_options)
+    stats = stream_analysis(path, top_k, **density_options)
+    assert make_report(*stats) == make_report(var_stats, constraint_stats, density)
+    assert make_json(*stats) == make_json(var_stats, constraint_stats, density)
+
+
+def test_same_stats_as_python_engine(tmp_path):
+    assert_same_as_python_engine(EXAMPLE_MODEL, top_k=2)
+    for seed in range(5):
+        path = str(tmp_path / f"random_{seed}.mps")
+        write_random_model(path, seed)
+        assert_same_as_python_engine(path, top_k=3)
+        assert_same_as_python_engine(
+            path, top_dense=4, dense_row_threshold=3, dense_col_threshold=2
+        )
+    path = str(tmp_path / "switch.mps")
+    write_switch_like_model(path, 20000)
+    assert_same_as_python_engine(path, top_k=5)
+
+
+def test_zeroes_and_bounds(tmp_path):
+    path = str(tmp_path / "model.mps")
+    with open(path, "w") as f:
+        f.write(
+            "NAME TEST\nROWS\n N  COST\n L  LIM(1)\n L  LIM(2)\n"
+            + "COLUMNS\n    X(1)  COST  1  LIM(2)  2\n    X(1)  LIM(1)  2\n"
+            + "    Y(1)  COST  3\n    X(2)  LIM(1)  2  LIM(2)  -2\n"
+            + "    Z(1)  LIM(1)  1e-3\n"
+            + "RHS\n    RHS1  LIM(2)  5\n"
+            + "BOUNDS\n LO BND1  Z(1)  -1\n UP BND1  Z(1)  4\n FR BND1  X(1)\n"
+            + " MI BND1  X(2)\n BV BND1  X(3)\nENDATA\n"
+        )
+    assert_same_as_python_engine(path, top_k=1)
+    var_stats, _, density = stream_analysis(path)
+    assert [stat.name for stat in var_stats] == ["X", "Z"]
+    assert (var_stats[1].min_bound, var_stats[1].max_bound) == (1, 4)
+    assert [entry.name for entry in density.densest][:2] == ["X(1)", "X(2)"]
@@ -0,0 +1,48 @@
+from lp_analyzer import vectorized
+from lp_analyzer.analyze import (
+    get_constraint_stats,
+    get_variable_stats,
+    make_json,
+    make_report,
+    make_table,
+)
+from lp_analyzer.reader import MPSReader, SparseMPSReader
+from lp_analyzer.tests.models import EXAMPLE_MODEL, write_random_model
+
+
+def assert_same_tables(path, top_k=0):
+    model = MPSReader(path).read()
+    sparse_model = SparseMPSReader(path).read()
+    var_stats = get_variable_stats(model, top_k)
+    sparse_var_stats = vectorized.get_variable_stats(sparse_model, top_k)
+    assert make_table(var_stats) == make_table(sparse_var_stats)
+    constraint_stats = get_constraint_stats(model, top_k)
+    sparse_constraint_stats = vectorized.get_constraint_stats(sparse_model, top_k)
+    assert make_table(constraint_stats) == make_table(sparse_constraint_stats)
+    # Including the histograms and the extreme coefficients
+    assert make_json(var_stats, constraint_stats) == make_json(
+        sparse_var_stats, sparse_constraint_stats
+    )
+    assert make_report(var_stats, constraint_stats) == make_report(
+        sparse_var_stats, sparse_constraint_stats
+    )
+
+
+def test_vectorized_matches_example():
+    assert_same_tables(EXAMPLE_MODEL)
+
+
+def test_vectorized_matches_random_models(tmp_path):
+    for seed in range(10):
+        path = str(tmp_path / f"random_{seed}.mps")
+        write_random_model(path, seed)
+        assert_same_tables(path)
+        assert_same_tables(path, top_k=seed % 4 + 1)
+
+
+def test_top_k_coefficients():
+    model = SparseMPSReader(EXAMPLE_MODEL).read()
+    stats = {stat.name: stat for stat in vectorized.get_variable_stats(model, 2)}
+    smallest, largest = (1e-3, "MYEQN", "ZTHREE"), (1, "LIM2", "ZTHREE")
+    assert stats["ZTHREE"].smallest_coefs == [smallest, largest]
+    assert stats["ZTHREE"].largest_coefs == [largest, smallest]
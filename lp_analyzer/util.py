@@ -1,21 +1,63 @@
 import time
-from typing import Collection
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator, Optional, TextIO
+
+from . import instrumentation
 
 
 def print_progress(
-    collection: Collection, message, check_progress_every=5000, min_print_interval=0.4
+    collection: Iterable,
+    message,
+    check_progress_every=5000,
+    min_print_interval=0.4,
+    total: Optional[float] = None,
+    get_position: Optional[Callable[[], float]] = None,
 ):
     """Generator that given a collection will allow the caller to loop over and will
-    print the progress in the meantime."""
-    start_time = time.time()
-    prev_print_time = 0
-    total_len = len(collection)
-    for i, val in enumerate(collection):
-        if i % check_progress_every == 0:
-            cur_time = time.time()
-            if (cur_time - prev_print_time) > min_print_interval:
-                print(f"{message} {(i/total_len):.1%}...", end="\r")
-                prev_print_time = cur_time
-
-        yield val
-    print(f"{message}. Done in {(time.time() - start_time):.1f} s")
+    print the progress in the meantime.
+
+    By default, progress is the number of items yielded over len(collection).
+    When streaming (e.g. lines of a file) the collection has no length so instead
+    pass 'total' and a 'get_position' function (e.g. the file's byte offset).
+
+    The loop is timed as a phase (see instrumentation.py) named after the message.
+    Progress is only checked if a listener wants it (e.g. stdout is a terminal).
+    """
+    with instrumentation.phase(message, message) as phase:
+        if not instrumentation.wants_progress():
+            yield from collection
+            return
+        prev_print_time = 0
+        if total is None:
+            total = len(collection)
+        total = max(total, 1)
+        for i, val in enumerate(collection):
+            if i % check_progress_every == 0:
+                cur_time = time.time()
+                if (cur_time - prev_print_time) > min_print_interval:
+                    position = i if get_position is None else get_position()
+                    instrumentation.report_progress(phase, position / total)
+                    prev_print_time = cur_time
+
+            yield val
+
+
+def iter_lines(file: TextIO, chunk_size=1 << 20) -> Iterator[str]:
+    """
+    Yields the lines of a file, reading roughly chunk_size bytes at a time.
+
+    This is nearly as fast as file.readlines() but only ever holds one chunk
+    of lines in memory rather than the entire file.
+    """
+    while True:
+        lines = file.readlines(chunk_size)
+        if not lines:
+            return
+        yield from lines
+
+
+@contextmanager
+def timed(message):
+    """Context manager that prints how long the code within it took to run."""
+    with instrumentation.phase(message, message) as phase:
+        yield phase
@@ -0,0 +1,369 @@
+"""
+Provides vectorized (NumPy) versions of get_variable_stats and get_constraint_stats
+that operate on a SparseLPModel.
+
+Rather than looping over every non-zero in Python, the statistics are computed with grouped
+reductions over arrays keyed by the family ids of the rows and columns (see NameTable).
+The results are identical to those of analyze.py, including which row or column is reported
+when several share the minimum or maximum value (the first one in row-major order,
+i.e. the one analyze.py would encounter first).
+"""
+from array import array
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from . import analyze
+from .analyze import Coefficient, ConstraintStat, VariableStat
+from .core import (
+    DECADE_EDGES,
+    NUM_DECADES,
+    IndexSet,
+    LogHistogram,
+    NameTable,
+    SparseLPModel,
+)
+from .util import timed
+
+
+def as_numpy(a: array) -> np.ndarray:
+    """Returns a (zero-copy) NumPy view of an array.array."""
+    if len(a) == 0:
+        return np.empty(0, dtype=a.typecode)
+    return np.frombuffer(a, dtype=a.typecode)
+
+
+def nonzero_col_ids(model: SparseLPModel) -> np.ndarray:
+    """Returns the column id of every non-zero (the counterpart of model.row_indices)."""
+    col_starts = as_numpy(model.col_starts)
+    return np.repeat(
+        np.arange(model.num_cols, dtype=np.int32), np.diff(col_starts)
+    ).astype(np.int32, copy=False)
+
+
+def segments(sorted_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns where each distinct id starts in the sorted ids and the distinct ids."""
+    starts = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]])
+    if len(sorted_ids) == 0:
+        starts = starts[:0]
+    return starts, sorted_ids[starts]
+
+
+def family_index_sets(
+    table: NameTable, name_ids: np.ndarray, num_families
+) -> List[IndexSet]:
+    """Returns the set of the index ids of the given names for each family."""
+    families = as_numpy(table.name_families)[name_ids]
+    indexes = as_numpy(table.name_indexes)[name_ids]
+    # Sort by family then index such that each family is a contiguous slice
+    order = np.lexsort((indexes, families))
+    families, indexes = families[order], indexes[order]
+    ends = np.searchsorted(families, np.arange(num_families), side="right")
+    index_sets = []
+    start = 0
+    for end in ends.tolist():
+        family_indexes = indexes[start:end]
+        bits = np.zeros(family_indexes[-1] + 1 if end > start else 0, dtype=bool)
+        bits[family_indexes] = True
+        bitmap = np.packbits(bits, bitorder="little")
+        index_sets.append(
+            IndexSet(bytearray(bitmap.tobytes()), int(np.count_nonzero(bits)))
+        )
+        start = end
+    return index_sets
+
+
+def family_histograms(
+    families: np.ndarray, values: np.ndarray, num_families
+) -> List[LogHistogram]:
+    """Returns the LogHistogram of the (absolute) values of each family, ignoring zeroes."""
+    is_nonzero = values != 0
+    buckets = np.searchsorted(DECADE_EDGES, values[is_nonzero], side="right")
+    counts = np.bincount(
+        families[is_nonzero].astype(np.int64) * NUM_DECADES + buckets,
+        minlength=num_families * NUM_DECADES,
+    ).reshape(num_families, NUM_DECADES)
+    return [LogHistogram(family_counts) for family_counts in counts.tolist()]
+
+
+def family_extreme_coefs(
+    model: SparseLPModel,
+    families: np.ndarray,
+    values: np.ndarray,
+    keys: np.ndarray,
+    num_families,
+    k,
+) -> List[Optional[Tuple[List[Coefficient], List[Coefficient]]]]:
+    """
+    Returns the k smallest (in increasing order) and the k largest (in decreasing order)
+    non-zero coefficients of each family, or None for the families without any.
+    Like ExtremeValues, ties are broken by the smallest row-major key.
+    Rather than sorting all the values, each family is partitioned around its k-th
+    smallest and k-th largest values.
+    """
+    is_nonzero = values != 0
+    families, values, keys = families[is_nonzero], values[is_nonzero], keys[is_nonzero]
+    # Sort by family such that each family is a contiguous slice
+    order = np.argsort(families, kind="stable")
+    families, values, keys = families[order], values[order], keys[order]
+    ends = np.searchsorted(families, np.arange(num_families), side="right").tolist()
+
+    def coefficients(positions) -> List[Coefficient]:
+        return [
+            (
+                val,
+                model.row_names[key // model.num_cols],
+                model.col_names[key % model.num_cols],
+            )
+            for val, key in zip(values[positions].tolist(), keys[positions].tolist())
+        ]
+
+    extremes = []
+    start = 0
+    for end in ends:
+        if end == start:
+            extremes.append(None)
+            continue
+        family_values, family_keys = values[start:end], keys[start:end]
+        smallest = largest = np.arange(end - start)
+        if end - start > k:
+            # Only the values up to the k-th smallest (or from the k-th largest) are sorted,
+            # including those equal to it since ties are broken by key
+            low, high = np.partition(family_values, [k - 1, end - start - k])[
+                [k - 1, end - start - k]
+            ]
+            smallest = np.flatnonzero(family_values <= low)
+            largest = np.flatnonzero(family_values >= high)
+        smallest = smallest[
+            np.lexsort((family_keys[smallest], family_values[smallest]))[:k]
+        ]
+        largest = largest[
+            np.lexsort((family_keys[largest], -family_values[largest]))[:k]
+        ]
+        extremes.append((coefficients(start + smallest), coefficients(start + largest)))
+        start = end
+    return extremes
+
+
+class GroupedExtremes:
+    """
+    Computes the minimum and maximum value of each group as well as
+    the tie-breaking key of the entry where each is found.
+
+    When several entries share the minimum (or maximum), the one with the smallest
+    key wins. Groups without any entries have a key of -1.
+    """
+
+    def __init__(
+        self, groups: np.ndarray, values: np.ndarray, keys: np.ndarray, num_groups
+    ):
+        self.min = np.full(num_groups, np.inf)
+        self.max = np.full(num_groups, -np.inf)
+        self.min_key = np.full(num_groups, -1, dtype=np.int64)
+        self.max_key = np.full(num_groups, -1, dtype=np.int64)
+        self.first_key = np.full(num_groups, -1, dtype=np.int64)
+        self.count = np.bincount(groups, minlength=num_groups)
+        if len(groups) == 0:
+            return
+
+        # Sort by group so that each group is a contiguous slice
+        order = np.argsort(groups, kind="stable")
+        groups, values, keys = groups[order], values[order], keys[order]
+        starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+        present = groups[starts]
+
+        self.min[present] = np.minimum.reduceat(values, starts)
+        self.max[present] = np.maximum.reduceat(values, starts)
+        self.first_key[present] = np.minimum.reduceat(keys, starts)
+        self.min_key[present] = self._key_of(groups, values, keys, self.min)
+        self.max_key[present] = self._key_of(groups, values, keys, self.max)
+
+    @staticmethod
+    def _key_of(groups, values, keys, target):
+        """Returns the smallest key of the entries equal to their group's target."""
+        matches = np.flatnonzero(values == target[groups])
+        matched_groups = groups[matches]
+        starts = np.flatnonzero(np.r_[True, matched_groups[1:] != matched_groups[:-1]])
+        return np.minimum.reduceat(keys[matches], starts)
+
+
+def get_variable_stats(model: SparseLPModel, top_k=0) -> List[VariableStat]:
+    with timed("Analyzing variables (vectorized)"):
+        family_names = model.col_table.families
+        col_families = as_numpy(model.col_table.name_families)
+        num_families = len(family_names)
+
+        row_ids = as_numpy(model.row_indices)
+        col_ids = nonzero_col_ids(model)
+        values = np.abs(as_numpy(model.values))
+        # Skip the objective, we want values only in the matrix
+        if model.objective is not None and not analyze.include_obj_coef:
+            in_matrix = row_ids != model.objective
+            row_ids, col_ids, values = (
+                row_ids[in_matrix],
+                col_ids[in_matrix],
+                values[in_matrix],
+            )
+        # Position of each non-zero when looping over the rows then their columns
+        row_major_keys = row_ids.astype(np.int64) * model.num_cols + col_ids
+        coef_families = col_families[col_ids]
+        coefs = GroupedExtremes(coef_families, values, row_major_keys, num_families)
+        coef_histograms = family_histograms(coef_families, values, num_families)
+        if top_k:
+            extreme_coefs = family_extreme_coefs(
+                model, coef_families, values, row_major_keys, num_families, top_k
+            )
+
+        # Bounds are visited in order, lower bound then upper bound, ignoring unset or zero bounds
+        bound_cols = as_numpy(model.bound_order)
+        bound_values = np.abs(
+            np.column_stack(
+                (as_numpy(model.lower)[bound_cols], as_numpy(model.upper)[bound_cols])
+            ).ravel()
+        )
+        bound_keys = np.arange(len(bound_values), dtype=np.int64)
+        bound_families = np.repeat(col_families[bound_cols], 2)
+        is_set = ~np.isnan(bound_values) & (bound_values != 0)
+        bounds = GroupedExtremes(
+            bound_families[is_set],
+            bound_values[is_set],
+            bound_keys[is_set],
+            num_families,
+        )
+        bound_histograms = family_histograms(
+            bound_families[is_set], bound_values[is_set], num_families
+        )
+        # Lower bounds are at even positions and upper bounds at odd positions
+        is_lower = (bound_keys % 2 == 0)[is_set]
+        log_bounds = np.log(bound_values[is_set])
+        lower_families = bound_families[is_set][is_lower]
+        lower_count = np.bincount(lower_families, minlength=num_families)
+        lower_sum = np.bincount(
+            lower_families, weights=log_bounds[is_lower], minlength=num_families
+        )
+        upper_families = bound_families[is_set][~is_lower]
+        upper_count = np.bincount(upper_families, minlength=num_families)
+        upper_sum = np.bincount(
+            upper_families, weights=log_bounds[~is_lower], minlength=num_families
+        )
+
+        # Distinct indexes of each family among the columns in the matrix
+        used_cols = np.flatnonzero(np.bincount(col_ids, minlength=model.num_cols))
+        family_indexes = family_index_sets(model.col_table, used_cols, num_families)
+
+        # Families in the order they're first encountered in the matrix, then in the bounds
+        in_matrix = np.flatnonzero(coefs.count)
+        family_order = in_matrix[np.argsort(coefs.first_key[in_matrix])].tolist()
+        seen = set(family_order)
+        for family in col_families[bound_cols].tolist():
+            if family not in seen:
+                seen.add(family)
+                family_order.append(family)
+
+        var_stats = []
+        for family in family_order:
+            var_stat = VariableStat(family_names[family])
+            if coefs.count[family]:
+                var_stat.min_coef = float(coefs.min[family])
+                var_stat.min_coef_index = model.row_names[
+                    coefs.min_key[family] // model.num_cols
+                ]
+                # The maximum is only updated by values greater than 0
+                if coefs.max[family] > 0:
+                    var_stat.max_coef = float(coefs.max[family])
+                    var_stat.max_coef_index = model.row_names[
+                        coefs.max_key[family] // model.num_cols
+                    ]
+            if bounds.count[family]:
+                var_stat.min_bound = float(bounds.min[family])
+                var_stat.max_bound = float(bounds.max[family])
+                var_stat.min_bound_index = model.col_table.index_of(
+                    bound_cols[bounds.min_key[family] // 2]
+                )
+                var_stat.max_bound_index = model.col_table.index_of(
+                    bound_cols[bounds.max_key[family] // 2]
+                )
+            var_stat.geom_lower_count = int(lower_count[family])
+            var_stat.geom_lower_sum = float(lower_sum[family])
+            var_stat.geom_upper_count = int(upper_count[family])
+            var_stat.geom_upper_sum = float(upper_sum[family])
+            var_stat.indexes = family_indexes[family]
+            var_stat.count = int(coefs.count[family])
+            var_stat.coef_histogram = coef_histograms[family]
+            var_stat.bound_histogram = bound_histograms[family]
+            if top_k and extreme_coefs[family] is not None:
+                var_stat.smallest_coefs, var_stat.largest_coefs = extreme_coefs[family]
+            var_stats.append(var_stat)
+
+    return var_stats
+
+
+def get_constraint_stats(model: SparseLPModel, top_k=0) -> List[ConstraintStat]:
+    with timed("Analyzing constraints (vectorized)"):
+        family_names = model.row_table.families
+        row_families = as_numpy(model.row_table.name_families)
+        num_families = len(family_names)
+
+        row_ids = as_numpy(model.row_indices)
+        col_ids = nonzero_col_ids(model)
+        values = np.abs(as_numpy(model.values))
+        # The count includes zeroes but the min and max coefficients don't
+        count = np.bincount(row_families[row_ids], minlength=num_families)
+        is_nonzero = values != 0
+        row_ids, col_ids, values = (
+            row_ids[is_nonzero],
+            col_ids[is_nonzero],
+            values[is_nonzero],
+        )
+        row_major_keys = row_ids.astype(np.int64) * model.num_cols + col_ids
+        coef_families = row_families[row_ids]
+        coefs = GroupedExtremes(coef_families, values, row_major_keys, num_families)
+        coef_histograms = family_histograms(coef_families, values, num_families)
+        if top_k:
+            extreme_coefs = family_extreme_coefs(
+                model, coef_families, values, row_major_keys, num_families, top_k
+            )
+
+        # The objective function has no RHS (NaN)
+        rhs = np.abs(as_numpy(model.rhs))
+        has_rhs = np.flatnonzero(~np.isnan(rhs))
+        rhs_stats = GroupedExtremes(
+            row_families[has_rhs], rhs[has_rhs], has_rhs.astype(np.int64), num_families
+        )
+        rhs_histograms = family_histograms(
+            row_families[has_rhs], rhs[has_rhs], num_families
+        )
+        num_rows = np.bincount(row_families, minlength=num_families)
+
+        row_stats = []
+        for family in range(num_families):
+            row_stat = ConstraintStat(family_names[family])
+            if coefs.count[family]:
+                row_stat.min_coef = float(coefs.min[family])
+                row_stat.max_coef = float(coefs.max[family])
+                row_stat.min_coef_ext = model.col_names[
+                    coefs.min_key[family] % model.num_cols
+                ]
+                row_stat.max_coef_ext = model.col_names[
+                    coefs.max_key[family] % model.num_cols
+                ]
+            if rhs_stats.count[family]:
+                row_stat.min_rhs = float(rhs_stats.min[family])
+                row_stat.min_rhs_ext = model.row_table.index_of(
+                    rhs_stats.min_key[family]
+                )
+                # The maximum is only updated by values greater than 0
+                if rhs_stats.max[family] > 0:
+                    row_stat.max_rhs = float(rhs_stats.max[family])
+                    row_stat.max_rhs_ext = model.row_table.index_of(
+                        rhs_stats.max_key[family]
+                    )
+            row_stat.num_rows = int(num_rows[family])
+            row_stat.count = int(count[family])
+            row_stat.coef_histogram = coef_histograms[family]
+            row_stat.rhs_histogram = rhs_histograms[family]
+            if top_k and extreme_coefs[family] is not None:
+                row_stat.smallest_coefs, row_stat.largest_coefs = extreme_coefs[family]
+            row_stats.append(row_stat)
+
+    return row_stats